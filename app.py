@@ -5,6 +5,10 @@ import time
 import datetime
 import os
 from utils.database import get_database
+from utils.aggregations import article_counts, author_counts
+from config import DASHBOARD_CACHE_TTL, SELECTOR_STATS_FILE
+from loggings import reader as log_reader
+from utils.selector_utils import SelectorStats
 from scheduler import tasks
 from tests.yahoo.yahoo_news import scrape_yahoo_news
 # タイトルを表示
@@ -13,47 +17,60 @@ st.title('Webスクレイピングダッシュボード')
 # サイドバーにメニューを追加
 menu = st.sidebar.selectbox("メニュー", ["データの可視化", "システム監視", "スクレイピング実行"])
 
-if menu == "データの可視化":
-    st.header("データの可視化")
+# ログのレベル (絞り込みの選択肢)
+LOG_LEVELS = ["TRACE", "DEBUG", "INFO", "SUCCESS", "WARNING", "ERROR", "CRITICAL"]
 
-    # データベースからデータを取得
-    db = get_database()
-    collection_name = st.selectbox("コレクションを選択", db.list_collection_names())
-    collection = db[collection_name]
-    data = list(collection.find())
+# 表示期間ごとの日数
+PERIOD_DAYS = {"1日": 1, "1週間": 7, "1ヶ月": 30}
 
-    if data:
-        df = pd.DataFrame(data)
 
-        # 日付データの整形と追加
-        df['time'] = pd.to_datetime(df['time'])
-        df['date'] = df['time'].dt.date
+@st.cache_data(ttl=DASHBOARD_CACHE_TTL)
+def load_article_counts(collection_name, end_date, period, unit):
+    """
+    表示期間の記事数を MongoDB の集計で取得する (コレクション・終了日・期間・単位ごとに TTL 付きでキャッシュ)
 
+    終了日を引数にしてキャッシュのキーに含め、日付が変わったら前日までの期間のキャッシュを使わないようにする。
+    """
+    start_date = end_date - datetime.timedelta(days=PERIOD_DAYS[period])
+    return pd.DataFrame(article_counts(collection_name, start_date, end_date, unit=unit),
+                        columns=["bucket", "count"])
 
-        # 記事数の表示期間選択
-        st.subheader("記事数")
-        period = st.selectbox("表示期間", ["1日", "1週間", "1ヶ月"])
 
-        # 期間に応じたデータのフィルタリング
-        if period == "1日":
-            end_date = datetime.date.today()
-            start_date = end_date - datetime.timedelta(days=1)
-        elif period == "1週間":
-            end_date = datetime.date.today()
-            start_date = end_date - datetime.timedelta(weeks=1)
-        elif period == "1ヶ月":
-            end_date = datetime.date.today()
-            start_date = end_date - datetime.timedelta(days=30)
+@st.cache_data(ttl=DASHBOARD_CACHE_TTL)
+def load_author_counts(collection_name, end_date, period):
+    """表示期間の配信元ごとの記事数を MongoDB の集計で取得する (load_article_counts と同じく終了日ごとにキャッシュ)"""
+    start_date = end_date - datetime.timedelta(days=PERIOD_DAYS[period])
+    return pd.DataFrame(author_counts(collection_name, start_date, end_date), columns=["author", "count"])
 
-        filtered_df = df[(df['date'] >= start_date) & (df['date'] <= end_date)]
 
+if menu == "データの可視化":
+    st.header("データの可視化")
 
-        # 日毎の記事数を集計
-        daily_counts = filtered_df.groupby('date').size().reset_index(name='count')
+    # データベースからデータを取得
+    db = get_database()
+    collection_name = st.selectbox("コレクションを選択", db.list_collection_names())
+
+    # 記事数の表示期間選択
+    st.subheader("記事数")
+    period = st.selectbox("表示期間", list(PERIOD_DAYS))
+    unit = "hour" if period == "1日" else "day"
 
+    # 日毎 (1日の場合は時間毎) の記事数をサーバー側で集計する
+    end_date = datetime.date.today()
+    counts = load_article_counts(collection_name, end_date, period, unit)
+
+    if not counts.empty:
         # 折れ線グラフで表示
-        fig = px.line(daily_counts, x='date', y='count', title=f'{period}の記事数')
-        fig.update_xaxes(title_text="日付")
+        fig = px.line(counts, x='bucket', y='count', title=f'{period}の記事数')
+        fig.update_xaxes(title_text="日時" if unit == "hour" else "日付")
+        fig.update_yaxes(title_text="記事数")
+        st.plotly_chart(fig)
+
+        # 配信元ごとの記事数
+        st.subheader("配信元別の記事数")
+        authors = load_author_counts(collection_name, end_date, period)
+        fig = px.bar(authors, x='author', y='count', title=f'{period}の配信元別の記事数')
+        fig.update_xaxes(title_text="配信元")
         fig.update_yaxes(title_text="記事数")
         st.plotly_chart(fig)
 
@@ -74,13 +91,28 @@ elif menu == "スクレイピング実行": # 新しいメニューを追加
 elif menu == "システム監視":
     st.header("システム監視")
 
-    # ログファイルを読み込み、表示
+    # ログファイルの末尾だけを読み込み、表示 (ファイルの大きさに関係なく読む量は LOG_VIEWER_MAX_BYTES まで)
     st.subheader("スクレイピング実行ログ")
     log_file_path = os.environ.get("LOG_FILE", "application.log") # config.pyと同じ設定
-    if os.path.exists(log_file_path):
-        with open(log_file_path, "r", encoding="utf-8") as f: # エンコーディング指定
-            log_content = f.read()
-        st.text_area("ログ", log_content, height=300)
+    line_count = st.number_input("表示件数", min_value=10, max_value=2000, value=200, step=50)
+    # 絞り込みの選択肢は、直近のログに出現したレベル・モジュールから作る
+    recent_records, _ = log_reader.tail(log_file_path, n=line_count)
+    seen_levels, seen_modules = log_reader.list_levels_and_modules(recent_records)
+    levels = st.multiselect("レベル", LOG_LEVELS + [level for level in seen_levels if level not in LOG_LEVELS])
+    modules = set(st.multiselect("モジュール", seen_modules))
+
+    log_records, log_offset = log_reader.tail(log_file_path, n=line_count, levels=set(levels), modules=modules)
+    log_area = st.empty()  # ログの表示領域を確保 (追記分を読み込んだら描画し直す)
+    log_area.code("\n".join(record.format() for record in log_records), language=None)
+
+    # セレクタ候補ごとの取得率 (テンプレートが変わると、直近の取得率が急に入れ替わる)
+    st.subheader("セレクタの取得率")
+    selector_rows = [{"フィールド": field, **row}
+                     for field, rows in SelectorStats(path=SELECTOR_STATS_FILE).summary().items() for row in rows]
+    if selector_rows:
+        st.dataframe(pd.DataFrame(selector_rows))
+    else:
+        st.info("セレクタの取得結果はまだありません。")
 
     # タスクの実行状況を表示
     st.subheader("スクレイピング実行状況")
@@ -89,6 +121,13 @@ elif menu == "システム監視":
     status = st.empty()  # ステータス表示領域を確保
 
     while True:
+        # 前回以降に追記されたログだけを読み込んで追加する
+        new_records, log_offset = log_reader.read_since(log_file_path, log_offset, levels=set(levels),
+                                                        modules=modules)
+        if new_records:
+            log_records = (log_records + new_records)[-line_count:]
+            log_area.code("\n".join(record.format() for record in log_records), language=None)
+
         # scheduler/tasks.py の next_run_time と run_status を取得
         try:
             now = datetime.datetime.now()
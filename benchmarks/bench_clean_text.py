@@ -0,0 +1,66 @@
+"""
+clean_text のマイクロベンチマーク
+
+従来の BeautifulSoup を使うクレンジング処理と、utils.parser.clean_text / clean_texts の
+1断片あたりの処理時間を比較する。
+
+    python -m benchmarks.bench_clean_text [--repeat 5] [--number 2000]
+"""
+import argparse
+import timeit
+from pathlib import Path
+from bs4 import BeautifulSoup
+from utils.parser import (clean_text, clean_texts, remove_html_tags, decode_html_entities,
+                          normalize_text, remove_extra_whitespaces)
+
+FIXTURE_DIR = Path(__file__).resolve().parent.parent / "tests" / "yahoo" / "fixtures"
+
+
+def legacy_clean_text(text):
+    """BeautifulSoup を使う従来のクレンジング処理"""
+    if not text:
+        return ""
+    text = remove_html_tags(text)
+    text = decode_html_entities(text)
+    text = normalize_text(text)
+    return remove_extra_whitespaces(text)
+
+
+def load_fragments():
+    """フィクスチャHTMLから、記事の段落・見出し・日時に相当する断片を集める"""
+    fragments = []
+    for path in sorted(FIXTURE_DIR.glob("*.html")):
+        soup = BeautifulSoup(path.read_text(encoding="utf-8"), "html.parser")
+        fragments.extend(el.decode_contents() for el in soup.find_all(["p", "h1", "time", "a", "span"]))
+    return fragments
+
+
+def bench(label, func, number, repeat, fragment_count):
+    """func を number 回実行した時間を repeat 回計測し、1断片あたりの最小時間を表示する"""
+    best = min(timeit.repeat(func, number=number, repeat=repeat))
+    per_fragment_us = best / number / fragment_count * 1e6
+    print(f"{label:<28} {per_fragment_us:8.2f} µs/断片")
+    return per_fragment_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description="clean_text のマイクロベンチマーク")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args()
+
+    fragments = load_fragments()
+    assert [legacy_clean_text(f) for f in fragments] == clean_texts(fragments), "従来の処理と結果が一致しません"
+    print(f"断片数: {len(fragments)}")
+
+    legacy = bench("legacy (BeautifulSoup)", lambda: [legacy_clean_text(f) for f in fragments],
+                   args.number, args.repeat, len(fragments))
+    single = bench("clean_text", lambda: [clean_text(f) for f in fragments],
+                   args.number, args.repeat, len(fragments))
+    batch = bench("clean_texts (batch)", lambda: clean_texts(fragments),
+                  args.number, args.repeat, len(fragments))
+    print(f"速度比: clean_text {legacy / single:.1f}x, clean_texts {legacy / batch:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
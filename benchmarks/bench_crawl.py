@@ -0,0 +1,224 @@
+"""
+クロールのベンチマーク
+
+記録済みのアーカイブ (benchmarks.crawl_archive) をローカルのサーバーから再生し、scrape_yahoo_news を実行して
+記事数/秒・記事ごとの処理時間 (p50 / p99)・ブラウザのメモリ使用量 (RSS のピーク)・DB への書き込み件数を表示する。
+
+    # 実際のサイトからアーカイブを記録する
+    python -m benchmarks.bench_crawl record benchmarks/archive --pages 1 --articles 20
+
+    # 記録したアーカイブを再生してベンチマークを実行する
+    python -m benchmarks.bench_crawl run benchmarks/archive --latency 0.05 --jitter 0.02
+
+記事は --collection のコレクション (既定: bench_news_paper) に保存し、変更検知の Slack 通知は送らない。
+"""
+import argparse
+import os
+import statistics
+import threading
+import time
+from benchmarks.crawl_archive import ReplayServer, record_crawl
+from change_detection import detector
+from config import SITEURL
+from scrapers.yahoo import yahoo_news
+from utils import database, rate_limiter
+from utils.http_client import HttpFetcher
+from utils.metrics import metrics, run_summary
+
+
+def _descendant_pids(pid):
+    """/proc から子孫プロセスの PID を集める (Linux のみ)"""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    pids, stack = [], [pid]
+    while stack:
+        for child in children.get(stack.pop(), []):
+            pids.append(child)
+            stack.append(child)
+    return pids
+
+
+def browser_rss_bytes():
+    """このプロセスの子孫 (Playwright のドライバとブラウザ) の RSS の合計。取得できない場合は None"""
+    if not os.path.isdir("/proc"):
+        return None
+    total = 0
+    for pid in _descendant_pids(os.getpid()):
+        try:
+            with open(f"/proc/{pid}/status", "r") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1]) * 1024
+                        break
+        except OSError:
+            continue
+    return total
+
+
+class RssSampler(threading.Thread):
+    """一定間隔でブラウザの RSS を計測し、ピークを記録するスレッド"""
+
+    def __init__(self, interval=0.5):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = None
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.is_set():
+            rss = browser_rss_bytes()
+            if rss is not None:
+                self.peak = max(self.peak or 0, rss)
+            self._stopped.wait(self.interval)
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+def percentile(values, q):
+    """q パーセンタイル (0-100) を返す"""
+    if not values:
+        return 0.0
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[min(98, max(0, int(q) - 1))]
+
+
+def run_benchmark(archive_dir, latency=0.0, jitter=0.0, max_pages=1, collection="bench_news_paper",
+                  fetch_mode="browser", keep_rate_limit=False, headless=True, port=18080):
+    """
+    アーカイブを再生するサーバーに対して scrape_yahoo_news を実行し、計測結果を返す
+
+    再生サーバーのポートを固定し、実行をまたいで記事のURL (変更検知の状態のキー) が変わらないようにする。
+    keep_rate_limit が False の場合は、送信レートの制限 (utils.rate_limiter) を外して実行する。
+
+    Returns:
+        dict: 記事数・経過時間・記事数/秒・p50/p99・RSS のピーク・DB書き込み件数・サーバーへのリクエスト数・
+            処理ごとの回数と所要時間 (utils.metrics)
+    """
+    latencies = []
+    saved = []
+    original_scrape_article_page = yahoo_news.scrape_article_page
+    original_save_article = yahoo_news.save_article
+    original = {
+        "rate_limiter": rate_limiter._rate_limiter, "collection": yahoo_news.ARTICLE_COLLECTION, "fetch_mode": yahoo_news.FETCH_MODE,
+        "send_notification": detector.send_notification, "siteurl": dict(SITEURL),
+    }
+
+    def timed_scrape_article_page(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return original_scrape_article_page(*args, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - start)
+
+    def counting_save_article(page, url, article_data, extracted, path=None):
+        saved.append(url)
+        return original_save_article(page, url, article_data, extracted, path)
+
+    with ReplayServer(archive_dir, latency=latency, jitter=jitter, port=port, seed=0) as server:
+        SITEURL.update({key: server.url_for(url) for key, url in SITEURL.items()})
+        yahoo_news.scrape_article_page = timed_scrape_article_page
+        yahoo_news.save_article = counting_save_article
+        yahoo_news.ARTICLE_COLLECTION = collection
+        yahoo_news.FETCH_MODE = fetch_mode
+        detector.send_notification = lambda message: None
+        if not keep_rate_limit:
+            rate_limiter._rate_limiter = rate_limiter.RateLimiter(jitter=0, rate=1e6, max_rate=1e6, burst=1e6)
+
+        database.get_database()[collection].drop()
+        sampler = RssSampler()
+        sampler.start()
+        before = metrics.snapshot()
+        start = time.perf_counter()
+        try:
+            yahoo_news.scrape_yahoo_news(headless=headless, max_pages=max_pages)
+        finally:
+            elapsed = time.perf_counter() - start
+            sampler.stop()
+            yahoo_news.scrape_article_page = original_scrape_article_page
+            yahoo_news.save_article = original_save_article
+            rate_limiter._rate_limiter = original["rate_limiter"]
+            yahoo_news.ARTICLE_COLLECTION = original["collection"]
+            yahoo_news.FETCH_MODE = original["fetch_mode"]
+            detector.send_notification = original["send_notification"]
+            SITEURL.update(original["siteurl"])
+
+        writer = database.get_bulk_writer(collection)
+        return {
+            "articles": len(saved),
+            "elapsed": elapsed,
+            "articles_per_sec": len(saved) / elapsed if elapsed else 0.0,
+            "p50": percentile(latencies, 50),
+            "p99": percentile(latencies, 99),
+            "browser_rss_peak": sampler.peak,
+            "db_writes": dict(writer.stats),
+            "requests": server.requests,
+            "not_found": server.not_found,
+            "stages": run_summary(before, metrics.snapshot())["stages"],
+        }
+
+
+def print_report(result):
+    rss = result["browser_rss_peak"]
+    print(f"記事数:           {result['articles']}件 ({result['elapsed']:.1f}秒)")
+    print(f"記事数/秒:        {result['articles_per_sec']:.2f}")
+    print(f"記事ごとの時間:   p50 {result['p50'] * 1000:.0f}ms / p99 {result['p99'] * 1000:.0f}ms")
+    print(f"ブラウザ RSS:     {'-' if rss is None else f'{rss / 1024 / 1024:.0f}MB'} (ピーク)")
+    print(f"DB書き込み:       {result['db_writes']}")
+    print(f"リクエスト:       {result['requests']}件 (未記録: {result['not_found']}件)")
+    for stage, s in sorted(result["stages"].items(), key=lambda item: -item[1]["seconds"]):
+        print(f"  {stage:<16}{s['count']:>6}回 {s['seconds']:>8.2f}秒")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="記録済みのアーカイブを再生するクロールのベンチマーク")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = subparsers.add_parser("record", help="実際のサイトからアーカイブを記録する")
+    record_parser.add_argument("archive")
+    record_parser.add_argument("--pages", type=int, default=1)
+    record_parser.add_argument("--articles", type=int, default=20)
+
+    run_parser = subparsers.add_parser("run", help="アーカイブを再生してベンチマークを実行する")
+    run_parser.add_argument("archive")
+    run_parser.add_argument("--latency", type=float, default=0.0, help="応答までの平均遅延 (秒)")
+    run_parser.add_argument("--jitter", type=float, default=0.0, help="遅延のゆらぎ (秒)")
+    run_parser.add_argument("--pages", type=int, default=1)
+    run_parser.add_argument("--collection", default="bench_news_paper")
+    run_parser.add_argument("--fetch-mode", choices=["browser", "http"], default="browser")
+    run_parser.add_argument("--keep-rate-limit", action="store_true", help="送信レートの制限を外さない")
+    run_parser.add_argument("--headed", action="store_true", help="ブラウザを表示する")
+    run_parser.add_argument("--port", type=int, default=18080, help="再生サーバーのポート")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        fetcher = HttpFetcher()
+
+        def fetch(url):
+            time.sleep(1)  # 記録時も実際のサイトに負荷をかけないよう間隔を空ける
+            response = fetcher.session.get(url, timeout=fetcher.timeout)
+            return response.status_code, response.headers.get("Content-Type", ""), response.content
+
+        try:
+            record_crawl(args.archive, fetch, max_pages=args.pages, max_articles=args.articles)
+        finally:
+            fetcher.close()
+    else:
+        result = run_benchmark(args.archive, latency=args.latency, jitter=args.jitter, max_pages=args.pages,
+                               collection=args.collection, fetch_mode=args.fetch_mode,
+                               keep_rate_limit=args.keep_rate_limit, headless=not args.headed, port=args.port)
+        print_report(result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+近似重複検出 (utils.dedup.DuplicateIndex) のマイクロベンチマーク
+
+フィクスチャの記事本文を一部ずつ書き換えた合成記事を作り、署名の計算 (1件ずつ / バッチ) と
+索引への問い合わせを含めた判定の1秒あたりの処理件数を計測する。
+
+    python -m benchmarks.bench_dedup [--articles 20000] [--batch-size 100]
+"""
+import argparse
+import random
+import time
+from pathlib import Path
+from bs4 import BeautifulSoup
+from utils.dedup import DuplicateIndex
+from utils.parser import clean_texts
+
+FIXTURE_DIR = Path(__file__).resolve().parent.parent / "tests" / "yahoo" / "fixtures"
+
+
+def load_paragraphs():
+    """フィクスチャHTMLから段落のテキストを集める"""
+    paragraphs = []
+    for path in sorted(FIXTURE_DIR.glob("*.html")):
+        soup = BeautifulSoup(path.read_text(encoding="utf-8"), "html.parser")
+        paragraphs.extend(clean_texts([p.decode_contents() for p in soup.find_all("p")]))
+    return [p for p in paragraphs if p]
+
+
+def make_articles(count, seed=0):
+    """フィクスチャの段落の文字から合成記事を作る (約1/4は既出の記事の一部を書き換えた近似重複)"""
+    rng = random.Random(seed)
+    alphabet = sorted(set("".join(load_paragraphs())))
+    articles = []
+    for i in range(count):
+        if articles and rng.random() < 0.25:
+            base = rng.choice(articles)
+            articles.append(base[:len(base) // 2] + f"（{i}更新）" + base[len(base) // 2:])
+            continue
+        articles.append("".join(rng.choices(alphabet, k=rng.randint(400, 1200))))
+    return articles
+
+
+def report(label, count, elapsed):
+    print(f"{label:<28} {count / elapsed:10,.0f} 件/秒")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="近似重複検出のマイクロベンチマーク")
+    parser.add_argument("--articles", type=int, default=20000)
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+
+    articles = make_articles(args.articles)
+    print(f"記事数: {len(articles)} (平均 {sum(map(len, articles)) / len(articles):.0f}文字)")
+
+    index = DuplicateIndex()
+    start = time.perf_counter()
+    for text in articles:
+        index.signature(text)
+    report("signature (1件ずつ)", len(articles), time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for i in range(0, len(articles), args.batch_size):
+        index.signatures(articles[i:i + args.batch_size])
+    report(f"signatures (バッチ {args.batch_size}件)", len(articles), time.perf_counter() - start)
+
+    items = [(f"https://example.com/{i}", text) for i, text in enumerate(articles)]
+    start = time.perf_counter()
+    duplicates = 0
+    for i in range(0, len(items), args.batch_size):
+        duplicates += sum(result is not None for result in index.check_many(items[i:i + args.batch_size]))
+    report(f"check_many (バッチ {args.batch_size}件)", len(items), time.perf_counter() - start)
+    print(f"近似重複と判定した記事: {duplicates}件 / 索引の記事: {len(index)}件")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""
+クロールの記録・再生ハーネス
+
+Yahoo!ニュースのトップページ・トピックス一覧 (top-picks)・記事・ピックアップ・分割記事 (?page=N) のレスポンスを
+フィクスチャのアーカイブに記録し、ローカルのHTTPサーバーから遅延とゆらぎを付けて再生する。
+再生時はHTML中の元のオリジン (https://news.yahoo.co.jp) をサーバーのURLに置き換えるため、
+クローラーはリンクを辿ってもローカルのサーバーにしかアクセスしない。
+
+    アーカイブの構成:
+        <archive>/index.json          {"origin": ..., "responses": {"/path?query": {"status", "content_type", "body"}}}
+        <archive>/bodies/<sha1>.gz    レスポンス本文 (gzip)
+"""
+import gzip
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit
+from bs4 import BeautifulSoup
+from config import SITEURL, yahoo_SELECTORS
+from loggings.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_ORIGIN = "https://news.yahoo.co.jp"
+
+
+def _path_of(url):
+    """URL からアーカイブのキー (パス + クエリ) を返す"""
+    parts = urlsplit(url)
+    return parts.path + (f"?{parts.query}" if parts.query else "")
+
+
+class CrawlArchive:
+    """記録したレスポンスをパス + クエリをキーにして保存・読み込みするアーカイブ"""
+
+    def __init__(self, directory, origin=DEFAULT_ORIGIN):
+        """
+        Args:
+            directory: アーカイブのディレクトリ
+            origin: 記録したサイトのオリジン (再生時に置き換える)
+        """
+        self.directory = Path(directory)
+        self.origin = origin
+        self.responses = {}
+        index = self.directory / "index.json"
+        if index.exists():
+            data = json.loads(index.read_text(encoding="utf-8"))
+            self.origin = data["origin"]
+            self.responses = data["responses"]
+
+    def __len__(self):
+        return len(self.responses)
+
+    def __contains__(self, url):
+        return _path_of(url) in self.responses
+
+    def add(self, url, status, content_type, body):
+        """
+        レスポンスを追加する
+
+        Args:
+            url: リクエストしたURL (オリジンが異なるURLは記録しない)
+            status: ステータスコード
+            content_type: Content-Type
+            body: レスポンス本文 (bytes)
+        """
+        if not url.startswith(self.origin):
+            return
+        name = f"bodies/{hashlib.sha1(body).hexdigest()}.gz"
+        path = self.directory / name
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(gzip.compress(body))
+        self.responses[_path_of(url)] = {"status": status, "content_type": content_type, "body": name}
+
+    def get(self, path):
+        """
+        パス + クエリに対応するレスポンスを返す
+
+        Returns:
+            tuple | None: (ステータスコード, Content-Type, 本文)。記録されていない場合は None
+        """
+        response = self.responses.get(path)
+        if response is None:
+            return None
+        body = gzip.decompress((self.directory / response["body"]).read_bytes())
+        return response["status"], response["content_type"], body
+
+    def save(self):
+        """index.json を書き込む"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        index = {"origin": self.origin, "responses": self.responses}
+        (self.directory / "index.json").write_text(json.dumps(index, ensure_ascii=False, indent=1), encoding="utf-8")
+
+
+def record_crawl(archive_dir, fetch, max_pages=1, max_articles=20):
+    """
+    実際のサイトをクローラーと同じ順序で辿り、レスポンスをアーカイブに記録する
+
+    Args:
+        archive_dir: アーカイブのディレクトリ
+        fetch: URL を受け取り (ステータスコード, Content-Type, 本文 bytes) または None を返す関数
+        max_pages: 記録するトピックス一覧のページ数
+        max_articles: 記録する記事数の上限
+
+    Returns:
+        CrawlArchive: 記録したアーカイブ
+    """
+    archive = CrawlArchive(archive_dir)
+    navigation = yahoo_SELECTORS["navigation"]
+
+    def get(url):
+        if url in archive:
+            status, _, body = archive.get(_path_of(url))
+            return status, BeautifulSoup(body, "html.parser")
+        response = fetch(url)
+        if response is None:
+            return None, None
+        status, content_type, body = response
+        archive.add(url, status, content_type, body)
+        logger.info(f"記録: {url} status={status}")
+        return status, BeautifulSoup(body, "html.parser")
+
+    def record_article(article_url, soup):
+        # 分割記事の2ページ目以降を、ページ送りのリンクを辿って記録する
+        base_url = article_url.split("?")[0]
+        page_num = 1
+        while True:
+            links = soup.select(f'{navigation["article_pager_links"]}, {navigation["article_data_p_link"]}')
+            if not any(f"page={page_num + 1}" in link.get("href", "") for link in links):
+                break
+            page_num += 1
+            status, soup = get(f"{base_url}?page={page_num}")
+            if status != 200:
+                break
+
+    status, top = get(SITEURL["yahoo_top"])
+    if top is not None:
+        topics_link = top.select_one(navigation["topics_page_link"])
+        if topics_link is not None and topics_link.get("href"):
+            get(urljoin(SITEURL["yahoo_top"], topics_link["href"]))
+
+    articles = 0
+    for page_num in range(1, max_pages + 1):
+        status, listing = get(f"{SITEURL['yahoo_link']}?page={page_num}")
+        if status != 200:
+            break
+        for link in listing.select(navigation["article_links"]):
+            if articles >= max_articles:
+                break
+            href = link.get("href", "")
+            if not href.startswith("http"):
+                continue
+            status, page = get(href)
+            if status != 200:
+                continue
+            article_url = href
+            pickup_link = page.select_one(navigation["pickup_link"])
+            if pickup_link is not None and pickup_link.get("href"):
+                article_url = urljoin(href, pickup_link["href"])
+                status, page = get(article_url)
+                if status != 200:
+                    continue
+            record_article(article_url, page)
+            articles += 1
+
+    archive.save()
+    logger.info(f"アーカイブに記録しました: {len(archive)}件のレスポンス, 記事 {articles}件 ({archive_dir})")
+    return archive
+
+
+class ReplayServer:
+    """
+    アーカイブのレスポンスを再生するローカルのHTTPサーバー
+
+    リクエストごとに latency 秒 (± jitter 秒の一様分布) 待ってから応答する。
+    記録されていないパスには 404 を返す。
+    """
+
+    def __init__(self, archive, latency=0.0, jitter=0.0, host="127.0.0.1", port=0, seed=None):
+        """
+        Args:
+            archive: CrawlArchive またはアーカイブのディレクトリ
+            latency: 応答までの平均遅延 (秒)
+            jitter: 遅延のゆらぎ (秒)
+            host: 待ち受けるホスト
+            port: 待ち受けるポート (0 の場合は空いているポート)
+            seed: 遅延の乱数のシード
+        """
+        self.archive = archive if isinstance(archive, CrawlArchive) else CrawlArchive(archive)
+        self.latency = latency
+        self.jitter = jitter
+        self.requests = 0
+        self.not_found = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url_for(self, original_url):
+        """記録時のURLを再生サーバーのURLに置き換える"""
+        return original_url.replace(self.archive.origin, self.base_url, 1)
+
+    def _delay(self):
+        with self._lock:
+            self.requests += 1
+            delay = self.latency + self._random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+    def _handler_class(self):
+        server = self
+
+        class ReplayHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server._delay()
+                response = server.archive.get(self.path)
+                if response is None:
+                    with server._lock:
+                        server.not_found += 1
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                status, content_type, body = response
+                if content_type and content_type.startswith("text/html"):
+                    body = body.replace(server.archive.origin.encode(), server.base_url.encode())
+                self.send_response(status)
+                self.send_header("Content-Type", content_type or "application/octet-stream")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return ReplayHandler
+
+    def start(self):
+        """バックグラウンドのスレッドでサーバーを起動する"""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(f"再生サーバーを起動しました: {self.base_url} (latency={self.latency}s, jitter={self.jitter}s)")
+        return self
+
+    def stop(self):
+        """サーバーを停止する"""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
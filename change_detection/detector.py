@@ -1,27 +1,167 @@
-import hashlib
-import json
+import difflib
 from change_detection.notifier import send_notification
-from utils.parser import remove_html_tags, decode_html_entities, normalize_text, remove_extra_whitespaces
+from change_detection.store import get_change_state_store, page_digest, field_digests
+from utils.parser import clean_text, clean_texts
 from loggings.logger import get_logger
+from utils.metrics import metrics
 
 logger = get_logger(__name__)
 
-def clean_text(text):
-    """テキストをクレンジングするヘルパー関数"""
-    text = remove_html_tags(text)
-    text = decode_html_entities(text)
-    text = normalize_text(text)
-    text = remove_extra_whitespaces(text)
-    return text
+def extract_texts(page, selectors):
+    """
+    現在のページから、セレクタごとのテキストを抽出する
+
+    Args:
+        page: PlaywrightのPageオブジェクト
+        selectors: 変更を監視する要素のセレクタ（辞書形式）
+
+    Returns:
+        dict: セレクタ名をキー、抽出テキストのリストを値とする辞書
+    """
+    extracted_texts = {}
+    for selector_name, selector in selectors.items():
+        elements = page.query_selector_all(selector)
+        texts = []
+        if elements:
+            for element in elements:
+                text_content = clean_text(element.inner_text())
+                texts.append(text_content)
+            logger.debug(f"セレクタ {selector_name} のテキスト抽出完了: {len(texts)}件")  # 抽出完了のログ
+        else:
+            logger.warning(f"セレクタ {selector_name} に一致する要素が見つかりませんでした")  # 要素が見つからない場合のログ
+        extracted_texts[selector_name] = texts
+    return extracted_texts
+
+
+def diff_field_digests(previous, current):
+    """
+    セレクタごと・要素ごとのダイジェストを比較し、変更のあったセレクタと要素を返す
 
-def detect_change(page, url, selectors):
+    Args:
+        previous: 前回の field_digests の結果 (未登録の場合は空の辞書)
+        current: 今回の field_digests の結果
+
+    Returns:
+        dict: {セレクタ名: {"changed": [...], "added": [...], "removed": [...]}}。
+            changed / added は今回の要素のインデックス、removed は前回の要素のインデックス
+    """
+    changes = {}
+    for name in current.keys() | previous.keys():
+        cur = current.get(name, {"digest": None, "items": []})
+        prev = previous.get(name)
+        # 要素ごとのダイジェストを持たない古い形式の状態は、セレクタ全体のダイジェストだけで比較する
+        if isinstance(prev, str):
+            prev = {"digest": prev, "items": None}
+        elif prev is None:
+            prev = {"digest": None, "items": []}
+        if cur["digest"] == prev["digest"]:
+            continue
+
+        if prev["items"] is None:
+            changes[name] = {"changed": list(range(len(cur["items"]))), "added": [], "removed": []}
+            continue
+
+        diff = {"changed": [], "added": [], "removed": []}
+        matcher = difflib.SequenceMatcher(a=prev["items"], b=cur["items"], autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == "replace":
+                common = min(i2 - i1, j2 - j1)
+                diff["changed"].extend(range(j1, j1 + common))
+                diff["added"].extend(range(j1 + common, j2))
+                diff["removed"].extend(range(i1 + common, i2))
+            elif tag == "insert":
+                diff["added"].extend(range(j1, j2))
+            elif tag == "delete":
+                diff["removed"].extend(range(i1, i2))
+        changes[name] = diff
+    return changes
+
+
+def format_changes(changes):
+    """diff_field_digests の結果を通知用の文字列にする"""
+    lines = []
+    for name in sorted(changes):
+        diff = changes[name]
+        details = [f"{label}: {', '.join(str(i + 1) for i in diff[key])}"
+                   for key, label in (("changed", "変更"), ("added", "追加"), ("removed", "削除")) if diff[key]]
+        lines.append(f"{name} ({' / '.join(details)})" if details else name)
+    return "\n".join(lines)
+
+
+def detect_change_from_texts(url, extracted_texts):
+    """
+    抽出済みのテキストから変更を検知する
+
+    状態は ChangeStateStore に URL 単位で upsert するため、処理量は履歴の件数に依存せず、
+    複数のワーカーから同時に呼ばれても安全。前回の状態とはダイジェスト同士で比較し、
+    変更のあったセレクタと要素 (段落) の番号を通知する。
+
+    Args:
+        url: ページのURL
+        extracted_texts: セレクタ名をキー、抽出テキストのリストを値とする辞書
+
+    Returns:
+        bool: 変更があった場合はTrue、そうでない場合はFalse
+    """
+    # 1. ハッシュ値を計算
+    current_hash = page_digest(extracted_texts)
+    digests = field_digests(extracted_texts)
+    logger.debug(f"現在ハッシュ値: {current_hash}")  # ハッシュ値のログ
+
+    # 2. 状態を更新し、過去のハッシュ値と比較
+    previous_data = get_change_state_store().swap(url, current_hash, digests)
+    previous_hash = previous_data.get('hash') if previous_data else None
+    logger.debug(f"過去ハッシュ値: {previous_hash}")
+
+    if previous_hash is not None and current_hash == previous_hash:
+        logger.debug(f"ページ {url} に変更はありません。")  # 変更がない場合のログ
+        return False
+
+    # 3. 変更があったセレクタと要素を取得
+    changes = diff_field_digests(previous_data.get('selectors', {}) if previous_data else {}, digests)
+
+    # 4. 通知
+    message = f"ページ {url} の以下の要素が変更されました:\n" + format_changes(changes)
+    with metrics.timer("notify"):
+        send_notification(message)
+    metrics.inc("scraper_changes_detected_total")
+    logger.info(f"ページ {url} の変更を検知しました。変更内容: {changes}")  # 変更検知のログ
+    return True
+
+
+def clean_extracted_texts(raw_texts):
+    """
+    ブラウザ側でまとめて取得した innerText (セレクタ名: テキストのリスト) をクレンジングする
+
+    Args:
+        raw_texts: セレクタ名をキー、innerText のリストを値とする辞書
+
+    Returns:
+        dict: extract_texts と同じ形式の辞書
+    """
+    extracted_texts = {}
+    for selector_name, texts in raw_texts.items():
+        if texts:
+            logger.debug(f"セレクタ {selector_name} のテキスト抽出完了: {len(texts)}件")
+        else:
+            logger.warning(f"セレクタ {selector_name} に一致する要素が見つかりませんでした")
+        extracted_texts[selector_name] = clean_texts(texts)
+    return extracted_texts
+
+
+def detect_change(page, url, selectors, extracted_texts=None):
     """
     指定されたセレクタの要素のHTML構造の変化を検知する
 
+    ページへの再遷移は行わず、呼び出し元が既に読み込んでいるDOMに対して検知する。
+
     Args:
-        page: PlaywrightのPageオブジェクト
+        page: 対象ページを読み込み済みのPlaywrightのPageオブジェクト。
+            extracted_texts を指定する場合は None でもよい
         url: ページのURL
         selectors: 変更を監視する要素のセレクタ（辞書形式）
+        extracted_texts: 抽出エンジンで取得済みのテキスト (セレクタ名: テキストのリスト)。
+            指定された場合はDOMを再クエリしない
 
     Returns:
         bool: 変更があった場合はTrue、そうでない場合はFalse
@@ -29,57 +169,13 @@ def detect_change(page, url, selectors):
     try:
         logger.debug(f"変更検知開始: {url}")  # 変更検知開始のログ
 
-        # 1. ページのHTMLを取得
-        page.goto(url, wait_until='networkidle')
-        extracted_texts = {}
-        for selector_name, selector in selectors.items():
-            elements = page.query_selector_all(selector)
-            texts = []
-            if elements:
-                for element in elements:
-                    text_content = clean_text(element.inner_text())
-                    texts.append(text_content)
-                logger.debug(f"セレクタ {selector_name} のテキスト抽出完了: {len(texts)}件")  # 抽出完了のログ
+        with metrics.timer("detect_change"):
+            if extracted_texts is not None:
+                extracted_texts = clean_extracted_texts(extracted_texts)
             else:
-                logger.warning(f"セレクタ {selector_name} に一致する要素が見つかりませんでした")  # 要素が見つからない場合のログ
-            extracted_texts[selector_name] = texts
-
-        # 2. ハッシュ値を計算
-        current_hash = hashlib.sha256(json.dumps(extracted_texts, sort_keys=True).encode()).hexdigest()
-        logger.debug(f"現在ハッシュ値: {current_hash}")  # ハッシュ値のログ
-
-        # 3. 過去のハッシュ値と比較
-        page_hashes = {}
-        try:
-            with open('page_hashes.json', 'r') as f:
-                page_hashes = json.load(f)
-        except FileNotFoundError:
-            logger.debug("page_hashes.json が見つかりません。新規作成します。")  # ファイルがない場合のログ
-
-        previous_data = page_hashes.get(url)
-        previous_hash = previous_data.get('hash') if previous_data else None
-        logger.debug(f"過去ハッシュ値: {previous_hash}")
-
-        if previous_hash is None or current_hash != previous_hash:
-            # 4. ハッシュ値とテキストを保存
-            page_hashes[url] = {'hash': current_hash, 'texts': json.dumps(extracted_texts)}
-            with open('page_hashes.json', 'w') as f:
-                json.dump(page_hashes, f, indent=4, ensure_ascii=False)
-
-            # 5. 変更があったセレクタ名を取得
-            previous_texts = json.loads(previous_data.get('texts', "{}") if previous_data else "{}")
-            changed_selectors = [key for key in extracted_texts if extracted_texts[key] != previous_texts.get(key)]
-
-            # 6. 通知
-            message = f"ページ {url} の以下の要素が変更されました:\n" + "\n".join(changed_selectors)  # 変更されたセレクタ名だけを通知
-            send_notification(message)
-            logger.info(f"ページ {url} の変更を検知しました。変更されたセレクタ: {changed_selectors}")  # 変更検知のログ
-            return True
-
-        logger.debug(f"ページ {url} に変更はありません。")  # 変更がない場合のログ
-        return False
-
+                extracted_texts = extract_texts(page, selectors)
+            return detect_change_from_texts(url, extracted_texts)
 
     except Exception as e:
         logger.error(f"変更検知中にエラーが発生しました: {e}")  # エラーログ
-        return False
\ No newline at end of file
+        return False
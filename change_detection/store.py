@@ -0,0 +1,151 @@
+import argparse
+import hashlib
+import json
+import threading
+from datetime import datetime
+from pymongo import ASCENDING, ReturnDocument
+from config import CHANGE_STATE_COLLECTION, CHANGE_STATE_TTL_DAYS
+from loggings.logger import get_logger
+from utils.database import get_database, ensure_ttl_index
+
+logger = get_logger(__name__)
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def text_digest(value):
+    """テキスト (またはテキストのリスト) の短いダイジェスト (16桁の16進数) を返す"""
+    data = json.dumps(value, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+
+def item_digest(text):
+    """段落などの要素1つ分の短いダイジェスト (8桁の16進数) を返す"""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=4).hexdigest()
+
+
+def field_digests(extracted_texts):
+    """
+    セレクタごとのダイジェストと、要素 (段落) ごとのダイジェストを計算する
+
+    Args:
+        extracted_texts: セレクタ名をキー、抽出テキストのリストを値とする辞書
+
+    Returns:
+        dict: {セレクタ名: {"digest": セレクタ全体のダイジェスト, "items": [要素ごとのダイジェスト, ...]}}
+    """
+    return {
+        name: {"digest": text_digest(texts), "items": [item_digest(text) for text in texts]}
+        for name, texts in extracted_texts.items()
+    }
+
+
+def page_digest(extracted_texts):
+    """ページ全体のダイジェスト (全セレクタのテキストをまとめたもの)"""
+    return hashlib.sha256(json.dumps(extracted_texts, sort_keys=True).encode()).hexdigest()
+
+
+class ChangeStateStore:
+    """
+    変更検知の状態を MongoDB のコレクションに保存するストア
+
+    URLごとに1ドキュメントを持ち、テキスト本体ではなくページ全体・セレクタごと・要素 (段落) ごとの
+    ダイジェストだけを保存する (1URLあたり数百バイト)。
+    url のユニークインデックスで1件ずつ upsert するため、履歴の件数に関係なく1記事あたりの処理量は一定で、
+    複数のワーカーから同時に更新しても安全。checked_at の TTL インデックスにより、
+    一定期間確認されなかったURLの状態は自動的に削除される。
+    """
+
+    def __init__(self, collection_name=CHANGE_STATE_COLLECTION, ttl_days=CHANGE_STATE_TTL_DAYS):
+        """
+        Args:
+            collection_name: 状態を保存するコレクション名
+            ttl_days: 最後に確認してからこの日数が経過した状態を削除する
+        """
+        self.collection = get_database()[collection_name]
+        self.collection.create_index([("url", ASCENDING)], unique=True, background=True)
+        ensure_ttl_index(self.collection, "checked_at", int(ttl_days * 86400))
+
+    def get(self, url):
+        """
+        URL の状態を取得する
+
+        Returns:
+            dict | None: {"url", "hash", "selectors", "checked_at", "changed_at"}。未登録の場合は None
+        """
+        return self.collection.find_one({"url": url}, {"_id": 0})
+
+    def swap(self, url, digest, digests):
+        """
+        URL の状態を新しいダイジェストで upsert し、更新前の状態を返す (1回のラウンドトリップで原子的に行う)
+
+        Args:
+            url: ページのURL
+            digest: ページ全体のダイジェスト
+            digests: field_digests で計算したセレクタごと・要素ごとのダイジェスト
+
+        Returns:
+            dict | None: 更新前の状態。未登録だった場合は None
+        """
+        now = datetime.now()
+        # パイプラインによる更新では $hash が更新前の値を指すため、ダイジェストが変わった場合だけ changed_at を更新できる
+        # (未登録のURLは $hash が無いため変更ありとして扱う)
+        return self.collection.find_one_and_update(
+            {"url": url},
+            [{"$set": {
+                "changed_at": {"$cond": [{"$ne": ["$hash", digest]}, now, "$changed_at"]},
+                "hash": digest,
+                "selectors": {"$literal": digests},
+                "checked_at": now,
+            }}],
+            projection={"_id": 0},
+            upsert=True,
+            return_document=ReturnDocument.BEFORE,
+        )
+
+
+def get_change_state_store():
+    """プロセス内で共有する ChangeStateStore を返す"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ChangeStateStore()
+        return _store
+
+
+def import_page_hashes(path="page_hashes.json"):
+    """
+    従来の page_hashes.json の内容をストアに取り込む
+
+    保存されていたテキストからセレクタごと・要素ごとのダイジェストを計算して登録するため、移行直後に
+    すべてのページが変更ありと判定されることはない。
+
+    Args:
+        path: page_hashes.json のパス
+
+    Returns:
+        int: 取り込んだURLの件数
+    """
+    with open(path, "r") as f:
+        page_hashes = json.load(f)
+
+    store = get_change_state_store()
+    count = 0
+    for url, data in page_hashes.items():
+        texts = json.loads(data.get("texts", "{}"))
+        store.swap(url, data.get("hash") or page_digest(texts), field_digests(texts))
+        count += 1
+    logger.info(f"page_hashes.json から {count}件の状態を取り込みました。")
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="変更検知の状態ストアの管理")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    import_parser = subparsers.add_parser("import", help="page_hashes.json の内容を取り込む")
+    import_parser.add_argument("path", nargs="?", default="page_hashes.json")
+    args = parser.parse_args()
+
+    if args.command == "import":
+        import_page_hashes(args.path)
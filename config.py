@@ -24,6 +24,7 @@ yahoo_SELECTORS = {
         "article_links": "#uamods-topics ul li[data-ual-view-type=\"list\"] a",
         "pickup_link": "#uamods-pickup > div.sc-gdv5m1-0.cuVskI > div.sc-gdv5m1-8.eMtbmz > a",
         "article_data_p_link": "#uamods > div.sc-brfqoi-0.iHxBOa > div > ul > li:last-child a", # 分割記事リンク
+        "article_pager_links": "#uamods > div.sc-brfqoi-0.iHxBOa > div > ul > li a", # 分割記事のページ送りのすべてのリンク
         "page_link": "#contentsWrap > div > div.sc-brfqoi-0.ehBQrA > div > ul > li:last-child > a", # 次ページリンク
     },
     "article_content": {
@@ -54,4 +55,204 @@ SCRAPE_INTERVAL = 1 # 用途が不明瞭なので、一旦残すが、使用箇
 SCRAPE_INTERVAL = 3
 
 # スクレイピングする最大ページ数
-MAX_PAGES = 5
\ No newline at end of file
+MAX_PAGES = 5
+
+# クロールモード ("sync": sync_playwright による逐次処理, "async": async_playwright による並行処理)
+CRAWL_MODE = os.environ.get("CRAWL_MODE", "sync").lower()
+
+# 非同期クロールで同時に処理する記事ページ数 (ページプールのサイズ)
+CRAWL_CONCURRENCY = int(os.environ.get("CRAWL_CONCURRENCY", 4))
+
+# リソースブロックの設定 (記事本文の取得に不要なリクエストを page.route で遮断する)
+BLOCK_RESOURCES = os.environ.get("BLOCK_RESOURCES", "true").lower() == "true"
+
+# 遮断ルール。カテゴリごとに resource_type と URL パターン (部分一致) を指定する
+BLOCKED_RESOURCES = {
+    "media": {
+        "resource_types": ["image", "media", "font"],
+        "url_patterns": [],
+    },
+    "ads": {
+        "resource_types": [],
+        "url_patterns": [
+            "yads.yahoo.co.jp", "yads.c.yimg.jp", "im.ov.yahoo.co.jp",
+            "doubleclick.net", "googlesyndication.com", "googleadservices.com",
+            "amazon-adsystem.com", "adsafeprotected.com", "criteo.com",
+        ],
+    },
+    "analytics": {
+        "resource_types": [],
+        "url_patterns": [
+            "google-analytics.com", "googletagmanager.com", "b92.yahoo.co.jp",
+            "ybx.yahoo.co.jp", "yjtag.jp", "clarity.ms", "scorecardresearch.com",
+        ],
+    },
+}
+
+# 有効にする遮断カテゴリ (カンマ区切り)
+BLOCKED_RESOURCE_CATEGORIES = [
+    c.strip() for c in os.environ.get("BLOCKED_RESOURCE_CATEGORIES", "media,ads,analytics").split(",") if c.strip()
+]
+
+# 遮断したリクエストの推定サイズ (バイト)。遮断したレスポンスのサイズは取得できないため集計時の見積もりに使う
+BLOCKED_RESOURCE_ESTIMATED_BYTES = {
+    "image": 40_000,
+    "media": 500_000,
+    "font": 50_000,
+    "script": 30_000,
+    "other": 5_000,
+}
+
+# 記事ページの取得方法
+# "browser": 常に Playwright で取得する
+# "http": コネクションプール付きHTTPクライアントでHTMLを取得して静的に抽出し、
+#         必須項目が欠けた場合のみ Playwright にフォールバックする
+FETCH_MODE = os.environ.get("FETCH_MODE", "browser").lower()
+
+# HTTPクライアントの設定
+HTTP_POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", 10))
+HTTP_TIMEOUT = float(os.environ.get("HTTP_TIMEOUT", 10))
+
+# MongoDB への一括書き込みの設定 (件数または秒数のどちらかに達したらフラッシュする)
+BULK_WRITE_BATCH_SIZE = int(os.environ.get("BULK_WRITE_BATCH_SIZE", 100))
+BULK_WRITE_FLUSH_INTERVAL = float(os.environ.get("BULK_WRITE_FLUSH_INTERVAL", 5))
+
+# 保存済みの記事URLの扱い ("off" / "skip" / "defer" / "recheck_recent")
+# 起動時に保存済みURLを読み込み、記事一覧から取得したURLをブラウザで開く前に判定する
+SEEN_URL_POLICY = os.environ.get("SEEN_URL_POLICY", "recheck_recent").lower()
+
+# "recheck_recent" で再確認の対象にする、公開からの経過時間 (時間)
+SEEN_URL_RECHECK_HOURS = int(os.environ.get("SEEN_URL_RECHECK_HOURS", 24))
+
+# 変更検知の状態 (URLごとのダイジェスト) を保存するコレクション
+CHANGE_STATE_COLLECTION = os.environ.get("CHANGE_STATE_COLLECTION", "page_states")
+
+# 最後に確認してからこの日数が経過した変更検知の状態を削除する
+CHANGE_STATE_TTL_DAYS = int(os.environ.get("CHANGE_STATE_TTL_DAYS", 30))
+
+# 近似重複記事の検出 (同じ配信記事が別URLで掲載される場合に duplicate_of を付けて保存する)
+DEDUP_ENABLED = os.environ.get("DEDUP_ENABLED", "true").lower() == "true"
+
+# 近似重複とみなす類似度 (MinHash で推定した Jaccard 係数)
+DEDUP_THRESHOLD = float(os.environ.get("DEDUP_THRESHOLD", 0.8))
+
+# MinHash の署名長と LSH のバンド数 (署名長はバンド数で割り切れること)
+DEDUP_NUM_PERM = int(os.environ.get("DEDUP_NUM_PERM", 64))
+DEDUP_BANDS = int(os.environ.get("DEDUP_BANDS", 8))
+
+# シングル (文字 n-gram) の文字数
+DEDUP_SHINGLE_SIZE = int(os.environ.get("DEDUP_SHINGLE_SIZE", 5))
+
+# 起動時に索引へ読み込む保存済み記事の期間 (公開からの日数)
+DEDUP_WINDOW_DAYS = int(os.environ.get("DEDUP_WINDOW_DAYS", 3))
+
+# ダッシュボード (app.py) の集計結果をキャッシュする秒数
+DASHBOARD_CACHE_TTL = int(os.environ.get("DASHBOARD_CACHE_TTL", 300))
+
+# 記事数のロールアップ (日ごと・時間ごと・配信元ごとの集計) を書き込み時に更新するかどうか
+ROLLUP_ENABLED = os.environ.get("ROLLUP_ENABLED", "true").lower() == "true"
+
+# ロールアップを保存するコレクション
+ROLLUP_COLLECTION = os.environ.get("ROLLUP_COLLECTION", "article_rollups")
+
+# ダッシュボードでログを読み込むときに1回で読む最大バイト数 (ログファイルの大きさに関係なく描画コストを一定にする)
+LOG_VIEWER_MAX_BYTES = int(os.environ.get("LOG_VIEWER_MAX_BYTES", 1024 * 1024))
+
+# 記事をファイルに出力するときに1回で読み込む件数
+EXPORT_BATCH_SIZE = int(os.environ.get("EXPORT_BATCH_SIZE", 1000))
+
+# Parquet で出力するときに1つのファイルに書き込む件数 (ファイルを閉じるごとにチェックポイントを記録する)
+EXPORT_PARQUET_FILE_ROWS = int(os.environ.get("EXPORT_PARQUET_FILE_ROWS", 100000))
+
+# 処理ごとの所要時間・件数の計測 (無効な場合、計測のオーバーヘッドはほぼない)
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "true").lower() == "true"
+
+# 実行ごとにメトリクスを Prometheus のテキスト形式で書き出すファイル (空の場合は書き出さない)
+METRICS_FILE = os.environ.get("METRICS_FILE", "metrics.prom")
+
+# /metrics エンドポイントのポート (0 の場合は起動しない)
+METRICS_PORT = int(os.environ.get("METRICS_PORT", 0))
+
+# ホストごとのレート制限 (トークンバケット)。送信レートは応答のステータスと応答時間から AIMD で調整する
+# 初期・最小・最大の送信レート (リクエスト/秒) と、連続して送れるリクエスト数
+RATE_LIMIT_INITIAL_RATE = float(os.environ.get("RATE_LIMIT_INITIAL_RATE", 0.5))
+RATE_LIMIT_MIN_RATE = float(os.environ.get("RATE_LIMIT_MIN_RATE", 0.1))
+RATE_LIMIT_MAX_RATE = float(os.environ.get("RATE_LIMIT_MAX_RATE", 2.0))
+RATE_LIMIT_BURST = float(os.environ.get("RATE_LIMIT_BURST", 2))
+
+# 成功した応答ごとに加える送信レート (リクエスト/秒) と、429 / 5xx / 遅い応答のときに掛ける割合
+RATE_LIMIT_INCREASE = float(os.environ.get("RATE_LIMIT_INCREASE", 0.05))
+RATE_LIMIT_DECREASE = float(os.environ.get("RATE_LIMIT_DECREASE", 0.5))
+
+# これより応答に時間がかかった場合は、サイトの負荷が高いとみなして送信レートを下げる (秒)
+RATE_LIMIT_SLOW_SECONDS = float(os.environ.get("RATE_LIMIT_SLOW_SECONDS", 5))
+
+# 待機時間に加えるゆらぎ (送信間隔に対する割合)
+RATE_LIMIT_JITTER = float(os.environ.get("RATE_LIMIT_JITTER", 0.3))
+
+# プロセス全体で同時に送るリクエスト数の上限 (ブラウザ・HTTP・非同期クローラーで共有)
+RATE_LIMIT_MAX_CONCURRENCY = int(os.environ.get("RATE_LIMIT_MAX_CONCURRENCY", 4))
+
+# スケジューラのプロセスでブラウザを起動したまま保持し、実行ごとに新しいコンテキストで処理する (CRAWL_MODE="sync" の場合)
+BROWSER_SERVICE_ENABLED = os.environ.get("BROWSER_SERVICE_ENABLED", "true").lower() == "true"
+
+# 保持しているブラウザを起動し直す実行回数と経過時間 (時間)。0 の場合はその条件では起動し直さない
+BROWSER_RECYCLE_RUNS = int(os.environ.get("BROWSER_RECYCLE_RUNS", 24))
+BROWSER_RECYCLE_HOURS = float(os.environ.get("BROWSER_RECYCLE_HOURS", 12))
+
+# 待機中にブラウザがクラッシュしていないか確認する間隔 (秒)
+BROWSER_HEALTH_CHECK_INTERVAL = float(os.environ.get("BROWSER_HEALTH_CHECK_INTERVAL", 60))
+
+# ブラウザで取得する記事の、分割記事の2ページ目以降の取得方法
+# "http": HTTPで並行して取得し、取得できなかったページのみブラウザの別タブで開く
+# "browser": ブラウザの別タブで順に開く
+PAGINATION_FETCH_MODE = os.environ.get("PAGINATION_FETCH_MODE", "http").lower()
+
+# 分割記事のページを並行して取得する数 (送信間隔と全体の同時実行数はレート制限に従う)
+PAGINATION_CONCURRENCY = int(os.environ.get("PAGINATION_CONCURRENCY", 4))
+
+# ピックアップページから記事本体のURLへの対応を保存するコレクションと、対応を保持する時間
+PICKUP_URL_COLLECTION = os.environ.get("PICKUP_URL_COLLECTION", "pickup_urls")
+PICKUP_URL_TTL_HOURS = float(os.environ.get("PICKUP_URL_TTL_HOURS", 72))
+# 未解決だったピックアップページを、MongoDB に問い合わせ直さずに未解決として扱う時間 (分)
+PICKUP_URL_MISS_TTL_MINUTES = float(os.environ.get("PICKUP_URL_MISS_TTL_MINUTES", 10))
+
+# 保存済みの記事を、記事ごとの間隔で再取得する (記事一覧の定期クロールでは再取得の対象になった記事を開かない)
+RECRAWL_ENABLED = os.environ.get("RECRAWL_ENABLED", "true").lower() == "true"
+
+# 再取得の予定を保存するコレクションと、最後に取得してから予定を削除するまでの日数
+RECRAWL_COLLECTION = os.environ.get("RECRAWL_COLLECTION", "recrawl_queue")
+RECRAWL_TTL_DAYS = int(os.environ.get("RECRAWL_TTL_DAYS", 30))
+
+# 再取得を確認する間隔 (分) と、1回の確認で再取得する最大の記事数
+RECRAWL_TICK_MINUTES = float(os.environ.get("RECRAWL_TICK_MINUTES", 10))
+RECRAWL_FETCH_BUDGET = int(os.environ.get("RECRAWL_FETCH_BUDGET", 20))
+
+# 記事ごとの再取得の間隔の下限 (分) と上限 (時間)
+RECRAWL_MIN_INTERVAL_MINUTES = float(os.environ.get("RECRAWL_MIN_INTERVAL_MINUTES", 15))
+RECRAWL_MAX_INTERVAL_HOURS = float(os.environ.get("RECRAWL_MAX_INTERVAL_HOURS", 24))
+
+# 変更が無かった場合に間隔に掛ける倍率 (変更があった場合は間隔を半分にする)
+RECRAWL_BACKOFF = float(os.environ.get("RECRAWL_BACKOFF", 2.0))
+
+# 公開からの経過時間に対する間隔の上限の割合 (新しい記事ほど短い間隔で確認する)
+RECRAWL_AGE_FACTOR = float(os.environ.get("RECRAWL_AGE_FACTOR", 0.25))
+
+# 公開からこの時間が経過した記事は、再取得して変更が無ければ以降は再取得しない
+RECRAWL_MAX_AGE_HOURS = float(os.environ.get("RECRAWL_MAX_AGE_HOURS", 72))
+
+# セレクタ候補ごとの取得結果を記録し、直近の取得率の高い候補から試す
+SELECTOR_LEARNING_ENABLED = os.environ.get("SELECTOR_LEARNING_ENABLED", "true").lower() == "true"
+
+# セレクタ候補ごとの取得結果を保存するファイル (空の場合は保存しない) と、直近の取得率を更新する重み
+SELECTOR_STATS_FILE = os.environ.get("SELECTOR_STATS_FILE", "selector_stats.json")
+SELECTOR_STATS_WEIGHT = float(os.environ.get("SELECTOR_STATS_WEIGHT", 0.1))
+
+# HTMLスナップショットの保存先 (ハッシュで重複を除いて圧縮したHTMLと、URL・種類・日時の索引を保存する)
+SNAPSHOT_DIR = os.environ.get("SNAPSHOT_DIR", "debug_snapshots")
+
+# 失敗の種類 (h1_missing / fatal_error など) ごとに、1時間あたりに保存するスナップショットの上限
+SNAPSHOT_MAX_PER_HOUR = int(os.environ.get("SNAPSHOT_MAX_PER_HOUR", 10))
+
+# 書き込み待ちのスナップショットの上限 (超えた分は保存しない)
+SNAPSHOT_QUEUE_SIZE = int(os.environ.get("SNAPSHOT_QUEUE_SIZE", 100))
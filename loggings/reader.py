@@ -0,0 +1,141 @@
+import os
+import re
+from typing import NamedTuple
+from config import LOG_ENCODING, LOG_VIEWER_MAX_BYTES
+
+# loggings/logger.py の書式 "{time:YYYY-MM-DD HH:mm:ss} | {level} | {module}:{function}:{line} | {message}" の1行目
+_RECORD_PATTERN = re.compile(
+    r"^(?P<time>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}) \| (?P<level>\w+) \| "
+    r"(?P<module>[^:|]*):(?P<function>[^:|]*):(?P<line>\d+) \| (?P<message>.*)$"
+)
+
+# ファイルの末尾から最初に読む範囲 (バイト)
+_BLOCK_SIZE = 64 * 1024
+
+
+class LogRecord(NamedTuple):
+    """ログの1レコード (例外のトレースバックなど、続く行は message に含める)"""
+    time: str
+    level: str
+    module: str
+    function: str
+    line: int
+    message: str
+    offset: int  # ファイル内でのレコードの開始位置 (バイト)
+
+    def format(self):
+        """ログファイルと同じ書式の文字列に戻す"""
+        return f"{self.time} | {self.level} | {self.module}:{self.function}:{self.line} | {self.message}"
+
+
+def parse_records(data, base_offset=0, encoding=LOG_ENCODING):
+    """
+    ログのバイト列をレコードに分割する
+
+    書式に一致しない行は直前のレコードの続きとして扱い、先頭にある続きの行 (直前のレコードが範囲外のもの) は捨てる。
+
+    Args:
+        data: ログのバイト列 (行の途中で始まらないこと)
+        base_offset: data の先頭のファイル内での位置
+        encoding: ログファイルのエンコーディング
+
+    Returns:
+        list: LogRecord のリスト (ファイル内の順)
+    """
+    records = []
+    offset = base_offset
+    for raw_line in data.splitlines(keepends=True):
+        text = raw_line.decode(encoding, errors="replace").rstrip("\r\n")
+        match = _RECORD_PATTERN.match(text)
+        if match:
+            records.append(LogRecord(match["time"], match["level"], match["module"], match["function"],
+                                     int(match["line"]), match["message"], offset))
+        elif records:
+            last = records[-1]
+            records[-1] = last._replace(message=f"{last.message}\n{text}")
+        offset += len(raw_line)
+    return records
+
+
+def _matches(record, levels, modules):
+    """レベル・モジュールの絞り込み条件に一致するかどうか"""
+    return (not levels or record.level in levels) and (not modules or record.module in modules)
+
+
+def tail(path, n=200, levels=None, modules=None, max_bytes=LOG_VIEWER_MAX_BYTES, encoding=LOG_ENCODING):
+    """
+    ログファイルの末尾から、条件に一致する最後の n 件のレコードを返す
+
+    ファイルの末尾から読む範囲を倍々に広げ、n 件見つかるか max_bytes に達した時点で止めるため、
+    処理量はファイルの大きさに依存しない。
+
+    Args:
+        path: ログファイルのパス
+        n: 返すレコード数
+        levels: 表示するレベル名の集合 (None の場合はすべて)
+        modules: 表示するモジュール名の集合 (None の場合はすべて)
+        max_bytes: 読み戻す最大バイト数
+        encoding: ログファイルのエンコーディング
+
+    Returns:
+        tuple: (LogRecord のリスト (古い順), ファイルの末尾の位置)。ファイルがない場合は ([], 0)
+    """
+    if not os.path.exists(path):
+        return [], 0
+    with open(path, "rb") as f:
+        end = f.seek(0, os.SEEK_END)
+        size = min(_BLOCK_SIZE, max_bytes)
+        while True:
+            position = max(0, end - size)
+            f.seek(position)
+            data = f.read(end - position)
+            # 行の途中から始まる先頭の断片は捨てる
+            start = 0 if position == 0 else data.find(b"\n") + 1 or len(data)
+            records = [r for r in parse_records(data[start:], position + start, encoding)
+                       if _matches(r, levels, modules)]
+            if len(records) >= n or position == 0 or size >= max_bytes:
+                break
+            # 足りなければ読む範囲を倍にして読み直す (読む量の合計は最後の範囲の2倍以内)
+            size = min(size * 2, max_bytes)
+    return records[-n:], end
+
+
+def read_since(path, offset, levels=None, modules=None, max_bytes=LOG_VIEWER_MAX_BYTES, encoding=LOG_ENCODING):
+    """
+    前回読んだ位置 offset 以降に追記されたレコードを返す
+
+    最後の行が書き込み途中の場合はその手前までを読み、次回の offset に含めない。
+    ファイルが offset より小さい場合 (ローテーションされた場合) は先頭から読み直す。
+
+    Args:
+        path: ログファイルのパス
+        offset: 前回の読み込みで返された位置
+        levels: 表示するレベル名の集合 (None の場合はすべて)
+        modules: 表示するモジュール名の集合 (None の場合はすべて)
+        max_bytes: 1回で読む最大バイト数 (残りは次回の呼び出しで読む)
+        encoding: ログファイルのエンコーディング
+
+    Returns:
+        tuple: (LogRecord のリスト (古い順), 次回の offset)
+    """
+    if not os.path.exists(path):
+        return [], 0
+    with open(path, "rb") as f:
+        end = f.seek(0, os.SEEK_END)
+        if end < offset:
+            offset = 0
+        f.seek(offset)
+        data = f.read(min(max_bytes, end - offset))
+    complete = data.rfind(b"\n") + 1
+    if complete == 0 and len(data) >= max_bytes:
+        # max_bytes を超える1行は読み飛ばす (同じ位置で止まり続けないようにする)
+        complete = len(data)
+    records = [r for r in parse_records(data[:complete], offset, encoding) if _matches(r, levels, modules)]
+    return records, offset + complete
+
+
+def list_levels_and_modules(records):
+    """レコードに含まれるレベル名とモジュール名の一覧を返す (絞り込みの選択肢に使う)"""
+    levels = sorted({record.level for record in records})
+    modules = sorted({record.module for record in records})
+    return levels, modules
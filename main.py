@@ -2,7 +2,12 @@ import time
 import datetime
 from apscheduler.schedulers.background import BackgroundScheduler
 from loggings.logger import get_logger
-from scrapers.yahoo.yahoo_news import scrape_yahoo_news
+from scrapers.yahoo.yahoo_news import (scrape_yahoo_news, scrape_yahoo_news_in_context, recrawl_articles,
+                                       recrawl_articles_in_context)
+from scrapers.yahoo.yahoo_news_async import run_scrape_yahoo_news_async
+from utils.metrics import metrics, run_summary, format_run_summary, write_metrics_file, start_metrics_server
+from utils.browser_service import get_browser_service, stop_browser_service
+from scheduler.recrawl import get_recrawl_queue
 import config
 
 logger = get_logger(__name__)
@@ -17,13 +22,51 @@ def scrape_task():
     global run_status
     run_status = "実行中"
     logger.info("スクレイピングタスク開始")
+    before = metrics.snapshot()
     try:
-        scrape_yahoo_news(headless=True, max_pages=config.MAX_PAGES)  # 設定を渡す
+        if config.CRAWL_MODE == "async":
+            run_scrape_yahoo_news_async(headless=True, max_pages=config.MAX_PAGES,
+                                        concurrency=config.CRAWL_CONCURRENCY)
+        elif config.BROWSER_SERVICE_ENABLED:
+            # 起動したままのブラウザで、実行ごとに新しいコンテキストを使って処理する
+            get_browser_service().run(scrape_yahoo_news_in_context, max_pages=config.MAX_PAGES).result()
+        else:
+            scrape_yahoo_news(headless=True, max_pages=config.MAX_PAGES)  # 設定を渡す
         run_status = "完了"
         logger.info("スクレイピングタスク完了")
     except Exception as e:
         run_status = f"エラー: {e}"
         logger.exception(f"スクレイピングタスク中にエラー発生: {e}")
+    finally:
+        if metrics.enabled:
+            # 処理ごとの所要時間と件数を1行にまとめ、どこに時間がかかったかを実行ごとに残す
+            logger.info(f"スクレイピングタスクの計測結果: {format_run_summary(run_summary(before, metrics.snapshot()))}")
+            write_metrics_file()
+
+
+def recrawl_task():
+    """再取得の期限が来た記事を、RECRAWL_FETCH_BUDGET 件までの範囲で取得し直すタスク (定期実行される関数)"""
+    try:
+        queue = get_recrawl_queue()
+        urls = queue.claim(config.RECRAWL_FETCH_BUDGET)
+    except Exception as e:
+        logger.error(f"再取得の予定の読み込みに失敗しました: {e}")
+        return
+    if not urls:
+        logger.debug("再取得の期限が来た記事はありません。")
+        return
+
+    logger.info(f"再取得タスク開始: {len(urls)}件 (残り: {queue.due_count()}件)")
+    try:
+        if config.BROWSER_SERVICE_ENABLED and config.CRAWL_MODE != "async":
+            get_browser_service().run(recrawl_articles_in_context, urls).result()
+        else:
+            recrawl_articles(urls, headless=True)
+        logger.info("再取得タスク完了")
+    except Exception as e:
+        logger.exception(f"再取得タスク中にエラー発生: {e}")
+    finally:
+        write_metrics_file()
 
 
 def start_scheduler():
@@ -36,6 +79,14 @@ def start_scheduler():
             hours=config.SCRAPE_INTERVAL,
             id='scrape_yahoo_news_job'  # ジョブIDを設定
         )
+        if config.RECRAWL_ENABLED:
+            # 保存済みの記事は、記事ごとの間隔で期限が来たものだけを取得し直す
+            scheduler.add_job(
+                recrawl_task,
+                'interval',
+                minutes=config.RECRAWL_TICK_MINUTES,
+                id='recrawl_yahoo_news_job'
+            )
         scheduler.start()
         logger.info(f"スケジューラを開始しました。実行間隔: {config.SCRAPE_INTERVAL}時間")
     else:
@@ -47,6 +98,7 @@ def stop_scheduler():
     global run_status
     if scheduler.running:
         scheduler.shutdown()
+        stop_browser_service()
         run_status = "停止"  # 状態を更新
         logger.info("スケジューラを停止しました。")
     else:
@@ -63,6 +115,9 @@ def get_next_run_time():
 if __name__ == "__main__":
     try:
         logger.info("アプリケーションを開始します。")
+        start_metrics_server()
+        if config.BROWSER_SERVICE_ENABLED and config.CRAWL_MODE != "async":
+            get_browser_service().start()  # 初回の実行の前にブラウザを起動しておく
         start_scheduler()  # スケジューラを開始
 
         while True:
@@ -0,0 +1,169 @@
+import threading
+from datetime import datetime, timedelta
+from pymongo import ASCENDING
+from config import (RECRAWL_COLLECTION, RECRAWL_TTL_DAYS, RECRAWL_MIN_INTERVAL_MINUTES, RECRAWL_MAX_INTERVAL_HOURS,
+                    RECRAWL_BACKOFF, RECRAWL_AGE_FACTOR, RECRAWL_MAX_AGE_HOURS)
+from loggings.logger import get_logger
+from utils.database import get_database, ensure_ttl_index
+from utils.metrics import metrics
+
+logger = get_logger(__name__)
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def next_interval(previous, changed, age, min_interval, max_interval, backoff=RECRAWL_BACKOFF,
+                  age_factor=RECRAWL_AGE_FACTOR):
+    """
+    次の再取得までの間隔を求める
+
+    変更があれば間隔を半分にし、無ければ backoff 倍に延ばす。公開から間もない記事は更新されやすいため、
+    間隔は公開からの経過時間の age_factor 倍を超えないようにする。
+
+    Args:
+        previous: 前回の間隔 (秒)。初めて取得した場合は None
+        changed: 今回の取得で変更を検知したかどうか
+        age: 公開からの経過時間 (秒)
+        min_interval: 間隔の下限 (秒)
+        max_interval: 間隔の上限 (秒)
+        backoff: 変更が無かった場合に間隔に掛ける倍率
+        age_factor: 公開からの経過時間に対する間隔の上限の割合
+
+    Returns:
+        float: 次の再取得までの間隔 (秒)
+    """
+    if previous is None:
+        interval = min_interval
+    elif changed:
+        interval = previous / 2
+    else:
+        interval = previous * backoff
+    interval = min(interval, age * age_factor)
+    return max(min_interval, min(interval, max_interval))
+
+
+class RecrawlQueue:
+    """
+    保存済みの記事の再取得の予定を MongoDB のコレクションに保存する優先度付きキュー
+
+    URLごとに1ドキュメントを持ち、最後に取得・変更を検知した日時、公開日時、次の再取得までの間隔と
+    予定日時 (next_due_at) を保存する。next_due_at のインデックスにより、期限が来たURLを期限の古い順に取り出す。
+    公開から max_age_hours 時間が経過し、変更の無かった記事は next_due_at を None にして再取得しない。
+    last_fetched_at の TTL インデックスにより、一定期間取得しなかったURLの予定は自動的に削除される。
+    """
+
+    def __init__(self, collection_name=RECRAWL_COLLECTION, ttl_days=RECRAWL_TTL_DAYS,
+                 min_interval_minutes=RECRAWL_MIN_INTERVAL_MINUTES, max_interval_hours=RECRAWL_MAX_INTERVAL_HOURS,
+                 max_age_hours=RECRAWL_MAX_AGE_HOURS):
+        """
+        Args:
+            collection_name: 予定を保存するコレクション名
+            ttl_days: 最後に取得してからこの日数が経過した予定を削除する
+            min_interval_minutes: 再取得の間隔の下限 (分)
+            max_interval_hours: 再取得の間隔の上限 (時間)
+            max_age_hours: 公開からこの時間が経過した記事は、変更が無ければ以降は再取得しない
+        """
+        self.min_interval = min_interval_minutes * 60
+        self.max_interval = max_interval_hours * 3600
+        self.max_age = max_age_hours * 3600
+        self.collection = get_database()[collection_name]
+        self.collection.create_index([("url", ASCENDING)], unique=True, background=True)
+        self.collection.create_index([("next_due_at", ASCENDING)], background=True)
+        ensure_ttl_index(self.collection, "last_fetched_at", int(ttl_days * 86400))
+
+    def record_fetch(self, url, changed, published_at=None, now=None):
+        """
+        記事を取得した結果から、次の再取得の予定を更新する (未登録の記事は登録する)
+
+        Args:
+            url: 記事のURL
+            changed: detect_change の結果。初めて登録する記事の場合は変更として扱わない
+            published_at: 記事の公開日時。None の場合は登録した日時を使う
+            now: 現在日時 (テスト用)
+
+        Returns:
+            datetime | None: 次の再取得の予定日時。再取得しない場合は None
+        """
+        now = now or datetime.now()
+        previous = self.collection.find_one({"url": url}, {"_id": 0, "interval": 1, "published_at": 1})
+        changed = bool(changed) and previous is not None
+        published_at = (previous or {}).get("published_at") or published_at or now
+        age = (now - published_at).total_seconds()
+
+        fields = {"last_fetched_at": now}
+        if changed:
+            fields["last_changed_at"] = now
+        if not changed and age >= self.max_age:
+            fields["next_due_at"] = None
+            result = "retired"
+        else:
+            interval = next_interval((previous or {}).get("interval"), changed, age, self.min_interval,
+                                     self.max_interval)
+            fields["interval"] = interval
+            fields["next_due_at"] = now + timedelta(seconds=interval)
+            result = "changed" if changed else "unchanged"
+
+        self.collection.update_one(
+            {"url": url},
+            {"$set": fields,
+             "$setOnInsert": {"published_at": published_at, "first_fetched_at": now},
+             "$inc": {"fetches": 1, "changes": int(changed)}},
+            upsert=True,
+        )
+        metrics.inc("scraper_recrawl_total", result=result)
+        return fields["next_due_at"]
+
+    def claim(self, budget, now=None):
+        """
+        期限が来たURLを期限の古い順に最大 budget 件取り出す
+
+        取り出したURLの予定は min_interval 後に延ばすため、取得に失敗したURLが毎回の確認で取り出され続けることはない
+        (取得に成功すれば record_fetch で予定が更新される)。
+
+        Args:
+            budget: 取り出す最大の件数
+            now: 現在日時 (テスト用)
+
+        Returns:
+            list: 再取得する記事のURLのリスト
+        """
+        now = now or datetime.now()
+        urls = [doc["url"] for doc in
+                self.collection.find({"next_due_at": {"$lte": now}}, {"_id": 0, "url": 1})
+                .sort("next_due_at", ASCENDING).limit(budget)]
+        if urls:
+            self.collection.update_many({"url": {"$in": urls}},
+                                        {"$set": {"next_due_at": now + timedelta(seconds=self.min_interval)}})
+            metrics.inc("scraper_recrawl_total", len(urls), result="claimed")
+        return urls
+
+    def due_count(self, now=None):
+        """期限が来ている (取り出されていない) URLの件数を返す"""
+        return self.collection.count_documents({"next_due_at": {"$lte": now or datetime.now()}})
+
+    def untracked(self, links):
+        """
+        再取得の予定に登録されていないURLだけを返す (登録済みの記事は、このキューが記事ごとの間隔で再取得する)
+
+        Args:
+            links: 記事一覧から取得したURLのリスト
+
+        Returns:
+            list: 未登録のURLのリスト (元の順序を保つ)
+        """
+        if not links:
+            return []
+        tracked = {doc["url"] for doc in self.collection.find({"url": {"$in": list(links)}}, {"_id": 0, "url": 1})}
+        if tracked:
+            logger.info(f"再取得の予定に登録済みの記事URL: {len(tracked)}件 (記事一覧からは開きません)")
+        return [link for link in links if link not in tracked]
+
+
+def get_recrawl_queue():
+    """プロセス内で共有する RecrawlQueue を返す"""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = RecrawlQueue()
+        return _queue
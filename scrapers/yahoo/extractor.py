@@ -0,0 +1,268 @@
+import re
+from bs4 import BeautifulSoup, Comment, FeatureNotFound, NavigableString, Tag
+from utils.metrics import metrics
+from utils.selector_utils import get_selector_stats
+
+# セレクタ候補リスト (同期・非同期クローラで共有)。先頭から優先順位の順に試す
+H1_SELECTORS = [
+    "#uamods > header > h1",
+    "#uamods div.article_body.highLightSearchTarget p",
+    "#uamods-article > div:nth-child(1) > header > h1"
+]
+TIME_SELECTORS = [
+    "#uamods > header > div > div > p > time",
+    "#uamods-article > div:nth-child(1) > header > div > div.sc-1fea4ol-4.cbpbKO > div.sc-1fea4ol-7.bOXKxM > time"
+]
+AUTHOR_SELECTORS = [
+    "#uamods > footer > a",
+    "#contentsWrap > div > div > div > div.sc-150e8y2-2.fEbFen > div > div > a"
+]
+COMMENT_SELECTORS = [
+    "#uamods > header > div > div > div.sc-1n9vtw0-0.hLzvcB > button:nth-child(1) > span"
+]
+P_SELECTORS = [
+    "#uamods div.article_body.highLightSearchTarget p",
+    "#uamods-article > div:nth-child(1) > section > div p",
+    "#uamods > div.article_body.highLightSearchTarget > div:nth-child(1) > p"
+]
+
+# 記事ページから抽出するフィールドの定義
+# mode="first": 各セレクタの最初の要素が表示されていれば採用 (locator().first + is_visible() 相当)
+# mode="all": 表示されている要素をすべて採用。中身のある要素が1つもなければ次のセレクタへ
+# exclusive=True: 候補が互いに排他的なテンプレートごとの代替であり、直近の取得率の高い候補から試してよい
+#   (utils.selector_utils.SelectorStats)。タイトル・本文・日時の候補は同じページで複数一致し得る優先順位付きの
+#   フォールバック (本文の段落をタイトルの代わりにするなど) のため指定しない
+ARTICLE_FIELDS = {
+    "title": {"selectors": H1_SELECTORS, "mode": "first"},
+    "coment": {"selectors": COMMENT_SELECTORS, "mode": "first"},
+    "author": {"selectors": AUTHOR_SELECTORS, "mode": "first"},
+    "time": {"selectors": TIME_SELECTORS, "mode": "first"},
+    "paragraphs": {"selectors": P_SELECTORS, "mode": "all"},
+}
+
+# ブラウザ内で実行する抽出処理。spec を受け取り、1回の呼び出しで全フィールドを返す。
+# 可視判定は Playwright の is_visible() と同じく「バウンディングボックスが空でなく、
+# visibility:hidden でない」ことを条件にする。
+EXTRACT_JS = """
+(spec) => {
+    const isVisible = (el) => {
+        if (window.getComputedStyle(el).visibility === 'hidden') return false;
+        const rect = el.getBoundingClientRect();
+        return rect.width > 0 && rect.height > 0;
+    };
+    const queryAll = (selector) => {
+        try {
+            return Array.from(document.querySelectorAll(selector));
+        } catch (e) {
+            return [];
+        }
+    };
+    const hasText = (html) => html.replace(/<[^>]*>/g, '').trim().length > 0;
+
+    const result = {fields: {}, texts: {}};
+    for (const [name, field] of Object.entries(spec.fields || {})) {
+        let hit = {selector: null, html: null, htmls: []};
+        for (const selector of field.selectors) {
+            const elements = queryAll(selector);
+            if (field.mode === 'all') {
+                const htmls = elements.filter(isVisible).map((el) => el.innerHTML);
+                if (htmls.some(hasText)) {
+                    hit = {selector: selector, html: null, htmls: htmls};
+                    break;
+                }
+            } else {
+                const el = elements[0];
+                if (el && isVisible(el)) {
+                    hit = {selector: selector, html: el.innerHTML, htmls: []};
+                    break;
+                }
+            }
+        }
+        result.fields[name] = hit;
+    }
+    for (const [name, selector] of Object.entries(spec.texts || {})) {
+        result.texts[name] = queryAll(selector).map((el) => el.innerText);
+    }
+    return result;
+}
+"""
+
+
+def build_extraction_spec(fields=None, text_selectors=None):
+    """
+    page.evaluate に渡す抽出仕様を組み立てる
+
+    Args:
+        fields: フィールド名をキー、{"selectors": [...], "mode": "first" | "all"} を値とする辞書。
+            None の場合は ARTICLE_FIELDS
+        text_selectors: 変更検知用に innerText を取得するセレクタ (セレクタ名: セレクタ)
+
+    Returns:
+        dict: 抽出仕様
+    """
+    return {
+        "fields": ARTICLE_FIELDS if fields is None else fields,
+        "texts": text_selectors or {},
+    }
+
+
+def count_selector_hits(spec, result):
+    """
+    フィールドごとに、最初に試した候補で取得できたか (hit)、後続の候補で取得できたか (fallback)、
+    取得できなかったか (miss) を scraper_selector_lookups_total に記録し、候補ごとの取得結果を SelectorStats に記録する
+
+    Args:
+        spec: 抽出に使った (候補を試す順に並べ替えた) 抽出仕様
+        result: 抽出結果
+    """
+    get_selector_stats().record_result(spec, result)
+    if not metrics.enabled:
+        return
+    for name, field in spec.get("fields", {}).items():
+        selector = result["fields"].get(name, {}).get("selector")
+        if selector is None:
+            outcome = "miss"
+        elif selector == field["selectors"][0]:
+            outcome = "hit"
+        else:
+            outcome = "fallback"
+        metrics.inc("scraper_selector_lookups_total", field=name, result=outcome)
+
+
+def extract_fields(page, spec):
+    """
+    抽出仕様をブラウザへ送り、1回のラウンドトリップで結果を取得する
+
+    Args:
+        page: PlaywrightのPageオブジェクト
+        spec: build_extraction_spec で作成した抽出仕様
+
+    Returns:
+        dict: {"fields": {名前: {"selector", "html", "htmls"}}, "texts": {セレクタ名: [innerText, ...]}}
+    """
+    spec = get_selector_stats().order_spec(spec)
+    with metrics.timer("extract"):
+        result = page.evaluate(EXTRACT_JS, spec)
+    count_selector_hits(spec, result)
+    return result
+
+
+async def extract_fields_async(page, spec):
+    """
+    extract_fields の async_playwright 版
+    """
+    spec = get_selector_stats().order_spec(spec)
+    with metrics.timer("extract"):
+        result = await page.evaluate(EXTRACT_JS, spec)
+    count_selector_hits(spec, result)
+    return result
+
+
+# 静的HTMLでは描画結果が無いため、hidden 属性とインラインスタイルだけで可視判定する
+_HIDDEN_STYLE = re.compile(r"display\s*:\s*none|visibility\s*:\s*hidden")
+
+
+def parse_html(html):
+    """
+    HTML をパースする。lxml が使える場合は lxml、無ければ html.parser を使う。
+    """
+    try:
+        return BeautifulSoup(html, "lxml")
+    except FeatureNotFound:
+        return BeautifulSoup(html, "html.parser")
+
+
+def _is_visible_static(el):
+    """静的HTML用の簡易可視判定"""
+    if el.has_attr("hidden"):
+        return False
+    return not _HIDDEN_STYLE.search(el.get("style", ""))
+
+
+# innerText で前後に改行が入る要素 (変更検知で取得するのは段落などの末端に近い要素なので、主なブロック要素のみ)
+_BLOCK_TAGS = frozenset({
+    "address", "article", "aside", "blockquote", "dd", "div", "dl", "dt", "figcaption", "figure", "footer", "h1",
+    "h2", "h3", "h4", "h5", "h6", "header", "hr", "li", "main", "nav", "ol", "p", "pre", "section", "table", "tr",
+    "ul",
+})
+_SKIPPED_TAGS = frozenset({"script", "style", "template", "noscript"})
+_COLLAPSIBLE_SPACES = re.compile(r"[ \t\n\r\f]+")
+_SPACES_AROUND_NEWLINES = re.compile(r" *\n *")
+
+
+def inner_text(el):
+    """
+    静的HTMLの要素から、ブラウザの innerText と同じテキストを組み立てる
+
+    ソース中の空白・改行は1つの空白にまとめ、<br> とブロック要素の境界だけを改行にする。
+    HTTP経路とブラウザ経路で変更検知用のテキストが一致しないと、経路が切り替わっただけで変更として通知されるため。
+    """
+    parts = []
+
+    def walk(node):
+        for child in node.children:
+            if isinstance(child, Comment):
+                continue
+            if isinstance(child, NavigableString):
+                parts.append(_COLLAPSIBLE_SPACES.sub(" ", str(child)))
+            elif isinstance(child, Tag) and child.name not in _SKIPPED_TAGS:
+                if child.name == "br":
+                    parts.append("\n")
+                    continue
+                block = child.name in _BLOCK_TAGS
+                if block:
+                    parts.append("\n")
+                walk(child)
+                if block:
+                    parts.append("\n")
+
+    walk(el)
+    text = _SPACES_AROUND_NEWLINES.sub("\n", "".join(parts))
+    return re.sub(r"\n{2,}", "\n", text).strip(" \n")
+
+
+def _select(soup, selector):
+    """不正なセレクタでも例外にせず空リストを返す (querySelectorAll の try/catch に合わせる)"""
+    try:
+        return soup.select(selector)
+    except Exception:
+        return []
+
+
+def extract_fields_static(html, spec):
+    """
+    extract_fields と同じ抽出仕様を、ブラウザを使わずに静的HTMLへ適用する
+
+    Args:
+        html: HTML文字列、またはパース済みの BeautifulSoup
+        spec: build_extraction_spec で作成した抽出仕様
+
+    Returns:
+        dict: extract_fields と同じ形式の抽出結果
+    """
+    spec = get_selector_stats().order_spec(spec)
+    with metrics.timer("extract_static"):
+        result = _extract_fields_static(html, spec)
+    count_selector_hits(spec, result)
+    return result
+
+
+def _extract_fields_static(html, spec):
+    soup = parse_html(html) if isinstance(html, str) else html
+    result = {"fields": {}, "texts": {}}
+    for name, field in spec.get("fields", {}).items():
+        hit = {"selector": None, "html": None, "htmls": []}
+        for selector in field["selectors"]:
+            elements = _select(soup, selector)
+            if field["mode"] == "all":
+                visible = [el for el in elements if _is_visible_static(el)]
+                if any(el.get_text(strip=True) for el in visible):
+                    hit = {"selector": selector, "html": None, "htmls": [el.decode_contents() for el in visible]}
+                    break
+            elif elements and _is_visible_static(elements[0]):
+                hit = {"selector": selector, "html": elements[0].decode_contents(), "htmls": []}
+                break
+        result["fields"][name] = hit
+    for name, selector in spec.get("texts", {}).items():
+        result["texts"][name] = [inner_text(el) for el in _select(soup, selector)]
+    return result
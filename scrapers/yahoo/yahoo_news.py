@@ -4,144 +4,437 @@ from utils.network import get_random_user_agent
 from playwright_stealth import stealth_sync
 from utils import database
 from retry import retry
-from config import yahoo_SELECTORS, SITEURL
-from utils.parser import (remove_html_tags, decode_html_entities,
-                            normalize_text, remove_extra_whitespaces,
-                            parse_datetime_from_html, format_datetime)
+from config import (yahoo_SELECTORS, SITEURL, BLOCK_RESOURCES, FETCH_MODE, PAGINATION_FETCH_MODE,
+                    PAGINATION_CONCURRENCY, RECRAWL_ENABLED)
+from utils.parser import clean_text, clean_texts, parse_datetime_from_html, format_datetime
 from change_detection import detector
 from models.article import Article
-import time
-import random
 import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
 from utils.selector_utils import SelectorUtils
+from scrapers.yahoo.extractor import build_extraction_spec, extract_fields, extract_fields_static, parse_html
+from utils.resource_blocker import ResourceBlocker
+from utils.http_client import HttpFetcher
+from utils.seen_urls import get_seen_url_filter
+from utils.dedup import mark_duplicates
+from utils.metrics import metrics
+from utils.rate_limiter import get_rate_limiter
+from utils.pickup_urls import get_pickup_url_store
+from scheduler.recrawl import get_recrawl_queue
+from urllib.parse import urljoin, urlsplit
 
 logger = get_logger(__name__)
 selector_utils = SelectorUtils(logger=logger)
 
-def clean_text(text):
-    """テキストをクレンジングするヘルパー関数"""
-    if not text:
-        return ""
-    text = remove_html_tags(text)
-    text = decode_html_entities(text)
-    text = normalize_text(text)
-    text = remove_extra_whitespaces(text)
-    return text
+# 記事を保存するコレクション
+ARTICLE_COLLECTION = 'news_paper'
+# 記事の一括書き込み前に (書き込みスレッドで) バッチ単位に行う処理
+ARTICLE_WRITE_HOOKS = [mark_duplicates]
+
+# 記事データと変更検知用テキストを1回の page.evaluate でまとめて取得するための抽出仕様
+ARTICLE_EXTRACTION_SPEC = build_extraction_spec(text_selectors=yahoo_SELECTORS["article_content"])
+# 分割記事の2ページ目以降から本文段落だけを取得するための抽出仕様
+PARAGRAPH_EXTRACTION_SPEC = build_extraction_spec(
+    fields={"paragraphs": {"selectors": [yahoo_SELECTORS["article_content"]["article_data_p"]], "mode": "all"}}
+)
+# HTTP 高速経路で必須とするフィールド。いずれかが空ならブラウザ経路にフォールバックする
+STATIC_REQUIRED_FIELDS = ("title", "time", "paragraphs")
+# 分割記事のページ送りのリンクからページ番号を取り出す
+PAGE_NUMBER_PATTERN = re.compile(r"[?&]page=(\d+)")
+# 分割記事の最後のページ番号を読み取るリンク (ページ番号のリンクと「次へ」のリンク)
+PAGER_LINKS_SELECTOR = (f'{yahoo_SELECTORS["navigation"]["article_pager_links"]}, '
+                        f'{yahoo_SELECTORS["navigation"]["article_data_p_link"]}')
+
+def goto(page, url):
+    """
+    レート制限 (utils.rate_limiter) に従ってページを遷移し、応答のステータスを送信レートの調整に反映する
+
+    Returns:
+        Response | None: page.goto の戻り値
+    """
+    with get_rate_limiter().request(url) as permit, metrics.timer("goto"):
+        response = page.goto(url, wait_until="load")
+        page.wait_for_load_state(timeout=10000)
+        if response is not None:
+            # Retry-After は混雑時の応答 (429 / 503) にだけ意味がある
+            retry_after = response.headers.get("retry-after") if response.status in (429, 503) else None
+            permit.record(response.status, retry_after)
+    return response
+
+def click_and_wait(page, locator):
+    """レート制限に従ってリンクをクリックし、遷移先の読み込みを待つ"""
+    with get_rate_limiter().request(page.url), metrics.timer("goto"):
+        locator.click()
+        page.wait_for_load_state(timeout=10000)
+
+def format_time_text(time_text):
+    """time要素のテキストを保存用の日時文字列に変換するヘルパー関数"""
+    datetime_object = parse_datetime_from_html(time_text) if time_text else None
+    return format_datetime(datetime_object) if datetime_object else None
+
+def field_text(hit):
+    """抽出結果の1フィールドをクレンジング済みテキストにするヘルパー関数"""
+    return clean_text(hit["html"]) if hit["html"] else ""
+
+def paragraph_texts(hit):
+    """抽出結果の段落フィールドを、空でないクレンジング済みテキストのリストにするヘルパー関数"""
+    return [text for text in clean_texts(hit["htmls"]) if text]
+
+def parse_article_fields(url, extracted, additional_texts=None):
+    """
+    extract_fields の結果から Article の各フィールドを組み立てる
+
+    Args:
+        url: 記事のURL
+        extracted: extract_fields の戻り値
+        additional_texts: 分割記事の2ページ目以降の本文
+
+    Returns:
+        tuple: (Article に渡すキーワード引数の辞書, 見つからなかった要素のスナップショット接頭辞のリスト)
+    """
+    fields = extracted["fields"]
+    missing = []
+
+    if fields["title"]["selector"] is None:
+        logger.warning(f"h1要素が見つかりません: {url}")
+        missing.append("h1_missing")
+
+    # time と updated_at は同じセレクタ候補なので、1回の抽出結果を共用する
+    if fields["time"]["selector"] is not None:
+        formattime = format_time_text(field_text(fields["time"]))
+    else:
+        logger.warning(f"time要素が見つかりません: {url}")
+        missing.append("time_missing")
+        formattime = None
+
+    p_texts = paragraph_texts(fields["paragraphs"])
+    if not p_texts:
+        logger.warning(f"p要素が見つかりません: {url}")
+        missing.append("p_missing")
+
+    if additional_texts:
+        p_texts.extend(additional_texts)
+
+    article_fields = dict(
+        url=url,
+        title=field_text(fields["title"]),
+        content=" ".join(p_texts),
+        coment=field_text(fields["coment"]),
+        author=field_text(fields["author"]),
+        published_at=formattime,
+        updated_at=formattime,
+        source={"site_name": "yahoo", "url": SITEURL["yahoo_top"]}
+    )
+    return article_fields, missing
+
+def save_article(page, url, article_data, extracted, path=None):
+    """
+    取得済みの記事を保存し、同じ抽出結果を使って変更検知する関数 (ブラウザ経路・HTTP経路で共通)
+
+    Args:
+        page: PlaywrightのPageオブジェクト。HTTP経路の場合は None
+        url: 記事のURL
+        article_data: 保存する Article
+        extracted: extract_fields / extract_fields_static の結果
+        path: 記事を取得した経路 ("browser" / "http")。None の場合は page の有無から決める
+    """
+    logger.info(f"データ取得成功: {article_data.title}")
+    path = path or ("browser" if page is not None else "http")
+    metrics.inc("scraper_articles_total", result="saved", path=path)
+    # 書き込みはバッファリングしてバックグラウンドでまとめて行う
+    database.get_bulk_writer(ARTICLE_COLLECTION, before_write=ARTICLE_WRITE_HOOKS).add(article_data)
+    get_seen_url_filter(ARTICLE_COLLECTION).add(url, article_data.published_at)
+
+    # 記事データと同じ抽出結果を使い、再遷移・再クエリせずに変更検知する
+    changed = detector.detect_change(page, url, yahoo_SELECTORS["article_content"], extracted_texts=extracted["texts"])
+    if changed:
+        logger.info(f"ページ {url} の変更を検知しました。")
+    if RECRAWL_ENABLED:
+        # 変更の有無と公開からの経過時間から、この記事を次に再取得する日時を決める
+        try:
+            get_recrawl_queue().record_fetch(url, changed, article_data.published_at)
+        except Exception as e:
+            logger.warning(f"再取得の予定の更新に失敗しました: {url} - {e}")
+
+
+def untracked_links(links):
+    """記事一覧のリンクから、再取得の予定に登録済みの記事を除く (登録済みの記事は記事ごとの間隔で再取得する)"""
+    if not RECRAWL_ENABLED:
+        return links
+    try:
+        return get_recrawl_queue().untracked(links)
+    except Exception as e:
+        logger.warning(f"再取得の予定の読み込みに失敗しました。除外せずに処理します: {e}")
+        return links
 
 def scrape_and_save_article(page, url, additional_texts=None):
     """記事データをスクレイピングし、データベースに保存する関数"""
-    article_data = scrape_article_data(page, url, additional_texts)
+    # 記事データと変更検知用のテキストを1回のラウンドトリップで取得する
+    extracted = extract_fields(page, ARTICLE_EXTRACTION_SPEC)
+    article_data = scrape_article_data(page, url, additional_texts, extracted=extracted)
     if article_data:
-        logger.info(f"データ取得成功: {article_data.title}")
-        database.save_data(article_data, 'news_paper')
-
-        if detector.detect_change(page, url, yahoo_SELECTORS):
-            logger.info(f"ページ {url} の変更を検知しました。")
+        save_article(page, url, article_data, extracted)
+    else:
+        metrics.inc("scraper_articles_total", result="failed", path="browser")
 
 
 @retry(tries=3, delay=5, backoff=2, logger=logger)
-def scrape_article_data(page, url, additional_texts=None):
+def scrape_article_data(page, url, additional_texts=None, extracted=None):
     """
     Yahooニュース記事ページからデータを抽出する関数（セレクタ冗長化・スナップショット機能付き）
+
+    セレクタのフォールバックはブラウザ内でまとめて評価するため、記事1件あたりの
+    Playwright とのラウンドトリップは1回で済む。
+
+    Args:
+        page: 記事ページを読み込み済みのPlaywrightのPageオブジェクト
+        url: 記事のURL
+        additional_texts: 分割記事の2ページ目以降の本文
+        extracted: extract_fields の結果。None の場合はこの関数内で取得する
     """
     try:
-        # セレクタ候補リスト
-        h1_selectors = [
-            "#uamods > header > h1",
-            "#uamods div.article_body.highLightSearchTarget p",
-            "#uamods-article > div:nth-child(1) > header > h1"
-        ]
-        time_selectors = [
-            "#uamods > header > div > div > p > time",
-            "#uamods-article > div:nth-child(1) > header > div > div.sc-1fea4ol-4.cbpbKO > div.sc-1fea4ol-7.bOXKxM > time"
-        ]
-        author_selectors = [
-            "#uamods > footer > a",
-            "#contentsWrap > div > div > div > div.sc-150e8y2-2.fEbFen > div > div > a"
-        ]
-        comment_selectors = [
-            "#uamods > header > div > div > div.sc-1n9vtw0-0.hLzvcB > button:nth-child(1) > span"
-        ]
-        p_selectors = [
-            "#uamods div.article_body.highLightSearchTarget p",
-            "#uamods-article > div:nth-child(1) > section > div p",
-            "#uamods > div.article_body.highLightSearchTarget > div:nth-child(1) > p"
-        ]
-
-        h1_element = selector_utils.try_multiple_selectors(page, h1_selectors)
-        if h1_element:
-            h1_text = clean_text(h1_element.inner_html())
-        else:
-            logger.warning(f"h1要素が見つかりません: {url}")
-            selector_utils.save_html_snapshot(page, url, "h1_missing")
-            h1_text = ""
-
-        coment_element = selector_utils.try_multiple_selectors(page, comment_selectors)
-        coment_text = clean_text(coment_element.inner_html()) if coment_element else ""
-
-        author_element = selector_utils.try_multiple_selectors(page, author_selectors)
-        author_text = clean_text(author_element.inner_html()) if author_element else ""
-
-        # time 要素の取得とエラーハンドリング
-        time_element = selector_utils.try_multiple_selectors(page, time_selectors)
-        if time_element:
-            time_text = clean_text(time_element.inner_html())
-            datetime_object = parse_datetime_from_html(time_text) if time_text else None
-            formattime = format_datetime(datetime_object) if datetime_object else None
-        else:
-            logger.warning(f"time要素が見つかりません: {url}")
-            selector_utils.save_html_snapshot(page, url, "time_missing")
-            formattime = None
-
-        # updated_atも同様に対応させる
-        updated_at_element = selector_utils.try_multiple_selectors(page, time_selectors)  # 例としてtime_selectorsを流用
-        if updated_at_element:
-            updated_at_text = clean_text(updated_at_element.inner_html())
-            updated_object = parse_datetime_from_html(updated_at_text) if updated_at_text else None
-            updated_at_formattime = format_datetime(updated_object) if updated_object else None
-        else:
-            logger.warning(f"updated_at要素が見つかりません: {url}")
-            selector_utils.save_html_snapshot(page, url, "updated_at_missing")
-            updated_at_formattime = None
-
-        # p要素をすべて取得
-        p_texts = []
-        found_p = False
-        for selector in p_selectors:
-            p_elements = page.locator(selector).all()
-            if p_elements:
-                for p in p_elements:
-                    if p.is_visible():
-                        p_text = clean_text(p.inner_html())
-                        if p_text:
-                            p_texts.append(p_text)
-                            found_p = True
-                if found_p:
-                    break  # 最初に見つかったセレクタで十分
-        if not found_p:
-            logger.warning(f"p要素が見つかりません: {url}")
-            selector_utils.save_html_snapshot(page, url, "p_missing")
-
-        if additional_texts:
-            p_texts.extend(additional_texts)
-
-        return Article(
-            url=url,
-            title=h1_text,
-            content=" ".join(p_texts),
-            coment=coment_text,
-            author=author_text,
-            published_at=formattime,
-            updated_at=updated_at_formattime,
-            source={"site_name": "yahoo", "url": SITEURL["yahoo_top"]}
-        )
+        if extracted is None:
+            extracted = extract_fields(page, ARTICLE_EXTRACTION_SPEC)
+        with metrics.timer("parse"):
+            article_fields, missing = parse_article_fields(url, extracted, additional_texts)
+        if missing:
+            # 見つからなかった要素ごとにHTMLを取得せず、1回取得したHTMLを失敗の種類ごとに索引へ記録する
+            selector_utils.save_html_snapshot(page, url, missing)
+        return Article(**article_fields)
     except Exception as e:
         logger.error(f"データの取得に失敗: {url} - {e}")
         selector_utils.save_html_snapshot(page, url, "fatal_error")
         return None
 
 
+def is_pickup_url(url):
+    """記事一覧のリンクがピックアップページ (記事本体へのリンクを載せたページ) かどうか"""
+    return "/pickup/" in urlsplit(url).path
+
+
+def pickup_target_url(url, soup):
+    """ピックアップページのHTMLから記事本体のURLを返す (リンクが無ければ url をそのまま返す)"""
+    pickup_link = soup.select_one(yahoo_SELECTORS["navigation"]["pickup_link"])
+    if pickup_link is not None and pickup_link.get("href"):
+        return urljoin(url, pickup_link["href"])
+    return url
+
+
+def prefetch_pickup_urls(urls):
+    """記事一覧のリンクのうち、ピックアップページの解決済みの対応を1回のクエリでまとめて読み込む"""
+    pickup_urls = [url for url in urls if is_pickup_url(url)]
+    if not pickup_urls:
+        return
+    try:
+        get_pickup_url_store().prefetch(pickup_urls)
+    except Exception as e:
+        logger.warning(f"ピックアップページの対応の読み込みに失敗しました: {e}")
+
+
+def cached_article_url(url):
+    """
+    ピックアップページについて、保存済みの記事本体のURLを返す
+
+    Returns:
+        str | None: 記事本体のURL。ピックアップページでない・未解決・期限切れの場合は None
+    """
+    if not is_pickup_url(url):
+        return None
+    try:
+        article_url = get_pickup_url_store().get(url)
+    except Exception as e:
+        logger.warning(f"ピックアップページの対応の取得に失敗しました: {url} - {e}")
+        return None
+    if article_url:
+        metrics.inc("scraper_pickup_resolutions_total", result="cached")
+    return article_url
+
+
+def remember_article_url(url, article_url):
+    """ピックアップページから読み取った記事本体のURLを保存する"""
+    metrics.inc("scraper_pickup_resolutions_total", result="fetched")
+    try:
+        get_pickup_url_store().put(url, article_url)
+    except Exception as e:
+        logger.warning(f"ピックアップページの対応の保存に失敗しました: {url} - {e}")
+
+
+def resolve_article_url(page, url):
+    """
+    記事一覧のリンクから、ブラウザで開く記事本体のURLを求める関数
+
+    解決済みのピックアップページは保存済みの対応 (utils.pickup_urls) から求め、ページを取得しない。
+    未解決のピックアップページはブラウザで描画せず、ブラウザのコンテキスト (Cookie を共有する) からHTMLだけを取得して
+    記事本体へのリンクを読み取り、対応を保存する。ピックアップページでない場合は url をそのまま返す。
+
+    Returns:
+        str | None: 記事本体のURL。ピックアップページからリンクを読み取れなかった場合は None
+    """
+    if not is_pickup_url(url):
+        return url
+    article_url = cached_article_url(url)
+    if article_url:
+        return article_url
+    try:
+        with get_rate_limiter().request(url) as permit, metrics.timer("resolve"):
+            response = page.request.get(url)
+            permit.record(response.status)
+            if not response.ok:
+                logger.warning(f"ピックアップページの取得に失敗しました: {url} - ステータス {response.status}")
+                return None
+            html = response.text()
+    except Exception as e:
+        # 呼び出し元で描画したピックアップページのリンクをクリックする経路に任せる
+        logger.warning(f"ピックアップページの取得に失敗しました: {url} - {e}")
+        return None
+    article_url = pickup_target_url(url, parse_html(html))
+    if article_url == url:
+        return None
+    remember_article_url(url, article_url)
+    return article_url
+
+
+def scrape_article_static(fetcher, url):
+    """
+    ブラウザを使わずに記事を取得・抽出する関数 (HTTP 高速経路)
+
+    サーバーレンダリング済みのHTMLを取得し、ブラウザ経路と同じ抽出仕様を静的HTMLに適用する。
+    必須フィールド (STATIC_REQUIRED_FIELDS) が1つでも空の場合は None を返し、
+    呼び出し元で Playwright による取得にフォールバックする。
+
+    Args:
+        fetcher: HttpFetcher
+        url: 記事一覧から取得した記事 (またはピックアップ) のURL
+
+    Returns:
+        tuple | None: (Article, 抽出結果)。HTTP経路で取得できなかった場合は None
+    """
+    try:
+        # 解決済みのピックアップページは、ピックアップページを取得せずに記事本体を取得する
+        cached_url = cached_article_url(url)
+        fetched = fetcher.fetch(cached_url or url)
+        if fetched is None or fetched[0] != 200:
+            return None
+        soup = parse_html(fetched[1])
+        article_url = cached_url or url
+
+        # ピックアップページの場合は、記事本体へのリンクを辿る
+        if cached_url is None:
+            article_url = pickup_target_url(url, soup)
+        if article_url != (cached_url or url):
+            if is_pickup_url(url):
+                remember_article_url(url, article_url)
+            fetched = fetcher.fetch(article_url)
+            if fetched is None or fetched[0] != 200:
+                return None
+            soup = parse_html(fetched[1])
+
+        extracted = extract_fields_static(soup, ARTICLE_EXTRACTION_SPEC)
+        missing = [name for name in STATIC_REQUIRED_FIELDS if extracted["fields"][name]["selector"] is None]
+        if missing:
+            logger.info(f"HTTP経路で必須項目を取得できませんでした: {url} - {missing}")
+            return None
+
+        with metrics.timer("paginate_static"):
+            additional_texts = scrape_paginated_content_static(fetcher, article_url, soup)
+        with metrics.timer("parse"):
+            article_fields, _ = parse_article_fields(url, extracted, additional_texts)
+        return Article(**article_fields), extracted
+    except Exception as e:
+        logger.warning(f"HTTP経路での記事の取得に失敗しました: {url} - {e}")
+        return None
+
+
+def page_count_from_hrefs(hrefs):
+    """分割記事のページ送りのリンク (href のリスト) から、最後のページ番号を返す (ページ送りが無ければ 1)"""
+    numbers = [int(match.group(1)) for match in map(PAGE_NUMBER_PATTERN.search, hrefs) if match]
+    return max(numbers, default=1)
+
+
+def _pager_hrefs_static(soup):
+    return [link.get("href", "") for link in soup.select(PAGER_LINKS_SELECTOR)]
+
+
+def fetch_page_static(fetcher, url):
+    """
+    分割記事の1ページをHTTPで取得し、本文段落とページ送りから分かる最後のページ番号を返す
+
+    Returns:
+        tuple | None: (本文段落のリスト, 最後のページ番号)。取得できなかった・段落が無かった場合は None
+    """
+    fetched = fetcher.fetch(url)
+    if fetched is None or fetched[0] != 200:
+        return None
+    soup = parse_html(fetched[1])
+    paragraphs = paragraph_texts(extract_fields_static(soup, PARAGRAPH_EXTRACTION_SPEC)["fields"]["paragraphs"])
+    if not paragraphs:
+        return None
+    return paragraphs, page_count_from_hrefs(_pager_hrefs_static(soup))
+
+
+def fetch_pages_static(fetcher, urls):
+    """
+    分割記事の複数のページをHTTPで並行して取得する (送信間隔と同時実行数はレート制限に従う)
+
+    Returns:
+        list: urls と同じ順の fetch_page_static の結果
+    """
+    if len(urls) <= 1:
+        return [fetch_page_static(fetcher, url) for url in urls]
+    with ThreadPoolExecutor(max_workers=min(PAGINATION_CONCURRENCY, len(urls))) as executor:
+        return list(executor.map(lambda url: fetch_page_static(fetcher, url), urls))
+
+
+def collect_paginated_texts(base_url, page_count, fetch_pages):
+    """
+    分割記事の2ページ目以降をまとめて取得し、ページ順に本文段落をつなげて返す
+
+    1ページ目のページ送りから分かる最後のページまでを fetch_pages で一度に取得する。
+    取得したページのページ送りにさらに先のページがあれば (ページ送りが省略されている場合)、続きを同様に取得する。
+    取得できなかったページがあれば、その手前までの段落を返す。
+
+    Args:
+        base_url: クエリパラメータを除いた記事のURL
+        page_count: 1ページ目のページ送りから分かる最後のページ番号
+        fetch_pages: URL のリストを受け取り、fetch_page_static と同じ形式の結果のリストを返す関数
+
+    Returns:
+        list: 2ページ目以降の本文段落のリスト
+    """
+    texts = []
+    fetched_until = 1
+    while page_count > fetched_until:
+        urls = [f"{base_url}?page={number}" for number in range(fetched_until + 1, page_count + 1)]
+        logger.info(f"分割記事ページを取得: {base_url} ({fetched_until + 1}〜{page_count}ページ)")
+        for url, result in zip(urls, fetch_pages(urls)):
+            if result is None:
+                logger.info(f"分割記事ページが存在しません: {url}")
+                return texts
+            paragraphs, last_page = result
+            texts.extend(paragraphs)
+            page_count = max(page_count, last_page)
+        fetched_until += len(urls)
+    return texts
+
+
+def scrape_paginated_content_static(fetcher, article_url, soup):
+    """
+    分割された記事の2ページ目以降をHTTPで並行して取得し、本文段落を返す関数
+
+    Args:
+        fetcher: HttpFetcher
+        article_url: 記事1ページ目のURL
+        soup: 記事1ページ目のパース済みHTML
+
+    Returns:
+        list: 2ページ目以降の本文段落のリスト
+    """
+    return collect_paginated_texts(article_url.split('?')[0], page_count_from_hrefs(_pager_hrefs_static(soup)),
+                                   lambda urls: fetch_pages_static(fetcher, urls))
+
 
 @retry(tries=3, delay=5, backoff=2, logger=logger)
 def get_article_links(page):
@@ -157,75 +450,106 @@ def get_article_links(page):
 
 
 @retry(tries=3, delay=5, backoff=2, logger=logger)
-def scrape_article_page(page, url):
-    """個別の記事ページをスクレイピングする関数"""
-    try:
-        page.goto(url, wait_until="load")
-        page.wait_for_load_state(timeout=10000)
-
-        pickup_link = page.locator(yahoo_SELECTORS["navigation"]["pickup_link"]).first
-        if pickup_link and pickup_link.is_visible():
-            pickup_link.click()
-            page.wait_for_load_state(timeout=10000)
+def scrape_article_page(page, url, fetcher=None, pagination_fetcher=None):
+    """
+    個別の記事ページをスクレイピングする関数
 
+    fetcher が指定された場合はまずHTTP高速経路で取得し、必須項目が欠けた場合のみブラウザで取得する。
+    ブラウザで取得する場合、分割記事の2ページ目以降は pagination_fetcher (HTTP) で並行して取得する。
+    """
+    path = "browser"
+    try:
+        if fetcher is not None:
+            path = "http"
+            result = scrape_article_static(fetcher, url)
+            if result:
+                save_article(None, url, *result, path=path)
+                return
+            logger.info(f"ブラウザでの取得にフォールバックします: {url}")
+            path = "browser"
+
+        # 記事本体のURLを先に求めて直接開き、ピックアップページの描画とクリックによる遷移を省く
+        article_url = resolve_article_url(page, url)
+        goto(page, article_url or url)
+
+        if article_url is None:
+            # ピックアップページのリンクをHTMLから読み取れなかった場合は、描画したページのリンクをクリックする
+            pickup_link = page.locator(yahoo_SELECTORS["navigation"]["pickup_link"]).first
+            if pickup_link and pickup_link.is_visible():
+                click_and_wait(page, pickup_link)
 
         # 分割記事の処理を関数化し、可読性向上
-        additional_texts = scrape_paginated_content(page)
+        with metrics.timer("paginate"):
+            additional_texts = scrape_paginated_content(page, pagination_fetcher)
         scrape_and_save_article(page, url, additional_texts)
-
-        page.go_back()
-        page.wait_for_load_state(timeout=10000)
-        if 'pickup' in url:  # ピックアップ記事から戻った場合はさらに戻る
-            page.go_back()
-            page.wait_for_load_state(timeout=10000)
-
+        # 記事へのリンクは一覧ページで取得済みのため、一覧ページへ戻らずに次の記事を直接開く
 
     except Exception as e:
+        metrics.inc("scraper_articles_total", result="failed", path=path)
         logger.error(f"記事ページの処理中にエラー発生: {url} - {e}")
 
 
-def scrape_paginated_content(page):
+def fetch_page_in_tab(tab, url):
     """
-    分割された記事のコンテンツをスクレイピングする関数
+    分割記事の1ページをブラウザのタブで開き、fetch_page_static と同じ形式の結果を返す (HTTPで取得できない場合に使う)
     """
-    additional_texts = []
-    current_page_num = 1
-    base_url = page.url.split('?')[0]  # クエリパラメータを除去したベースURL
-
-    while True:
-        current_url = f"{base_url}?page={current_page_num}"
-        logger.info(f"分割記事ページ {current_url} をスクレイピング")
-        response = page.goto(current_url, wait_until="load")
-        page.wait_for_load_state(timeout=10000)
+    response = goto(tab, url)
+    if response is None or response.status != 200:
+        return None
+    paragraphs = paragraph_texts(extract_fields(tab, PARAGRAPH_EXTRACTION_SPEC)["fields"]["paragraphs"])
+    hrefs = tab.locator(PAGER_LINKS_SELECTOR).evaluate_all(
+        "links => links.map(link => link.getAttribute('href') || '')")
+    return paragraphs, page_count_from_hrefs(hrefs)
 
-        if response is None or response.status != 200:
-            logger.info(f"分割記事ページが存在しません: {current_url}")
-            break
 
-        # 現在のページのコンテンツを取得
-        for p in page.locator(yahoo_SELECTORS["article_content"]["article_data_p"]).all():
-            if p.is_visible():
-                p_text = clean_text(p.inner_html())
-                if p_text:
-                    additional_texts.append(p_text)
+def scrape_paginated_content(page, fetcher=None):
+    """
+    分割された記事の2ページ目以降のコンテンツをスクレイピングする関数
 
-        # 次のページが存在するか確認 (セレクタを修正)
-        next_page_link = page.locator(yahoo_SELECTORS["navigation"]["article_data_p_link"]).nth(current_page_num -1)
-        if not next_page_link.is_visible():
-            break
+    表示中の1ページ目のページ送りから最後のページ番号を読み取り、残りのページを fetcher (HTTP) で並行して取得する。
+    HTTPで取得できなかったページ、または fetcher が None の場合は別のタブで順に開く。
+    表示中のページは遷移させないため、呼び出し元はそのまま1ページ目から記事データを抽出できる。
 
+    Args:
+        page: 記事の1ページ目を表示しているPlaywrightのPageオブジェクト
+        fetcher: 分割記事の取得に使う HttpFetcher
 
-        current_page_num += 1
-        time.sleep(random.uniform(1, 3))
+    Returns:
+        list: 2ページ目以降の本文段落のリスト
+    """
+    hrefs = page.locator(PAGER_LINKS_SELECTOR).evaluate_all(
+        "links => links.map(link => link.getAttribute('href') || '')")
+    page_count = page_count_from_hrefs(hrefs)
+    if page_count <= 1:
+        return []
+
+    tab = None
+
+    def fetch_pages(urls):
+        nonlocal tab
+        results = fetch_pages_static(fetcher, urls) if fetcher is not None else [None] * len(urls)
+        for index, url in enumerate(urls):
+            if results[index] is None:
+                if tab is None:
+                    tab = page.context.new_page()
+                results[index] = fetch_page_in_tab(tab, url)
+                if results[index] is None:
+                    break
+        return results
 
-    return additional_texts
+    try:
+        return collect_paginated_texts(page.url.split('?')[0], page_count, fetch_pages)
+    finally:
+        if tab is not None:
+            tab.close()
 
 
 
-def scrape_article_list_page(page, max_pages=100):
+def scrape_article_list_page(page, max_pages=100, fetcher=None, pagination_fetcher=None):
     """
     記事一覧ページをスクレイピングし、各記事ページへ遷移する関数。
-    最大ページ数を設定可能。
+    最大ページ数を設定可能。fetcher を指定するとHTTP高速経路を使う。
+    pagination_fetcher を指定すると、分割記事の2ページ目以降をHTTPで並行して取得する。
     """
     topics_url = SITEURL["yahoo_link"]
     current_page = 1
@@ -235,8 +559,7 @@ def scrape_article_list_page(page, max_pages=100):
             url = f"{topics_url}?page={current_page}"
             logger.info(f"ページ {current_page} ({url}) をスクレイピング開始")
 
-            response = page.goto(url, wait_until="load")
-            page.wait_for_load_state(timeout=10000)
+            response = goto(page, url)
 
             if response and response.status != 200:
                 logger.info(f"ページが存在しません: {url}")
@@ -249,20 +572,21 @@ def scrape_article_list_page(page, max_pages=100):
             if not links:
                 logger.info("記事一覧ページに記事へのリンクがありません。")
                 break
+            # 保存済みの記事はブラウザで開く前に除外する (SEEN_URL_POLICY)
+            links = untracked_links(get_seen_url_filter(ARTICLE_COLLECTION).filter(links))
+            prefetch_pickup_urls(links)
 
 
             for link in links:
                 try:
                     # scrape_article_page に URL を渡すように変更
-                    scrape_article_page(page, link)
-                    time.sleep(random.uniform(1, 3))
+                    scrape_article_page(page, link, fetcher, pagination_fetcher)
 
 
                 except Exception as e:
                     logger.error(f"記事ページの処理中にエラー発生: {link} - {e}")
 
             current_page += 1
-            time.sleep(random.uniform(2, 5))
 
     except Exception as e:
         logger.critical(f"致命的なエラー発生: {e}")
@@ -270,32 +594,123 @@ def scrape_article_list_page(page, max_pages=100):
         logger.info("スクレイピング完了")
 
 
+@contextmanager
+def crawl_session(context):
+    """
+    コンテキストに記事を取得するためのページと HttpFetcher を用意し、終了時に書き込みのバッファを書き出して片付ける
+
+    Yields:
+        tuple: (Page, fetcher, pagination_fetcher)。HTTPで取得しない場合の fetcher は None
+    """
+    page = context.new_page()
+    stealth_sync(page)
+    # 画像・広告・解析タグなど、本文の取得に不要なリクエストを遮断する
+    blocker = ResourceBlocker() if BLOCK_RESOURCES else None
+    # 分割記事の取得に開くタブにも適用するよう、コンテキスト単位で設定する
+    if blocker:
+        blocker.install(context)
+    # FETCH_MODE="http" の場合は記事ページをHTTP高速経路で取得する
+    fetcher = HttpFetcher() if FETCH_MODE == "http" else None
+    # PAGINATION_FETCH_MODE="http" の場合は、分割記事の2ページ目以降をHTTPで並行して取得する
+    pagination_fetcher = fetcher or (HttpFetcher() if PAGINATION_FETCH_MODE == "http" else None)
+    try:
+        yield page, fetcher, pagination_fetcher
+    finally:
+        if blocker:
+            blocker.log_summary()
+        if pagination_fetcher:
+            pagination_fetcher.close()
+        if fetcher and fetcher is not pagination_fetcher:
+            fetcher.close()
+        # 実行ごとにバッファを書き出し、保存件数をログに残す
+        database.flush_bulk_writers()
+        # セレクタ候補ごとの取得結果を保存し、次の実行 (別のプロセス) でも取得率の高い候補から試す
+        selector_utils.stats.save()
+        selector_utils.snapshots.flush()
+        try:
+            page.close()
+        except Exception as e:
+            logger.warning(f"ページを閉じられませんでした: {e}")
+
+
+def scrape_yahoo_news_in_context(context, max_pages=100):
+    """
+    起動済みのブラウザのコンテキストで Yahoo!ニュースのスクレイピングを行う関数
+
+    スケジューラからは utils.browser_service.BrowserService 経由で呼び、実行ごとにブラウザを起動しない。
+
+    Args:
+        context: Playwright の BrowserContext (呼び出し元で閉じる)
+        max_pages: スクレイピングする記事一覧の最大ページ数
+    """
+    try:
+        with crawl_session(context) as (page, fetcher, pagination_fetcher):
+            goto(page, SITEURL["yahoo_top"])
+            logger.info("Yahoo!トップページへアクセス")
+
+            topics_page_link = page.locator(yahoo_SELECTORS["navigation"]["topics_page_link"]).first
+            if topics_page_link and topics_page_link.is_visible():
+                click_and_wait(page, topics_page_link)
+            else:
+                logger.error("トピックスページへのリンクが見つかりません")
+                return
+
+            logger.info("トピックスページへ遷移")
+
+            scrape_article_list_page(page, max_pages, fetcher, pagination_fetcher)
+
+    except Exception as e:
+        logger.critical(f"致命的なエラー: {e}")
+
+
+def recrawl_articles_in_context(context, urls):
+    """
+    起動済みのブラウザのコンテキストで、再取得の期限が来た記事を取得し直す関数
+
+    記事一覧は開かず、記事ページを直接開く。保存と変更検知は通常のクロールと同じ経路で行い、
+    その結果から次の再取得の予定が更新される (scheduler.recrawl)。
+
+    Args:
+        context: Playwright の BrowserContext (呼び出し元で閉じる)
+        urls: 再取得する記事のURLのリスト
+    """
+    try:
+        with crawl_session(context) as (page, fetcher, pagination_fetcher):
+            for url in urls:
+                try:
+                    scrape_article_page(page, url, fetcher, pagination_fetcher)
+                except Exception as e:
+                    logger.error(f"記事ページの再取得中にエラー発生: {url} - {e}")
+    except Exception as e:
+        logger.critical(f"致命的なエラー: {e}")
+
+
 def scrape_yahoo_news(headless=False, max_pages=100):
-    """Yahoo!ニュースのスクレイピングを行うメイン関数"""
+    """Yahoo!ニュースのスクレイピングを行うメイン関数 (実行ごとにブラウザを起動して終了する)"""
     try:
         with sync_playwright() as p:
             browser = p.chromium.launch(headless=headless)
-            page = browser.new_page(user_agent=get_random_user_agent())
-            stealth_sync(page)
+            context = browser.new_context(user_agent=get_random_user_agent())
             try:
-                page.goto(SITEURL["yahoo_top"], wait_until="load")
-                logger.info("Yahoo!トップページへアクセス")
-                page.wait_for_load_state(timeout=10000)
-
-                topics_page_link = page.locator(yahoo_SELECTORS["navigation"]["topics_page_link"]).first
-                if topics_page_link and topics_page_link.is_visible():
-                    topics_page_link.click()
-                    page.wait_for_load_state(timeout=10000)
-                else:
-                    logger.error("トピックスページへのリンクが見つかりません")
-                    return
+                scrape_yahoo_news_in_context(context, max_pages)
+            finally:
+                context.close()
+                browser.close()
 
-                logger.info("トピックスページへ遷移")
+    except Exception as e:
+        logger.critical(f"致命的なエラー: {e}")
 
-                scrape_article_list_page(page, max_pages)
 
+def recrawl_articles(urls, headless=True):
+    """再取得の期限が来た記事を取得し直す関数 (実行ごとにブラウザを起動して終了する)"""
+    try:
+        with sync_playwright() as p:
+            browser = p.chromium.launch(headless=headless)
+            context = browser.new_context(user_agent=get_random_user_agent())
+            try:
+                recrawl_articles_in_context(context, urls)
             finally:
-                page.close()
+                context.close()
                 browser.close()
 
     except Exception as e:
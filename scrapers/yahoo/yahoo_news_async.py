@@ -0,0 +1,414 @@
+import asyncio
+import functools
+from contextlib import asynccontextmanager
+from playwright.async_api import async_playwright
+from playwright_stealth import stealth_async
+from loggings.logger import get_logger
+from utils.network import get_random_user_agent
+from utils import database
+from config import (yahoo_SELECTORS, SITEURL, CRAWL_CONCURRENCY, BLOCK_RESOURCES, FETCH_MODE, PAGINATION_FETCH_MODE,
+                    PAGINATION_CONCURRENCY)
+from models.article import Article
+from scrapers.yahoo.extractor import extract_fields_async, parse_html
+from utils.resource_blocker import ResourceBlocker
+from utils.http_client import HttpFetcher
+from utils.seen_urls import get_seen_url_filter
+from utils.metrics import metrics
+from utils.rate_limiter import get_rate_limiter
+from scrapers.yahoo.yahoo_news import (selector_utils, parse_article_fields, paragraph_texts,
+                                       save_article, scrape_article_static, fetch_pages_static, page_count_from_hrefs,
+                                       is_pickup_url, pickup_target_url, prefetch_pickup_urls,
+                                       cached_article_url, remember_article_url, untracked_links,
+                                       PAGER_LINKS_SELECTOR, ARTICLE_COLLECTION, ARTICLE_EXTRACTION_SPEC,
+                                       PARAGRAPH_EXTRACTION_SPEC)
+
+logger = get_logger(__name__)
+
+
+def async_retry(tries=3, delay=5, backoff=2):
+    """
+    コルーチン関数用の再試行デコレータ (retry パッケージの @retry と同じ引数)
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            _tries, _delay = tries, delay
+            while True:
+                try:
+                    return await func(*args, **kwargs)
+                except Exception as e:
+                    _tries -= 1
+                    if _tries <= 0:
+                        raise
+                    logger.warning(f"{e}, {_delay}秒後に再試行します。")
+                    await asyncio.sleep(_delay)
+                    _delay *= backoff
+        return wrapper
+    return decorator
+
+
+class PagePool:
+    """
+    async_playwright のページを使い回す固定サイズのプール。
+    プールのサイズが同時に処理する記事ページ数の上限になる。
+    """
+
+    def __init__(self, context, size):
+        self.context = context
+        self.size = size
+        self._queue = asyncio.Queue()
+        self._pages = []
+
+    async def open(self):
+        """ページを size 個作成してプールに入れる"""
+        for _ in range(self.size):
+            page = await self.context.new_page()
+            await stealth_async(page)
+            self._pages.append(page)
+            self._queue.put_nowait(page)
+        logger.info(f"ページプールを作成しました。size={self.size}")
+
+    @asynccontextmanager
+    async def acquire(self):
+        """空いているページを1つ借りる。使い終わるとプールに戻る。"""
+        page = await self._queue.get()
+        try:
+            yield page
+        finally:
+            self._queue.put_nowait(page)
+
+    async def close(self):
+        """プール内のページをすべて閉じる"""
+        for page in self._pages:
+            try:
+                await page.close()
+            except Exception as e:
+                logger.debug(f"ページのクローズに失敗しました: {e}")
+        self._pages.clear()
+
+
+async def save_html_snapshot_async(page, url, prefix="snapshot"):
+    """
+    HTMLスナップショットを保存する (圧縮と書き込みは SnapshotStore のスレッドで行う)
+
+    prefix にリストを渡すと、1回取得したHTMLを複数の失敗の種類として記録する。
+    """
+    prefixes = selector_utils.snapshots.admit([prefix] if isinstance(prefix, str) else prefix)
+    if not prefixes:
+        return None
+    try:
+        html = await page.content()
+    except Exception as e:
+        logger.error(f"HTMLスナップショット保存失敗: {e}")
+        return None
+    return selector_utils.snapshots.save(html, url, prefixes)
+
+
+async def goto_async(page, url):
+    """goto の非同期版 (同期版のクローラー・HTTP経路と同じレート制限を使う)"""
+    async with get_rate_limiter().request_async(url) as permit:
+        with metrics.timer("goto"):
+            response = await page.goto(url, wait_until="load")
+            await page.wait_for_load_state(timeout=10000)
+        if response is not None:
+            retry_after = response.headers.get("retry-after") if response.status in (429, 503) else None
+            permit.record(response.status, retry_after)
+    return response
+
+
+async def click_and_wait_async(page, locator):
+    """click_and_wait の非同期版"""
+    async with get_rate_limiter().request_async(page.url):
+        with metrics.timer("goto"):
+            await locator.click()
+            await page.wait_for_load_state(timeout=10000)
+
+
+async def scrape_and_save_article_async(page, url, additional_texts=None):
+    """記事データをスクレイピングし、データベースに保存する関数 (非同期版)"""
+    extracted = await extract_fields_async(page, ARTICLE_EXTRACTION_SPEC)
+    article_data = await scrape_article_data_async(page, url, additional_texts, extracted=extracted)
+    if article_data:
+        # 保存と変更検知は同期処理なので、イベントループを止めないよう別スレッドで行う
+        await asyncio.to_thread(save_article, None, url, article_data, extracted, "browser")
+    else:
+        metrics.inc("scraper_articles_total", result="failed", path="browser")
+
+
+@async_retry(tries=3, delay=5, backoff=2)
+async def scrape_article_data_async(page, url, additional_texts=None, extracted=None):
+    """
+    Yahooニュース記事ページからデータを抽出する関数 (scrape_article_data の非同期版)
+    """
+    try:
+        if extracted is None:
+            extracted = await extract_fields_async(page, ARTICLE_EXTRACTION_SPEC)
+        with metrics.timer("parse"):
+            article_fields, missing = parse_article_fields(url, extracted, additional_texts)
+        if missing:
+            await save_html_snapshot_async(page, url, missing)
+        return Article(**article_fields)
+    except Exception as e:
+        logger.error(f"データの取得に失敗: {url} - {e}")
+        await save_html_snapshot_async(page, url, "fatal_error")
+        return None
+
+
+@async_retry(tries=3, delay=5, backoff=2)
+async def get_article_links_async(page):
+    """記事一覧ページから記事へのリンクを取得する関数 (非同期版)"""
+    links = []
+    for link in await page.locator(yahoo_SELECTORS["navigation"]["article_links"]).all():
+        href = await link.get_attribute('href')
+        if href and href.startswith("http"):
+            links.append(href)
+    logger.debug(f"記事リンク取得: {len(links)}件")
+    return links
+
+
+async def _pager_page_count_async(page):
+    hrefs = await page.locator(PAGER_LINKS_SELECTOR).evaluate_all(
+        "links => links.map(link => link.getAttribute('href') || '')")
+    return page_count_from_hrefs(hrefs)
+
+
+async def fetch_page_in_tab_async(context, url):
+    """fetch_page_in_tab の非同期版 (タブを開いて1ページを取得し、閉じる)"""
+    tab = await context.new_page()
+    try:
+        response = await goto_async(tab, url)
+        if response is None or response.status != 200:
+            return None
+        extracted = await extract_fields_async(tab, PARAGRAPH_EXTRACTION_SPEC)
+        return paragraph_texts(extracted["fields"]["paragraphs"]), await _pager_page_count_async(tab)
+    finally:
+        await tab.close()
+
+
+async def scrape_paginated_content_async(page, fetcher=None):
+    """
+    分割された記事の2ページ目以降のコンテンツをスクレイピングする関数 (scrape_paginated_content の非同期版)
+
+    残りのページは fetcher (HTTP) で並行して取得し、取得できなかったページは別のタブで並行して開く。
+    """
+    page_count = await _pager_page_count_async(page)
+    base_url = page.url.split('?')[0]
+    tabs = asyncio.Semaphore(PAGINATION_CONCURRENCY)
+
+    async def fetch_in_tab(url):
+        async with tabs:
+            return await fetch_page_in_tab_async(page.context, url)
+
+    texts = []
+    fetched_until = 1
+    while page_count > fetched_until:
+        urls = [f"{base_url}?page={number}" for number in range(fetched_until + 1, page_count + 1)]
+        logger.info(f"分割記事ページを取得: {base_url} ({fetched_until + 1}〜{page_count}ページ)")
+        if fetcher is not None:
+            results = await asyncio.to_thread(fetch_pages_static, fetcher, urls)
+        else:
+            results = [None] * len(urls)
+        missing = [index for index, result in enumerate(results) if result is None]
+        for index, result in zip(missing, await asyncio.gather(*(fetch_in_tab(urls[i]) for i in missing))):
+            results[index] = result
+
+        for url, result in zip(urls, results):
+            if result is None:
+                logger.info(f"分割記事ページが存在しません: {url}")
+                return texts
+            paragraphs, last_page = result
+            texts.extend(paragraphs)
+            page_count = max(page_count, last_page)
+        fetched_until += len(urls)
+    return texts
+
+
+async def resolve_article_url_async(page, url):
+    """resolve_article_url の非同期版"""
+    if not is_pickup_url(url):
+        return url
+    article_url = await asyncio.to_thread(cached_article_url, url)
+    if article_url:
+        return article_url
+    try:
+        async with get_rate_limiter().request_async(url) as permit:
+            with metrics.timer("resolve"):
+                response = await page.request.get(url)
+            permit.record(response.status)
+            if not response.ok:
+                logger.warning(f"ピックアップページの取得に失敗しました: {url} - ステータス {response.status}")
+                return None
+            html = await response.text()
+    except Exception as e:
+        # 呼び出し元で描画したピックアップページのリンクをクリックする経路に任せる
+        logger.warning(f"ピックアップページの取得に失敗しました: {url} - {e}")
+        return None
+    article_url = pickup_target_url(url, parse_html(html))
+    if article_url == url:
+        return None
+    await asyncio.to_thread(remember_article_url, url, article_url)
+    return article_url
+
+
+@async_retry(tries=3, delay=5, backoff=2)
+async def scrape_article_page_async(page, url, pagination_fetcher=None):
+    """
+    個別の記事ページをスクレイピングする関数 (非同期版)。
+    プールのページは記事ごとに新しく遷移するので、一覧ページへ戻る必要はない。
+    """
+    try:
+        # 記事本体のURLを先に求めて直接開き、ピックアップページの描画とクリックによる遷移を省く
+        article_url = await resolve_article_url_async(page, url)
+        await goto_async(page, article_url or url)
+
+        if article_url is None:
+            pickup_link = page.locator(yahoo_SELECTORS["navigation"]["pickup_link"]).first
+            if pickup_link and await pickup_link.is_visible():
+                await click_and_wait_async(page, pickup_link)
+
+        with metrics.timer("paginate"):
+            additional_texts = await scrape_paginated_content_async(page, pagination_fetcher)
+        await scrape_and_save_article_async(page, url, additional_texts)
+
+    except Exception as e:
+        metrics.inc("scraper_articles_total", result="failed", path="browser")
+        logger.error(f"記事ページの処理中にエラー発生: {url} - {e}")
+
+
+async def _scrape_article_with_pool(pool, slots, url, fetcher=None, pagination_fetcher=None):
+    """
+    記事を1件処理する。fetcher が指定された場合はHTTP高速経路を先に試し、
+    取得できなかった場合のみプールからページを借りる。
+    """
+    async with slots:
+        path = "browser"
+        try:
+            result = None
+            if fetcher is not None:
+                path = "http"
+                result = await asyncio.to_thread(scrape_article_static, fetcher, url)
+                if result:
+                    await asyncio.to_thread(save_article, None, url, *result, path)
+                else:
+                    logger.info(f"ブラウザでの取得にフォールバックします: {url}")
+                    path = "browser"
+            if not result:
+                async with pool.acquire() as page:
+                    await scrape_article_page_async(page, url, pagination_fetcher)
+        except Exception as e:
+            metrics.inc("scraper_articles_total", result="failed", path=path)
+            logger.error(f"記事ページの処理中にエラー発生: {url} - {e}")
+
+
+async def scrape_article_list_page_async(page, pool, max_pages=100, fetcher=None, pagination_fetcher=None):
+    """
+    記事一覧ページを巡回し、各記事ページをページプールで並行処理する関数。
+    同時に処理する記事数はプールのサイズまでに制限する。
+    """
+    topics_url = SITEURL["yahoo_link"]
+    current_page = 1
+    tasks = []
+    slots = asyncio.Semaphore(pool.size)
+
+    try:
+        while current_page <= max_pages:
+            url = f"{topics_url}?page={current_page}"
+            logger.info(f"ページ {current_page} ({url}) をスクレイピング開始")
+
+            response = await goto_async(page, url)
+
+            if response and response.status != 200:
+                logger.info(f"ページが存在しません: {url}")
+                break
+            elif response is None:
+                logger.error(f"ページへのリクエストが失敗しました: {url}")
+                break
+
+            links = await get_article_links_async(page)
+            if not links:
+                logger.info("記事一覧ページに記事へのリンクがありません。")
+                break
+            # 保存済みの記事はブラウザで開く前に除外する (初回のみ保存済みURLの読み込みが走るので別スレッドで行う)
+            seen_filter = await asyncio.to_thread(get_seen_url_filter, ARTICLE_COLLECTION)
+            links = await asyncio.to_thread(untracked_links, seen_filter.filter(links))
+            await asyncio.to_thread(prefetch_pickup_urls, links)
+
+            tasks.extend(asyncio.create_task(_scrape_article_with_pool(pool, slots, link, fetcher, pagination_fetcher))
+                         for link in links)
+
+            current_page += 1
+
+    except Exception as e:
+        logger.critical(f"致命的なエラー発生: {e}")
+    finally:
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        logger.info(f"スクレイピング完了 (記事 {len(tasks)}件)")
+
+
+async def scrape_yahoo_news_async(headless=False, max_pages=100, concurrency=None):
+    """
+    Yahoo!ニュースのスクレイピングを async_playwright で並行実行するメイン関数
+
+    Args:
+        headless: ヘッドレスモードで起動するかどうか
+        max_pages: スクレイピングする記事一覧ページの最大数
+        concurrency: 同時に処理する記事ページ数。None の場合は config.CRAWL_CONCURRENCY
+    """
+    concurrency = concurrency or CRAWL_CONCURRENCY
+    try:
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=headless)
+            context = await browser.new_context(user_agent=get_random_user_agent())
+            # コンテキスト単位で設定し、プール内の全ページに遮断を適用する
+            blocker = ResourceBlocker() if BLOCK_RESOURCES else None
+            if blocker:
+                await blocker.install_async(context)
+            fetcher = HttpFetcher(pool_size=concurrency) if FETCH_MODE == "http" else None
+            pagination_fetcher = fetcher or (HttpFetcher(pool_size=concurrency) if PAGINATION_FETCH_MODE == "http"
+                                             else None)
+            page = await context.new_page()
+            await stealth_async(page)
+            pool = PagePool(context, concurrency)
+            try:
+                await goto_async(page, SITEURL["yahoo_top"])
+                logger.info("Yahoo!トップページへアクセス")
+
+                topics_page_link = page.locator(yahoo_SELECTORS["navigation"]["topics_page_link"]).first
+                if topics_page_link and await topics_page_link.is_visible():
+                    await click_and_wait_async(page, topics_page_link)
+                else:
+                    logger.error("トピックスページへのリンクが見つかりません")
+                    return
+
+                logger.info(f"トピックスページへ遷移 (並行数: {concurrency})")
+
+                await pool.open()
+                await scrape_article_list_page_async(page, pool, max_pages, fetcher, pagination_fetcher)
+
+            finally:
+                if blocker:
+                    blocker.log_summary()
+                if pagination_fetcher:
+                    pagination_fetcher.close()
+                if fetcher and fetcher is not pagination_fetcher:
+                    fetcher.close()
+                await asyncio.to_thread(database.flush_bulk_writers)
+                await asyncio.to_thread(selector_utils.stats.save)
+                await asyncio.to_thread(selector_utils.snapshots.flush)
+                await pool.close()
+                await page.close()
+                await context.close()
+                await browser.close()
+
+    except Exception as e:
+        logger.critical(f"致命的なエラー: {e}")
+
+
+def run_scrape_yahoo_news_async(headless=False, max_pages=100, concurrency=None):
+    """同期コードから非同期クローラを実行するためのエントリポイント"""
+    asyncio.run(scrape_yahoo_news_async(headless=headless, max_pages=max_pages, concurrency=concurrency))
+
+
+if __name__ == "__main__":
+    run_scrape_yahoo_news_async(headless=True, max_pages=40)
@@ -0,0 +1,42 @@
+from datetime import date, datetime
+import pytest
+from utils import aggregations, database
+from utils.aggregations import article_counts, author_counts
+from utils.database import apply_rollups, rebuild_rollups
+
+ARTICLES = [
+    {"url": "https://example.com/a", "published_at": datetime(2025, 1, 15, 9, 30), "author": "配信元A"},
+    {"url": "https://example.com/b", "published_at": datetime(2025, 1, 15, 10, 30), "author": "配信元B"},
+    {"url": "https://example.com/c", "published_at": datetime(2025, 1, 16, 8, 0), "author": "配信元A"},
+]
+START, END = date(2025, 1, 14), date(2025, 1, 16)
+
+
+@pytest.fixture
+def db(monkeypatch):
+    mongomock = pytest.importorskip("mongomock")
+    db = mongomock.MongoClient().db
+    monkeypatch.setattr(database, "get_database", lambda: db)
+    monkeypatch.setattr(aggregations, "get_database", lambda: db)
+    monkeypatch.setattr(aggregations, "_indexed_collections", set())
+    db.articles.insert_many([dict(article) for article in ARTICLES])
+    return db
+
+
+def test_counts_use_pipeline_until_rollups_are_backfilled(db):
+    # ロールアップを有効にした後に書き込んだ記事だけがロールアップに数えられている状態
+    new_article = {"url": "https://example.com/d", "published_at": datetime(2025, 1, 16, 9, 0), "author": "配信元B"}
+    db.articles.insert_one(dict(new_article))
+    apply_rollups("articles", {}, [new_article])
+
+    expected = [{"bucket": "2025-01-15", "count": 2}, {"bucket": "2025-01-16", "count": 2}]
+    assert article_counts("articles", START, END, use_rollups=True) == expected
+    assert author_counts("articles", START, END, use_rollups=True) == [{"author": "配信元A", "count": 2},
+                                                                        {"author": "配信元B", "count": 2}]
+
+    # バックフィル後はロールアップから読み、集計パイプラインと同じ結果になる
+    rebuild_rollups("articles")
+    db.articles.delete_many({})
+    assert article_counts("articles", START, END, use_rollups=True) == expected
+    assert author_counts("articles", START, END, use_rollups=True) == [{"author": "配信元A", "count": 2},
+                                                                        {"author": "配信元B", "count": 2}]
@@ -0,0 +1,93 @@
+import threading
+import pytest
+from utils.browser_service import BrowserService
+
+
+class FakeContext:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.connected = True
+        self.contexts = []
+
+    def is_connected(self):
+        return self.connected
+
+    def new_context(self, **kwargs):
+        context = FakeContext()
+        self.contexts.append(context)
+        return context
+
+    def close(self):
+        self.connected = False
+
+
+class FakeBrowserService(BrowserService):
+    """Chromium の代わりに FakeBrowser を起動する BrowserService"""
+
+    def __init__(self, **kwargs):
+        super().__init__(health_check_interval=0.05, **kwargs)
+        self.browsers = []
+
+    def _launch(self):
+        self._browser = FakeBrowser()
+        self.browsers.append(self._browser)
+        self._runs_since_launch = 0
+        self.launches += 1
+
+
+@pytest.fixture
+def service():
+    service = FakeBrowserService(recycle_runs=3, recycle_hours=0)
+    yield service
+    service.stop()
+
+
+def test_runs_share_a_browser_with_fresh_contexts(service):
+    threads = []
+
+    def job(context, value):
+        threads.append(threading.current_thread().name)
+        return context, value
+
+    results = [service.run(job, i).result(timeout=5) for i in range(3)]
+
+    assert service.launches == 1
+    assert [value for _, value in results] == [0, 1, 2]
+    assert len({id(context) for context, _ in results}) == 3
+    assert all(context.closed for context, _ in results)
+    assert set(threads) == {"BrowserService"}
+
+
+def test_recycles_after_runs_and_restarts_crashed_browser(service):
+    for _ in range(4):
+        service.run(lambda context: None).result(timeout=5)
+    # 3回実行したところで起動し直す
+    assert service.launches == 2
+
+    # 待機中にクラッシュしたブラウザはヘルスチェックで起動し直す
+    service.browsers[-1].connected = False
+    for _ in range(100):
+        if service.launches == 3:
+            break
+        threading.Event().wait(0.02)
+    assert service.launches == 3
+
+
+def test_exception_is_returned_and_context_closed(service):
+    contexts = []
+
+    def failing(context):
+        contexts.append(context)
+        raise ValueError("失敗")
+
+    with pytest.raises(ValueError):
+        service.run(failing).result(timeout=5)
+    assert contexts[0].closed
+    assert service.run(lambda context: "ok").result(timeout=5) == "ok"
@@ -0,0 +1,37 @@
+import time
+import requests
+from benchmarks.crawl_archive import CrawlArchive, ReplayServer
+
+ARTICLE_HTML = '<html><body><a href="https://news.yahoo.co.jp/articles/abc?page=2">次へ</a></body></html>'
+
+
+def make_archive(directory):
+    archive = CrawlArchive(directory)
+    archive.add("https://news.yahoo.co.jp/articles/abc?page=1", 200, "text/html; charset=utf-8",
+                ARTICLE_HTML.encode("utf-8"))
+    archive.add("https://example.com/other", 200, "text/html", b"ignored")  # 別のオリジンは記録しない
+    archive.save()
+    return directory
+
+
+def test_archive_round_trip(tmp_path):
+    archive = CrawlArchive(make_archive(tmp_path))
+
+    assert len(archive) == 1
+    status, content_type, body = archive.get("/articles/abc?page=1")
+    assert status == 200
+    assert body.decode("utf-8") == ARTICLE_HTML
+
+
+def test_replay_server_rewrites_origin_and_applies_latency(tmp_path):
+    with ReplayServer(make_archive(tmp_path), latency=0.05, jitter=0.01, seed=0) as server:
+        start = time.perf_counter()
+        response = requests.get(server.url_for("https://news.yahoo.co.jp/articles/abc?page=1"), timeout=5)
+        elapsed = time.perf_counter() - start
+        missing = requests.get(f"{server.base_url}/articles/abc?page=2", timeout=5)
+
+    assert response.status_code == 200
+    assert f'href="{server.base_url}/articles/abc?page=2"' in response.text
+    assert elapsed >= 0.04
+    assert missing.status_code == 404
+    assert (server.requests, server.not_found) == (2, 1)
@@ -0,0 +1,113 @@
+import csv
+import gzip
+import io
+import json
+from datetime import datetime
+import pytest
+from bson import ObjectId
+from utils import data_converter
+from utils.data_converter import _TextExporter, convert_to_csv, convert_to_json, export_collection
+
+FIELDS = ["url", "title", "published_at"]
+
+
+def rows(start, count):
+    return [{"url": f"https://example.com/{i}", "title": f"記事{i}", "published_at": datetime(2025, 1, 15, 9, i)}
+            for i in range(start, start + count)]
+
+
+def test_text_exporter_resumes_from_checkpoint_offset(tmp_path):
+    path = tmp_path / "articles.csv.gz"
+    exporter = _TextExporter(path, "csv", FIELDS, compression="gzip")
+    offset = exporter.write_batch(rows(0, 2))
+    exporter.write_batch(rows(2, 2))  # チェックポイントに記録される前に中断したバッチ
+    exporter.close()
+
+    exporter = _TextExporter(path, "csv", FIELDS, compression="gzip", offset=offset)
+    exporter.write_batch(rows(2, 3))
+    exporter.close()
+
+    with gzip.open(path, "rt", encoding="utf-8", newline="") as f:
+        exported = list(csv.DictReader(f))
+    assert [row["title"] for row in exported] == [f"記事{i}" for i in range(5)]
+    assert exported[0]["published_at"] == "2025-01-15T09:00:00"
+
+
+def test_text_exporter_writes_ndjson(tmp_path):
+    path = tmp_path / "articles.ndjson"
+    exporter = _TextExporter(path, "ndjson", FIELDS)
+    exporter.write_batch(rows(0, 3))
+    exporter.close()
+
+    lines = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert [line["url"] for line in lines] == [f"https://example.com/{i}" for i in range(3)]
+
+
+def test_convert_to_csv_and_json_accept_iterables(tmp_path):
+    csv_path, json_path = tmp_path / "data.csv", tmp_path / "data.json"
+    convert_to_csv(iter(rows(0, 2)), csv_path)
+    convert_to_json(iter(rows(0, 2)), json_path)
+
+    assert list(csv.DictReader(io.StringIO(csv_path.read_text(encoding="utf-8"))))[1]["title"] == "記事1"
+    assert json.loads(json_path.read_text(encoding="utf-8"))[1]["published_at"] == "2025-01-15T09:01:00"
+
+
+class Killed(BaseException):
+    """プロセスの強制終了の代わり (finally 以外の後片付けを行わせない)"""
+
+
+class FakeCursor:
+    def __init__(self, docs, kill_after=None):
+        self.docs = docs
+        self.kill_after = kill_after
+
+    def sort(self, *args):
+        return self
+
+    def batch_size(self, size):
+        return self
+
+    def close(self):
+        pass
+
+    def __iter__(self):
+        for i, doc in enumerate(self.docs):
+            if i == self.kill_after:
+                raise Killed()
+            yield doc
+
+
+class FakeCollection:
+    def __init__(self, docs):
+        self.docs = docs
+        self.kill_after = None
+
+    def find(self, query, projection):
+        condition = query.get("_id", {})
+        docs = [doc for doc in self.docs if "$gt" not in condition or doc["_id"] > condition["$gt"]]
+        return FakeCursor(docs, self.kill_after)
+
+
+def test_parquet_export_resumes_after_kill(tmp_path, monkeypatch):
+    pq = pytest.importorskip("pyarrow.parquet")
+    docs = [{"_id": ObjectId(), **row} for row in rows(0, 7)]
+    collection = FakeCollection(docs)
+    monkeypatch.setattr(data_converter, "get_database", lambda: {"articles": collection})
+    path = str(tmp_path / "articles.parquet")
+    options = dict(fields=FIELDS, batch_size=2, parquet_file_rows=4)
+
+    # 2件ずつのバッチで、6件目を読み込んだところで強制終了する (2つ目のファイルは閉じられないまま残る)
+    with monkeypatch.context() as m:
+        m.setattr(data_converter._ParquetExporter, "close", lambda self: None)
+        collection.kill_after = 5
+        with pytest.raises(Killed):
+            export_collection("articles", path, "parquet", **options)
+    assert json.loads((tmp_path / "articles.parquet.checkpoint.json").read_text())["rows"] == 4
+
+    collection.kill_after = None
+    result = export_collection("articles", path, "parquet", **options)
+
+    assert result["rows"] == 7
+    files = [path, str(tmp_path / "articles.1.parquet")]
+    titles = [title for name in files for title in pq.read_table(name).column("title").to_pylist()]
+    assert titles == [f"記事{i}" for i in range(7)]
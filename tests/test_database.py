@@ -0,0 +1,269 @@
+import time
+from datetime import datetime
+import pytest
+from pymongo.errors import BulkWriteError
+from utils import database
+from utils.database import (ROLLUP_UNITS, BulkWriter, apply_rollups, ensure_ttl_index, get_rollups, rebuild_rollups,
+                            rollup_keys, save_data, update_data)
+
+START = datetime(2025, 1, 1)
+END = datetime(2025, 2, 1)
+
+
+class FakeDatabase:
+    def __init__(self, collection):
+        self.collection = collection
+        self.commands = []
+
+    def command(self, command):
+        self.commands.append(command)
+        self.collection.indexes[command["index"]["name"]]["expireAfterSeconds"] = command["index"]["expireAfterSeconds"]
+
+
+class FakeIndexCollection:
+    name = "states"
+
+    def __init__(self, indexes=None):
+        self.indexes = {"_id_": {"key": [("_id", 1)]}, **(indexes or {})}
+        self.database = FakeDatabase(self)
+        self.created = []
+        self.dropped = []
+
+    def index_information(self):
+        return {name: dict(info) for name, info in self.indexes.items()}
+
+    def create_index(self, keys, expireAfterSeconds=None, background=False):
+        self.created.append((keys, expireAfterSeconds))
+        self.indexes[f"{keys[0][0]}_1"] = {"key": keys, "expireAfterSeconds": expireAfterSeconds}
+
+    def drop_index(self, name):
+        self.dropped.append(name)
+        del self.indexes[name]
+
+
+def test_ttl_index_is_created_when_missing():
+    collection = FakeIndexCollection()
+    ensure_ttl_index(collection, "checked_at", 86400)
+    assert collection.created == [([("checked_at", 1)], 86400)]
+
+
+def test_ttl_index_with_same_period_is_left_alone():
+    collection = FakeIndexCollection({"checked_at_1": {"key": [("checked_at", 1)], "expireAfterSeconds": 86400}})
+    ensure_ttl_index(collection, "checked_at", 86400)
+    assert collection.created == [] and collection.database.commands == []
+
+
+def test_changed_ttl_is_applied_with_coll_mod():
+    # create_index では IndexOptionsConflict になるため、既存のインデックスの保持期間だけを変更する
+    collection = FakeIndexCollection({"checked_at_1": {"key": [("checked_at", 1)], "expireAfterSeconds": 86400}})
+    ensure_ttl_index(collection, "checked_at", 3 * 86400)
+    assert collection.database.commands == [
+        {"collMod": "states", "index": {"name": "checked_at_1", "expireAfterSeconds": 3 * 86400}}]
+    assert collection.created == []
+    assert collection.indexes["checked_at_1"]["expireAfterSeconds"] == 3 * 86400
+
+
+def test_plain_index_is_recreated_as_ttl_index():
+    collection = FakeIndexCollection({"checked_at_1": {"key": [("checked_at", 1)]}})
+    ensure_ttl_index(collection, "checked_at", 86400)
+    assert collection.dropped == ["checked_at_1"]
+    assert collection.created == [([("checked_at", 1)], 86400)]
+
+
+def article(url, hour, author="配信元A", day=15):
+    return {"url": f"https://example.com/{url}", "title": url, "published_at": datetime(2025, 1, day, hour, 30),
+            "author": author}
+
+
+def all_rollups():
+    return {unit: sorted(get_rollups("articles", unit, START, END), key=lambda row: (row["bucket"], str(row["key"])))
+            for unit in ROLLUP_UNITS}
+
+
+@pytest.fixture
+def db(monkeypatch):
+    mongomock = pytest.importorskip("mongomock")
+    db = mongomock.MongoClient().db
+    monkeypatch.setattr(database, "get_database", lambda: db)
+    monkeypatch.setattr(database, "ROLLUP_ENABLED", True)
+    return db
+
+
+def test_rollup_keys():
+    assert rollup_keys(article("a", 9)) == [("day", "2025-01-15", None), ("hour", "2025-01-15 09:00", None),
+                                            ("author", "2025-01-15", "配信元A")]
+    # 公開日時の無い記事は数えない
+    assert rollup_keys({"url": "https://example.com/a", "published_at": None}) == []
+    assert rollup_keys(None) == []
+
+
+def test_apply_rollups_moves_changed_articles(db):
+    apply_rollups("articles", {}, [article("a", 9), article("b", 10)])
+    # 公開日時が変わった記事は変更前のバケットから差し引く
+    apply_rollups("articles", {"https://example.com/b": article("b", 10)}, [article("b", 11, author="配信元B")])
+    rollups = all_rollups()
+    assert rollups["day"] == [{"bucket": "2025-01-15", "key": None, "count": 2}]
+    assert [(row["bucket"], row["count"]) for row in rollups["hour"]] == [("2025-01-15 09:00", 1),
+                                                                         ("2025-01-15 11:00", 1)]
+    assert sorted(row["key"] for row in rollups["author"]) == ["配信元A", "配信元B"]
+
+
+def test_save_and_update_data_keep_rollups_in_sync_with_rebuild(db):
+    save_data(article("a", 9), "articles")
+    save_data(article("b", 10), "articles")
+    update_data({"url": "https://example.com/b"}, {"$set": {"published_at": datetime(2025, 1, 16, 8, 0)}}, "articles")
+    update_data({"url": "https://example.com/c"}, {"$set": {"published_at": datetime(2025, 1, 16, 9, 0)}},
+                "articles", upsert=True)
+    # 内容の変わらない更新では数え直さない
+    update_data({"url": "https://example.com/a"}, {"$set": {"title": "a"}}, "articles")
+
+    incremental = all_rollups()
+    assert [(row["bucket"], row["count"]) for row in incremental["day"]] == [("2025-01-15", 1), ("2025-01-16", 2)]
+    rebuild_rollups("articles")
+    assert all_rollups() == incremental
+
+
+class FakeBulkResult:
+    def __init__(self, upserted_count, matched_count, modified_count):
+        self.upserted_count = upserted_count
+        self.matched_count = matched_count
+        self.modified_count = modified_count
+
+
+class FakeBulkCollection:
+    """url ごとのドキュメントを保持し、bulk_write の upsert を再現するコレクション"""
+
+    def __init__(self):
+        self.docs = {}
+        self.batches = []
+        self.fail_urls = set()  # 書き込みエラーにするURL
+        self.error = None  # bulk_write 全体を失敗させる例外
+
+    def create_index(self, *args, **kwargs):
+        pass
+
+    def bulk_write(self, operations, ordered=True):
+        if self.error is not None:
+            raise self.error
+        self.batches.append([operation._filter["url"] for operation in operations])
+        upserted = matched = modified = 0
+        errors = []
+        for index, operation in enumerate(operations):
+            url, fields = operation._filter["url"], operation._doc["$set"]
+            if url in self.fail_urls:
+                errors.append({"index": index, "errmsg": "document too large"})
+            elif url not in self.docs:
+                self.docs[url] = dict(fields)
+                upserted += 1
+            else:
+                matched += 1
+                if self.docs[url] != {**self.docs[url], **fields}:
+                    self.docs[url].update(fields)
+                    modified += 1
+        if errors:
+            raise BulkWriteError({"nUpserted": upserted, "nMatched": matched, "nModified": modified,
+                                  "writeErrors": errors})
+        return FakeBulkResult(upserted, matched, modified)
+
+
+@pytest.fixture
+def bulk_collection(monkeypatch):
+    collection = FakeBulkCollection()
+    monkeypatch.setattr(database, "get_database", lambda: {"articles": collection})
+    monkeypatch.setattr(database, "ROLLUP_ENABLED", False)
+    return collection
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_bulk_writer_buffers_until_flush(bulk_collection):
+    writer = BulkWriter("articles", batch_size=10, flush_interval=60)
+    try:
+        assert writer.add(article("a", 9))
+        assert writer.add(article("a", 10))  # 同じURLはバッチ内で最新のものだけ残す
+        assert not writer.add({"title": "URL の無い記事"})
+        assert bulk_collection.batches == []
+
+        assert writer.flush() == {"inserted": 1, "updated": 0, "unchanged": 0, "failed": 0}
+        assert bulk_collection.batches == [["https://example.com/a"]]
+        assert bulk_collection.docs["https://example.com/a"]["published_at"].hour == 10
+        assert writer.flush() == {"inserted": 0, "updated": 0, "unchanged": 0, "failed": 0}
+    finally:
+        writer.close()
+
+
+def test_bulk_writer_flushes_when_batch_is_full(bulk_collection):
+    writer = BulkWriter("articles", batch_size=2, flush_interval=60)
+    try:
+        writer.add(article("a", 9))
+        writer.add(article("b", 9))
+        assert wait_for(lambda: writer.stats["inserted"] == 2)
+        assert bulk_collection.batches == [["https://example.com/a", "https://example.com/b"]]
+    finally:
+        writer.close()
+
+
+def test_bulk_writer_flushes_remaining_documents_on_close(bulk_collection):
+    writer = BulkWriter("articles", batch_size=10, flush_interval=60)
+    writer.add(article("a", 9))
+    writer.close()
+    assert list(bulk_collection.docs) == ["https://example.com/a"]
+
+
+def test_bulk_writer_counts_each_result(bulk_collection):
+    writer = BulkWriter("articles", batch_size=10, flush_interval=60)
+    try:
+        writer.add(article("a", 9))
+        writer.add(article("b", 9))
+        writer.flush()
+
+        bulk_collection.fail_urls = {"https://example.com/d"}
+        writer.add(article("a", 9))  # 内容が同じ記事
+        writer.add(article("b", 11))  # 内容が変わった記事
+        writer.add(article("c", 9))
+        writer.add(article("d", 9))
+        assert writer.flush() == {"inserted": 1, "updated": 1, "unchanged": 1, "failed": 1}
+        assert writer.stats == {"inserted": 3, "updated": 1, "unchanged": 1, "failed": 1}
+    finally:
+        writer.close()
+
+
+def test_bulk_writer_keeps_buffer_when_write_fails(bulk_collection):
+    writer = BulkWriter("articles", batch_size=10, flush_interval=60)
+    try:
+        writer.add(article("a", 9))
+        bulk_collection.error = ConnectionError("connection refused")
+        assert writer.flush() == {"inserted": 0, "updated": 0, "unchanged": 0, "failed": 0}
+
+        # 次回のフラッシュで再試行する
+        bulk_collection.error = None
+        assert writer.flush()["inserted"] == 1
+    finally:
+        writer.close()
+
+
+def test_bulk_writer_runs_before_write_hooks(bulk_collection):
+    calls = []
+
+    def add_source(collection_name, documents):
+        calls.append((collection_name, [doc["url"] for doc in documents]))
+        for doc in documents:
+            doc["source"] = "yahoo"
+
+    def broken_hook(collection_name, documents):
+        raise RuntimeError("hook failed")
+
+    writer = BulkWriter("articles", batch_size=10, flush_interval=60, before_write=[broken_hook, add_source])
+    try:
+        writer.add(article("a", 9))
+        # 失敗したフックがあっても記事は保存し、フックで書き換えた内容を保存する
+        assert writer.flush()["inserted"] == 1
+        assert calls == [("articles", ["https://example.com/a"])]
+        assert bulk_collection.docs["https://example.com/a"]["source"] == "yahoo"
+    finally:
+        writer.close()
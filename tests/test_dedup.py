@@ -0,0 +1,38 @@
+import numpy as np
+from utils.dedup import DuplicateIndex
+
+ARTICLE = ("政府は15日、新たな経済対策を発表した。対象は中小企業で、総額は3兆円規模となる見通し。"
+           "関係者によると、詳細は来週にも公表される。野党は財源の説明が不十分だと批判している。") * 3
+
+
+def test_check_detects_near_duplicate():
+    index = DuplicateIndex()
+
+    assert index.check("https://example.com/a", ARTICLE) is None
+    duplicate = index.check("https://example.com/b", ARTICLE.replace("来週にも", "来週"))
+
+    assert duplicate[0] == "https://example.com/a"
+    assert duplicate[1] >= index.threshold
+    # 重複の記事は索引に登録しない
+    assert len(index) == 1
+
+
+def test_check_ignores_different_article_and_same_url():
+    index = DuplicateIndex()
+    index.check("https://example.com/a", ARTICLE)
+
+    assert index.check("https://example.com/c", "株価は続伸し、日経平均は3日連続で上昇した。" * 5) is None
+    # 再取得した記事は自分自身の重複にならない
+    assert index.check("https://example.com/a", ARTICLE) is None
+
+
+def test_signatures_matches_single_signature():
+    index = DuplicateIndex()
+    texts = [ARTICLE, "", "短い", ARTICLE[:100], ARTICLE[50:]]
+
+    for text, signature in zip(texts, index.signatures(texts)):
+        single = index.signature(text)
+        if single is None:
+            assert signature is None
+        else:
+            assert np.array_equal(signature, single)
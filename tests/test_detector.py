@@ -0,0 +1,26 @@
+from change_detection.detector import diff_field_digests, format_changes
+from change_detection.store import field_digests, text_digest
+
+
+def test_diff_field_digests_reports_changed_paragraphs():
+    previous = field_digests({"title": ["見出し"], "paragraphs": ["段落1", "段落2", "段落3"]})
+    current = field_digests({"title": ["見出し"], "paragraphs": ["段落1", "段落2を修正", "段落3", "段落4"]})
+
+    changes = diff_field_digests(previous, current)
+
+    assert changes == {"paragraphs": {"changed": [1], "added": [3], "removed": []}}
+    assert format_changes(changes) == "paragraphs (変更: 2 / 追加: 4)"
+
+
+def test_diff_field_digests_detects_inserted_and_removed_paragraphs():
+    previous = field_digests({"paragraphs": ["段落1", "段落2", "段落3"]})
+    current = field_digests({"paragraphs": ["段落0", "段落1", "段落3"]})
+
+    assert diff_field_digests(previous, current) == {"paragraphs": {"changed": [], "added": [0], "removed": [1]}}
+
+
+def test_diff_field_digests_accepts_legacy_selector_digests():
+    previous = {"title": text_digest(["見出し"]), "paragraphs": text_digest(["段落1"])}
+    current = field_digests({"title": ["見出し"], "paragraphs": ["段落1を修正"]})
+
+    assert diff_field_digests(previous, current) == {"paragraphs": {"changed": [0], "added": [], "removed": []}}
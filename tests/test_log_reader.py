@@ -0,0 +1,70 @@
+from loggings.reader import tail, read_since, parse_records, list_levels_and_modules
+
+LINES = [
+    "2025-01-15 09:00:00 | INFO | yahoo_news:scrape_yahoo_news:10 | 開始",
+    "2025-01-15 09:00:01 | DEBUG | database:flush:20 | 一括書き込み",
+    "2025-01-15 09:00:02 | ERROR | yahoo_news:scrape_article_page:30 | 失敗しました",
+    "Traceback (most recent call last):",
+    "  File \"yahoo_news.py\", line 30",
+    "2025-01-15 09:00:03 | INFO | database:flush:20 | 一括書き込み完了",
+]
+
+
+def write_log(path, lines):
+    path.write_text("".join(f"{line}\n" for line in lines), encoding="utf-8")
+
+
+def test_parse_records_joins_continuation_lines():
+    records = parse_records("\n".join(LINES).encode("utf-8"))
+
+    assert [r.level for r in records] == ["INFO", "DEBUG", "ERROR", "INFO"]
+    assert records[2].module == "yahoo_news"
+    assert records[2].line == 30
+    assert records[2].message.splitlines() == ["失敗しました", LINES[3], LINES[4]]
+    assert records[2].format().splitlines()[0] == LINES[2]
+
+
+def test_tail_returns_last_matching_records(tmp_path):
+    path = tmp_path / "application.log"
+    write_log(path, LINES * 500)
+
+    records, end = tail(path, n=3, levels={"INFO"}, modules={"database"})
+
+    assert end == path.stat().st_size
+    assert len(records) == 3
+    assert all(r.level == "INFO" and r.module == "database" for r in records)
+    assert records[-1].format() == LINES[-1]
+
+
+def test_tail_limits_bytes_read(tmp_path):
+    path = tmp_path / "application.log"
+    write_log(path, LINES * 5000)
+
+    records, _ = tail(path, n=100000, max_bytes=4096)
+
+    assert 0 < len(records) < 100
+
+
+def test_read_since_returns_only_appended_records(tmp_path):
+    path = tmp_path / "application.log"
+    write_log(path, LINES[:2])
+    _, offset = tail(path)
+
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(LINES[5] + "\n" + "2025-01-15 09:00:04 | INFO | data")  # 最後の行は書き込み途中
+    records, offset = read_since(path, offset)
+
+    assert [r.format() for r in records] == [LINES[5]]
+    assert read_since(path, offset)[0] == []
+
+    # ローテーションでファイルが小さくなった場合は先頭から読み直す
+    write_log(path, LINES[:1])
+    records, _ = read_since(path, offset)
+    assert [r.format() for r in records] == [LINES[0]]
+
+
+def test_list_levels_and_modules():
+    levels, modules = list_levels_and_modules(parse_records("\n".join(LINES).encode("utf-8")))
+
+    assert levels == ["DEBUG", "ERROR", "INFO"]
+    assert modules == ["database", "yahoo_news"]
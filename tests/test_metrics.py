@@ -0,0 +1,51 @@
+from utils.metrics import MetricsRegistry, STAGE_SECONDS, run_summary, format_run_summary
+
+
+def test_render_prometheus_text():
+    registry = MetricsRegistry(enabled=True, buckets=(0.1, 1.0))
+    registry.inc("scraper_articles_total", result="saved", path="http")
+    registry.inc("scraper_articles_total", 2, result="saved", path="http")
+    registry.observe(STAGE_SECONDS, 0.05, stage="goto")
+    registry.observe(STAGE_SECONDS, 0.5, stage="goto")
+    registry.observe(STAGE_SECONDS, 5.0, stage="goto")
+
+    lines = registry.render().splitlines()
+
+    assert "# TYPE scraper_articles_total counter" in lines
+    assert 'scraper_articles_total{path="http",result="saved"} 3' in lines
+    assert "# TYPE scraper_stage_seconds histogram" in lines
+    assert 'scraper_stage_seconds_bucket{stage="goto",le="0.1"} 1' in lines
+    assert 'scraper_stage_seconds_bucket{stage="goto",le="1.0"} 2' in lines
+    assert 'scraper_stage_seconds_bucket{stage="goto",le="+Inf"} 3' in lines
+    assert 'scraper_stage_seconds_count{stage="goto"} 3' in lines
+
+
+def test_run_summary_reports_only_this_run():
+    registry = MetricsRegistry(enabled=True)
+    registry.inc("scraper_changes_detected_total")
+    with registry.timer("goto"):
+        pass
+    before = registry.snapshot()
+    for _ in range(2):
+        with registry.timer("goto"):
+            pass
+    with registry.timer("extract"):
+        pass
+    registry.inc("scraper_articles_total", result="saved")
+
+    summary = run_summary(before, registry.snapshot())
+
+    assert {stage: s["count"] for stage, s in summary["stages"].items()} == {"goto": 2, "extract": 1}
+    assert summary["counters"] == {'scraper_articles_total{result="saved"}': 1}
+    assert "goto: 2回" in format_run_summary(summary)
+
+
+def test_disabled_registry_records_nothing():
+    registry = MetricsRegistry(enabled=False)
+    with registry.timer("goto"):
+        pass
+    registry.inc("scraper_articles_total")
+
+    assert registry.timer("goto") is registry.timer("extract")
+    assert registry.snapshot() == {"counters": {}, "stages": {}}
+    assert registry.render() == "\n"
@@ -0,0 +1,52 @@
+from pathlib import Path
+import pytest
+from bs4 import BeautifulSoup
+from utils.parser import (clean_text, clean_texts, remove_html_tags, decode_html_entities,
+                          normalize_text, remove_extra_whitespaces)
+
+FIXTURE_DIR = Path(__file__).parent / "yahoo" / "fixtures"
+
+
+def legacy_clean_text(text):
+    """BeautifulSoup を使う従来のクレンジング処理"""
+    if not text:
+        return ""
+    text = remove_html_tags(text)
+    text = decode_html_entities(text)
+    text = normalize_text(text)
+    return remove_extra_whitespaces(text)
+
+
+def fixture_fragments():
+    """フィクスチャHTMLの各要素の innerHTML をテスト用の断片として使う"""
+    fragments = []
+    for path in sorted(FIXTURE_DIR.glob("*.html")):
+        soup = BeautifulSoup(path.read_text(encoding="utf-8"), "html.parser")
+        fragments.extend(el.decode_contents() for el in soup.find_all(True))
+    return fragments
+
+
+EDGE_CASES = [
+    "<p>テストテキスト<br>改行</p>",
+    "  ａｂｃ　　ｄ  ",
+    "&amp;lt;b&amp;gt;",
+    "a &lt; b",
+    "1 < 2 > 0",
+    "x<script>var a = 1;</script>y",
+    "<style>p { color: red; }</style>本文",
+    "<!-- コメント -->本文",
+    "&nbsp;前後の空白&nbsp;",
+    "<div>\n  <p> 段落1 </p>\n<p>段落2</p></div>",
+    "ｶﾀｶﾅ①&#x3042;&#12354;",
+    "",
+]
+
+
+@pytest.mark.parametrize("text", EDGE_CASES + fixture_fragments())
+def test_clean_text_matches_legacy_pipeline(text):
+    assert clean_text(text) == legacy_clean_text(text)
+
+
+def test_clean_texts():
+    fragments = ["<p>一</p>", "", "<b>二</b>&amp;三"]
+    assert clean_texts(fragments) == ["一", "", "二 &三"]
@@ -0,0 +1,117 @@
+from datetime import datetime, timedelta
+import pytest
+from utils import pickup_urls
+from utils.pickup_urls import PickupUrlStore
+
+START = datetime(2025, 1, 15, 9, 0)
+PICKUP = "https://news.yahoo.co.jp/pickup/{}"
+ARTICLE = "https://news.yahoo.co.jp/articles/{}"
+
+
+class FakeClock:
+    current = START
+
+    @classmethod
+    def now(cls):
+        return cls.current
+
+
+class FakeCollection:
+    def __init__(self):
+        self.docs = {}  # pickup_url -> ドキュメント
+        self.queries = 0
+
+    def create_index(self, *args, **kwargs):
+        pass
+
+    def index_information(self):
+        return {}
+
+    def _match(self, doc, query):
+        urls = query["pickup_url"]
+        urls = urls["$in"] if isinstance(urls, dict) else [urls]
+        return doc["pickup_url"] in urls and doc["resolved_at"] >= query["resolved_at"]["$gte"]
+
+    def find(self, query, projection=None):
+        self.queries += 1
+        return [dict(doc) for doc in self.docs.values() if self._match(doc, query)]
+
+    def update_one(self, query, update, upsert=False):
+        doc = self.docs.setdefault(query["pickup_url"], {"pickup_url": query["pickup_url"]})
+        doc.update(update["$set"])
+
+
+@pytest.fixture
+def collection(monkeypatch):
+    collection = FakeCollection()
+    FakeClock.current = START
+    monkeypatch.setattr(pickup_urls, "datetime", FakeClock)
+    monkeypatch.setattr(pickup_urls, "get_database", lambda: {"pickup_urls": collection})
+    return collection
+
+
+def make_store():
+    return PickupUrlStore(collection_name="pickup_urls", ttl_hours=72, miss_ttl_minutes=10)
+
+
+def test_prefetch_loads_mappings_in_one_query(collection):
+    collection.update_one({"pickup_url": PICKUP.format(1)},
+                          {"$set": {"article_url": ARTICLE.format(1), "resolved_at": START - timedelta(hours=1)}})
+    store = make_store()
+    store.prefetch([PICKUP.format(1), PICKUP.format(2)])
+    assert collection.queries == 1
+
+    assert store.get(PICKUP.format(1)) == ARTICLE.format(1)
+    # prefetch で見つからなかったURLも未解決として保持し、get のたびに問い合わせない
+    assert store.get(PICKUP.format(2)) is None
+    assert store.get(PICKUP.format(2)) is None
+    assert collection.queries == 1
+
+    # 読み込み済みのURLだけの一覧では問い合わせない
+    store.prefetch([PICKUP.format(1), PICKUP.format(2)])
+    assert collection.queries == 1
+
+
+def test_misses_are_queried_again_after_miss_ttl(collection):
+    store = make_store()
+    assert store.get(PICKUP.format(1)) is None
+    assert collection.queries == 1
+
+    # 他のワーカーが解決した対応は、未解決の期限が切れた後に読み込む
+    collection.update_one({"pickup_url": PICKUP.format(1)},
+                          {"$set": {"article_url": ARTICLE.format(1), "resolved_at": START}})
+    FakeClock.current = START + timedelta(minutes=5)
+    assert store.get(PICKUP.format(1)) is None
+    FakeClock.current = START + timedelta(minutes=11)
+    assert store.get(PICKUP.format(1)) == ARTICLE.format(1)
+    assert collection.queries == 2
+
+
+def test_stale_mapping_is_queried_again(collection):
+    store = make_store()
+    store.put(PICKUP.format(1), ARTICLE.format(1))
+    assert store.get(PICKUP.format(1)) == ARTICLE.format(1)
+    assert collection.queries == 0
+
+    # メモリ上の対応の期限が切れても、MongoDB で解決し直されていればその対応を返す
+    FakeClock.current = START + timedelta(hours=73)
+    collection.update_one({"pickup_url": PICKUP.format(1)},
+                          {"$set": {"article_url": ARTICLE.format(2), "resolved_at": START + timedelta(hours=72)}})
+    assert store.get(PICKUP.format(1)) == ARTICLE.format(2)
+    assert collection.queries == 1
+
+    # MongoDB の対応も期限切れなら未解決として扱う
+    FakeClock.current = START + timedelta(hours=145)
+    assert store.get(PICKUP.format(1)) is None
+
+
+def test_put_replaces_miss_and_persists(collection):
+    store = make_store()
+    store.prefetch([PICKUP.format(1)])
+    store.put(PICKUP.format(1), ARTICLE.format(1))
+    assert store.get(PICKUP.format(1)) == ARTICLE.format(1)
+    assert collection.docs[PICKUP.format(1)] == {"pickup_url": PICKUP.format(1), "article_url": ARTICLE.format(1),
+                                                 "resolved_at": START}
+
+    # 別のプロセスのストアからも読み込める
+    assert make_store().get(PICKUP.format(1)) == ARTICLE.format(1)
@@ -0,0 +1,102 @@
+import asyncio
+import threading
+import time
+from utils.rate_limiter import RateLimiter, parse_retry_after
+
+URL = "https://news.yahoo.co.jp/articles/abc"
+
+
+def test_reserve_spaces_requests_by_rate():
+    limiter = RateLimiter(jitter=0, rate=2.0, burst=1)
+
+    waits = [limiter.reserve(URL)[1] for _ in range(3)]
+
+    # 最初の1件は待たず、以降は 1 / rate 秒ずつ後ろに予約される
+    assert waits[0] == 0
+    assert 0.45 < waits[1] <= 0.5
+    assert 0.95 < waits[2] <= 1.0
+
+
+def test_aimd_adjusts_rate_from_responses():
+    limiter = RateLimiter(jitter=0, rate=1.0, min_rate=0.1, max_rate=1.2, burst=1)
+    host = "news.yahoo.co.jp"
+
+    for _ in range(10):
+        limiter.record(host, 200, 0.1)
+    assert limiter.rate(host) == 1.2
+
+    limiter.record(host, 429, 0.1, retry_after="3")
+    assert limiter.rate(host) == 0.6
+    # 直後の失敗では続けて下げない
+    limiter.record(host, 503, 0.1)
+    assert limiter.rate(host) == 0.6
+    # Retry-After の間は送信を待つ
+    assert limiter.reserve(URL)[1] > 2.5
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("5") == 5.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("invalid") is None
+
+
+def test_concurrency_is_shared_by_sync_and_async_requests():
+    limiter = RateLimiter(max_concurrency=2, jitter=0, rate=1000, max_rate=1000, burst=1000)
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def enter():
+        with lock:
+            active.append(1)
+            peak.append(len(active))
+
+    def leave():
+        with lock:
+            active.pop()
+
+    def sync_request():
+        with limiter.request(URL) as permit:
+            enter()
+            time.sleep(0.05)
+            leave()
+            permit.record(200)
+
+    async def async_requests():
+        async def one():
+            async with limiter.request_async(URL) as permit:
+                enter()
+                await asyncio.sleep(0.05)
+                leave()
+                permit.record(200)
+        await asyncio.gather(*(one() for _ in range(3)))
+
+    threads = [threading.Thread(target=sync_request) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    asyncio.run(async_requests())
+    for thread in threads:
+        thread.join()
+
+    assert len(peak) == 6
+    assert max(peak) <= 2
+
+
+def test_waiting_for_host_token_does_not_hold_concurrency_slot():
+    limiter = RateLimiter(max_concurrency=1, jitter=0, rate=2.0, burst=1)
+    limiter.reserve(URL)  # 次の URL へのリクエストは 0.5 秒待つ
+
+    def slow_host_request():
+        with limiter.request(URL) as permit:
+            permit.record(200)
+
+    thread = threading.Thread(target=slow_host_request)
+    thread.start()
+    time.sleep(0.05)
+
+    # 別のホストへのリクエストは、トークンを待っているリクエストに枠を取られない
+    started = time.monotonic()
+    with limiter.request("https://s.yimg.jp/article.js") as permit:
+        permit.record(200)
+    assert time.monotonic() - started < 0.3
+    thread.join()
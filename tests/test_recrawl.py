@@ -0,0 +1,133 @@
+from datetime import datetime, timedelta
+import pytest
+from scheduler import recrawl
+from scheduler.recrawl import RecrawlQueue, next_interval
+
+MINUTE = 60
+HOUR = 3600
+H = timedelta(hours=1)
+MINUTE_DELTA = timedelta(minutes=1)
+URL = "https://news.yahoo.co.jp/articles/abc"
+PUBLISHED = datetime(2025, 1, 15, 9, 0)
+LIMITS = dict(min_interval=15 * MINUTE, max_interval=24 * HOUR, backoff=2.0, age_factor=0.25)
+
+
+def test_first_fetch_starts_at_min_interval():
+    assert next_interval(None, False, 10 * HOUR, **LIMITS) == 15 * MINUTE
+
+
+def test_interval_backs_off_when_stable_and_shrinks_on_change():
+    assert next_interval(1 * HOUR, False, 20 * HOUR, **LIMITS) == 2 * HOUR
+    assert next_interval(2 * HOUR, True, 20 * HOUR, **LIMITS) == 1 * HOUR
+    # 下限と上限の間に収める
+    assert next_interval(20 * MINUTE, True, 20 * HOUR, **LIMITS) == 15 * MINUTE
+    assert next_interval(20 * HOUR, False, 1000 * HOUR, **LIMITS) == 24 * HOUR
+
+
+def test_fresh_articles_are_checked_often():
+    # 公開から2時間の記事は、変更が無くても30分より長くは空けない
+    assert next_interval(1 * HOUR, False, 2 * HOUR, **LIMITS) == 30 * MINUTE
+    # 公開から8時間経てば、同じ間隔でも延ばす
+    assert next_interval(1 * HOUR, False, 8 * HOUR, **LIMITS) == 2 * HOUR
+
+
+class FakeCursor(list):
+    def sort(self, field, direction):
+        return FakeCursor(sorted(self, key=lambda doc: doc[field]))
+
+    def limit(self, count):
+        return FakeCursor(self[:count])
+
+
+class FakeCollection:
+    def __init__(self):
+        self.docs = {}  # url -> ドキュメント
+
+    def create_index(self, *args, **kwargs):
+        pass
+
+    def index_information(self):
+        return {}
+
+    def _due(self, doc, query):
+        due = doc.get("next_due_at")
+        return due is not None and due <= query["next_due_at"]["$lte"]
+
+    def find_one(self, query, projection=None):
+        doc = self.docs.get(query["url"])
+        return dict(doc) if doc is not None else None
+
+    def find(self, query, projection=None):
+        return FakeCursor(dict(doc) for doc in self.docs.values() if self._due(doc, query))
+
+    def update_one(self, query, update, upsert=False):
+        doc = self.docs.get(query["url"])
+        if doc is None:
+            doc = self.docs[query["url"]] = {"url": query["url"], **update.get("$setOnInsert", {})}
+        doc.update(update["$set"])
+        for field, value in update.get("$inc", {}).items():
+            doc[field] = doc.get(field, 0) + value
+
+    def update_many(self, query, update):
+        for url in query["url"]["$in"]:
+            self.docs[url].update(update["$set"])
+
+    def count_documents(self, query):
+        return sum(1 for doc in self.docs.values() if self._due(doc, query))
+
+
+@pytest.fixture
+def queue(monkeypatch):
+    collection = FakeCollection()
+    monkeypatch.setattr(recrawl, "get_database", lambda: {"recrawl": collection})
+    return RecrawlQueue(collection_name="recrawl", ttl_days=7, min_interval_minutes=15, max_interval_hours=24,
+                        max_age_hours=72)
+
+
+def test_first_fetch_is_scheduled_as_unchanged(queue):
+    # 初めて登録する記事は changed でも変更として数えない
+    assert queue.record_fetch(URL, True, published_at=PUBLISHED, now=PUBLISHED + 10 * H) == \
+        PUBLISHED + 10 * H + timedelta(minutes=15)
+    doc = queue.collection.docs[URL]
+    assert doc["fetches"] == 1 and doc["changes"] == 0 and "last_changed_at" not in doc
+    assert doc["interval"] == 15 * MINUTE
+
+
+def test_unchanged_fetch_backs_off_and_changed_fetch_shrinks(queue):
+    queue.record_fetch(URL, False, published_at=PUBLISHED, now=PUBLISHED + 20 * H)
+    assert queue.record_fetch(URL, False, now=PUBLISHED + 21 * H) == PUBLISHED + 21 * H + timedelta(minutes=30)
+    assert queue.record_fetch(URL, True, now=PUBLISHED + 22 * H) == PUBLISHED + 22 * H + timedelta(minutes=15)
+    doc = queue.collection.docs[URL]
+    assert doc["fetches"] == 3 and doc["changes"] == 1
+    assert doc["last_changed_at"] == PUBLISHED + 22 * H
+
+
+def test_published_at_is_kept_from_first_insert(queue):
+    queue.record_fetch(URL, False, published_at=PUBLISHED, now=PUBLISHED + 1 * H)
+    # 後から渡した公開日時では経過時間を計算し直さない
+    queue.record_fetch(URL, False, published_at=PUBLISHED + 70 * H, now=PUBLISHED + 80 * H)
+    assert queue.collection.docs[URL]["published_at"] == PUBLISHED
+    assert queue.collection.docs[URL]["next_due_at"] is None
+
+
+def test_old_unchanged_article_is_retired(queue):
+    queue.record_fetch(URL, False, published_at=PUBLISHED, now=PUBLISHED + 70 * H)
+    assert queue.record_fetch(URL, False, now=PUBLISHED + 73 * H) is None
+    assert queue.collection.docs[URL]["next_due_at"] is None
+    # 変更があった記事は公開から時間が経っていても再取得を続ける
+    assert queue.record_fetch(URL, True, now=PUBLISHED + 74 * H) is not None
+
+
+def test_claim_returns_due_urls_oldest_first_within_budget(queue):
+    now = PUBLISHED + 30 * H
+    for i, hours in enumerate([3, 1, 2]):
+        queue.record_fetch(f"{URL}/{i}", False, published_at=PUBLISHED, now=now - hours * H)
+    queue.record_fetch(f"{URL}/later", False, published_at=PUBLISHED, now=now)
+    assert queue.due_count(now=now) == 3
+
+    assert queue.claim(2, now=now) == [f"{URL}/0", f"{URL}/2"]
+    # 取り出したURLの予定は min_interval 後に延ばし、次の確認では残りのURLだけを取り出す
+    assert queue.collection.docs[f"{URL}/0"]["next_due_at"] == now + timedelta(minutes=15)
+    assert queue.claim(2, now=now) == [f"{URL}/1"]
+    assert queue.claim(2, now=now) == []
+    assert set(queue.claim(5, now=now + 15 * MINUTE_DELTA)) == {f"{URL}/0", f"{URL}/1", f"{URL}/2", f"{URL}/later"}
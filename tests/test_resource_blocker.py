@@ -0,0 +1,81 @@
+import asyncio
+from utils.resource_blocker import ResourceBlocker
+
+ARTICLE_URL = "https://news.yahoo.co.jp/articles/abc"
+RULES = {
+    "media": {"resource_types": ["image", "font"], "url_patterns": []},
+    "ads": {"resource_types": [], "url_patterns": ["doubleclick.net", "yads.yahoo.co.jp"]},
+    "analytics": {"resource_types": [], "url_patterns": ["google-analytics.com"]},
+}
+
+
+class FakeRequest:
+    def __init__(self, url, resource_type):
+        self.url = url
+        self.resource_type = resource_type
+
+
+class FakeRoute:
+    def __init__(self, url, resource_type):
+        self.request = FakeRequest(url, resource_type)
+        self.result = None
+
+    def abort(self):
+        self.result = "aborted"
+
+    def continue_(self):
+        self.result = "continued"
+
+
+class FakeAsyncRoute(FakeRoute):
+    async def abort(self):
+        FakeRoute.abort(self)
+
+    async def continue_(self):
+        FakeRoute.continue_(self)
+
+
+def route(blocker, url, resource_type):
+    fake_route = FakeRoute(url, resource_type)
+    blocker.handle(fake_route)
+    return fake_route.result
+
+
+def test_blocks_by_resource_type_and_url_pattern():
+    blocker = ResourceBlocker(categories=["media", "ads", "analytics"], rules=RULES)
+    assert route(blocker, "https://s.yimg.jp/images/photo.jpg", "image") == "aborted"
+    assert route(blocker, "https://securepubads.g.doubleclick.net/tag/js/gpt.js", "script") == "aborted"
+    assert route(blocker, "https://www.google-analytics.com/analytics.js", "script") == "aborted"
+    assert route(blocker, ARTICLE_URL, "document") == "continued"
+    assert route(blocker, "https://s.yimg.jp/js/article.js", "script") == "continued"
+    assert blocker.summary()["by_category"] == {"media": 1, "ads": 1, "analytics": 1}
+    assert blocker.allowed_requests == 2
+
+
+def test_only_enabled_categories_are_blocked():
+    blocker = ResourceBlocker(categories=["ads", "unknown"], rules=RULES)
+    assert route(blocker, "https://s.yimg.jp/images/photo.jpg", "image") == "continued"
+    assert route(blocker, "https://yads.yahoo.co.jp/tag", "script") == "aborted"
+    # パターンは正規表現ではなく部分一致として扱う
+    assert blocker.match("https://doubleclickXnet.example.com/", "script") is None
+
+
+def test_async_handler_blocks_and_allows():
+    blocker = ResourceBlocker(categories=["media"], rules=RULES)
+    blocked, allowed = FakeAsyncRoute("https://s.yimg.jp/font.woff2", "font"), FakeAsyncRoute(ARTICLE_URL, "document")
+    asyncio.run(blocker.handle_async(blocked))
+    asyncio.run(blocker.handle_async(allowed))
+    assert (blocked.result, allowed.result) == ("aborted", "continued")
+
+
+def test_estimated_bytes_use_resource_type_sizes():
+    blocker = ResourceBlocker(categories=["media", "ads"], rules=RULES)
+    route(blocker, "https://s.yimg.jp/a.jpg", "image")
+    route(blocker, "https://s.yimg.jp/b.jpg", "image")
+    route(blocker, "https://s.yimg.jp/font.woff2", "font")
+    route(blocker, "https://securepubads.g.doubleclick.net/gpt.js", "script")
+    route(blocker, "https://yads.yahoo.co.jp/beacon", "ping")  # 推定サイズの無い resource_type は other として数える
+    summary = blocker.summary()
+    assert summary["blocked_requests"] == 5
+    assert summary["by_resource_type"] == {"image": 2, "font": 1, "script": 1, "ping": 1}
+    assert summary["estimated_blocked_bytes"] == 2 * 40_000 + 50_000 + 30_000 + 5_000
@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+import pytest
+from utils import seen_urls
+from utils.seen_urls import SeenUrlFilter
+
+NEW = "https://news.yahoo.co.jp/articles/new"
+RECENT = "https://news.yahoo.co.jp/articles/recent"
+OLD = "https://news.yahoo.co.jp/articles/old"
+LINKS = [RECENT, NEW, OLD]
+
+
+def make_filter(policy):
+    seen_filter = SeenUrlFilter(policy=policy, recheck_hours=24)
+    seen_filter.add(RECENT, published_at=datetime.now() - timedelta(hours=1))
+    seen_filter.add(OLD, published_at=datetime.now() - timedelta(hours=48))
+    return seen_filter
+
+
+def test_off_keeps_all_links():
+    assert make_filter("off").filter(LINKS) == LINKS
+
+
+def test_skip_drops_known_links():
+    assert make_filter("skip").filter(LINKS) == [NEW]
+
+
+def test_defer_moves_known_links_after_new_ones():
+    assert make_filter("defer").filter(LINKS) == [NEW, RECENT, OLD]
+
+
+def test_recheck_recent_keeps_only_recently_published_known_links():
+    assert make_filter("recheck_recent").filter(LINKS) == [NEW, RECENT]
+
+
+def test_add_without_published_at_is_treated_as_just_published():
+    seen_filter = SeenUrlFilter(policy="recheck_recent", recheck_hours=24)
+    seen_filter.add(NEW)
+    assert NEW in seen_filter and len(seen_filter) == 1
+    assert seen_filter.filter([NEW]) == [NEW]
+
+
+def test_invalid_policy_is_rejected():
+    with pytest.raises(ValueError):
+        SeenUrlFilter(policy="ignore")
+
+
+class FakeCursor(list):
+    def hint(self, index):
+        return self
+
+
+class FakeCollection:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def create_index(self, *args, **kwargs):
+        pass
+
+    def find(self, query, projection):
+        since = query.get("published_at", {}).get("$gte")
+        return FakeCursor(doc for doc in self.docs if since is None or doc["published_at"] >= since)
+
+
+def test_load_reads_saved_urls_and_recent_publish_dates(monkeypatch):
+    collection = FakeCollection([{"url": RECENT, "published_at": datetime.now() - timedelta(hours=1)},
+                                 {"url": OLD, "published_at": datetime.now() - timedelta(hours=48)}])
+    monkeypatch.setattr(seen_urls, "get_database", lambda: {"articles": collection})
+    seen_filter = SeenUrlFilter(policy="recheck_recent", recheck_hours=24)
+    seen_filter.load("articles")
+    assert len(seen_filter) == 2
+    assert seen_filter.filter(LINKS) == [NEW, RECENT]
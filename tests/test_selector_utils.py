@@ -0,0 +1,113 @@
+from scrapers.yahoo.extractor import ARTICLE_FIELDS, H1_SELECTORS, P_SELECTORS, build_extraction_spec
+from utils.selector_utils import SelectorStats, SelectorUtils
+
+CANDIDATES = ["#uamods > header > h1", "#uamods-article > div:nth-child(1) > header > h1"]
+
+
+class FakeLocator:
+    def __init__(self, visible):
+        self.first = self
+        self.visible = visible
+
+    def is_visible(self):
+        return self.visible
+
+
+class FakePage:
+    def __init__(self, visible_selectors):
+        self.visible_selectors = visible_selectors
+        self.queried = []
+
+    def locator(self, selector):
+        self.queried.append(selector)
+        return FakeLocator(selector in self.visible_selectors)
+
+
+def test_winning_candidate_is_tried_first():
+    stats = SelectorStats(path="", weight=0.5)
+    assert stats.order("title", CANDIDATES) == CANDIDATES
+
+    # 2番目の候補で取得できた記事が続くと、2番目の候補を先に試す
+    stats.record("title", CANDIDATES, CANDIDATES[1])
+    assert stats.order("title", CANDIDATES) == CANDIDATES[::-1]
+
+    # 先に試した候補が外れ、後続の候補で取得できると順序が戻る
+    for _ in range(2):
+        stats.record("title", CANDIDATES[::-1], CANDIDATES[0])
+    assert stats.order("title", CANDIDATES) == CANDIDATES
+
+    summary = stats.summary()["title"]
+    assert [row["selector"] for row in summary] == CANDIDATES
+    assert (summary[0]["hits"], summary[0]["misses"]) == (2, 1)
+    assert (summary[1]["hits"], summary[1]["misses"]) == (1, 2)
+
+
+def test_order_spec_and_record_result():
+    stats = SelectorStats(path="", weight=0.5)
+    stats.record("title", CANDIDATES, CANDIDATES[1])
+    spec = {"fields": {"title": {"selectors": CANDIDATES, "mode": "first", "exclusive": True}}, "texts": {}}
+
+    ordered = stats.order_spec(spec)
+    assert ordered["fields"]["title"]["selectors"] == CANDIDATES[::-1]
+    assert spec["fields"]["title"]["selectors"] == CANDIDATES
+
+    stats.record_result(ordered, {"fields": {"title": {"selector": None}}})
+    assert [row["misses"] for row in stats.summary()["title"]] == [1, 2]
+
+
+def test_stats_persist_across_runs(tmp_path):
+    path = str(tmp_path / "selector_stats.json")
+    stats = SelectorStats(path=path)
+    stats.record("title", CANDIDATES, CANDIDATES[1])
+    stats.save()
+
+    assert SelectorStats(path=path).summary() == stats.summary()
+
+
+def test_try_multiple_selectors_records_hits():
+    stats = SelectorStats(path="", weight=0.5)
+    utils = SelectorUtils(stats=stats)
+    page = FakePage({CANDIDATES[1]})
+
+    assert utils.try_multiple_selectors(page, CANDIDATES, field="title", exclusive=True) is not None
+    page.queried.clear()
+    utils.try_multiple_selectors(page, CANDIDATES, field="title", exclusive=True)
+    # 前回取得できた候補だけを試す
+    assert page.queried == [CANDIDATES[1]]
+
+
+def test_priority_fallbacks_are_not_reordered():
+    stats = SelectorStats(path="", weight=0.1)
+    spec = build_extraction_spec()
+
+    # h1 の無い記事が1件あり、本文の段落をタイトルとして取得した
+    stats.record_result(stats.order_spec(spec), {"fields": {
+        "title": {"selector": H1_SELECTORS[1]},
+        "paragraphs": {"selector": P_SELECTORS[0]},
+    }})
+    # 後続の記事でも、本文の段落が h1 より先に試されることはない
+    for _ in range(3):
+        ordered = stats.order_spec(spec)
+        assert ordered["fields"]["title"]["selectors"] == H1_SELECTORS
+        assert ordered["fields"]["paragraphs"]["selectors"] == P_SELECTORS
+        stats.record_result(ordered, {"fields": {
+            "title": {"selector": H1_SELECTORS[0]},
+            "paragraphs": {"selector": P_SELECTORS[0]},
+        }})
+    assert ARTICLE_FIELDS["title"]["selectors"] == H1_SELECTORS
+
+
+def test_exclusive_field_returns_to_priority_order_after_fallback():
+    stats = SelectorStats(path="", weight=0.1)
+    candidates = CANDIDATES + ["#contentsWrap header > h1"]
+    spec = {"fields": {"title": {"selectors": candidates, "mode": "first", "exclusive": True}}, "texts": {}}
+
+    # 先頭の候補が1件外れて直近の取得率が初期値を下回っても、一度も取得できていない候補は前に出ない
+    stats.record_result(stats.order_spec(spec), {"fields": {"title": {"selector": candidates[0]}}})
+    stats.record_result(stats.order_spec(spec), {"fields": {"title": {"selector": candidates[1]}}})
+    assert stats.order("title", candidates) == [candidates[1], candidates[0], candidates[2]]
+
+    # 後続の記事が先頭の候補で取得できれば、設定された優先順位に戻る
+    for _ in range(3):
+        stats.record_result(stats.order_spec(spec), {"fields": {"title": {"selector": candidates[0]}}})
+    assert stats.order_spec(spec)["fields"]["title"]["selectors"] == candidates
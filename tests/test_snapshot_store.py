@@ -0,0 +1,47 @@
+import gzip
+import os
+from datetime import datetime, timedelta
+from utils.snapshot_store import SnapshotStore
+
+URL = "https://news.yahoo.co.jp/articles/abc"
+HTML = "<html><body>" + "記事" * 1000 + "</body></html>"
+
+
+def test_identical_html_is_stored_once_and_indexed_per_failure(tmp_path):
+    store = SnapshotStore(directory=str(tmp_path), max_per_hour=0)
+
+    digest = store.save(HTML, URL, ["h1_missing", "p_missing"])
+    assert store.save(HTML, URL, ["fatal_error"]) == digest
+    store.close()
+
+    objects = [name for _, _, names in os.walk(tmp_path / "objects") for name in names]
+    assert objects == [f"{digest}.html.gz"]
+    assert os.path.getsize(store.object_path(digest)) < len(HTML.encode("utf-8"))
+    with gzip.open(store.object_path(digest), "rt", encoding="utf-8") as f:
+        assert f.read() == HTML
+    assert store.read(digest) == HTML
+
+    rows = store.find(url=URL)
+    assert sorted(row["prefix"] for row in rows) == ["fatal_error", "h1_missing", "p_missing"]
+    assert {row["digest"] for row in rows} == {digest}
+
+
+def test_find_by_url_prefix_and_time(tmp_path):
+    store = SnapshotStore(directory=str(tmp_path), max_per_hour=0)
+    store.save(HTML, URL, ["h1_missing"])
+    store.save(HTML + "2", "https://news.yahoo.co.jp/pickup/1", ["time_missing"])
+    store.close()
+
+    assert [row["url"] for row in store.find(url="https://news.yahoo.co.jp/articles/")] == [URL]
+    assert [row["prefix"] for row in store.find(prefix="time_missing")] == ["time_missing"]
+    assert len(store.find(since=datetime.now() - timedelta(minutes=1))) == 2
+    assert store.find(until=datetime.now() - timedelta(minutes=1)) == []
+
+
+def test_admit_limits_each_failure_type(tmp_path):
+    store = SnapshotStore(directory=str(tmp_path), max_per_hour=2)
+
+    assert store.admit(["h1_missing", "p_missing"]) == ["h1_missing", "p_missing"]
+    assert store.admit(["h1_missing"]) == ["h1_missing"]
+    assert store.admit(["h1_missing", "p_missing"]) == ["p_missing"]
+    assert store.admit(["h1_missing", "p_missing"]) == []
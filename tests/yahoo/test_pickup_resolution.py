@@ -0,0 +1,126 @@
+import asyncio
+import pytest
+from scrapers.yahoo import yahoo_news, yahoo_news_async
+from scrapers.yahoo.yahoo_news import resolve_article_url
+from scrapers.yahoo.yahoo_news_async import resolve_article_url_async
+from utils.rate_limiter import RateLimiter
+
+PICKUP_URL = "https://news.yahoo.co.jp/pickup/123"
+ARTICLE_URL = "https://news.yahoo.co.jp/articles/abc"
+PICKUP_HTML = ('<div id="uamods-pickup"><div class="sc-gdv5m1-0 cuVskI"><div class="sc-gdv5m1-8 eMtbmz">'
+               f'<a href="{ARTICLE_URL}">記事全文を読む</a></div></div></div>')
+
+
+class FakeResponse:
+    def __init__(self, status, text=""):
+        self.status = status
+        self.ok = 200 <= status < 300
+        self._text = text
+
+    def text(self):
+        return self._text
+
+
+class FakeRequest:
+    def __init__(self, result):
+        self.result = result
+        self.calls = 0
+
+    def get(self, url):
+        self.calls += 1
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+class FakePage:
+    def __init__(self, result):
+        self.request = FakeRequest(result)
+
+
+class FakeAsyncResponse(FakeResponse):
+    async def text(self):
+        return self._text
+
+
+class FakeAsyncRequest(FakeRequest):
+    async def get(self, url):
+        response = FakeRequest.get(self, url)
+        return FakeAsyncResponse(response.status, response._text)
+
+
+class FakeAsyncPage:
+    def __init__(self, result):
+        self.request = FakeAsyncRequest(result)
+
+
+class FakePickupUrlStore:
+    def __init__(self):
+        self.mapping = {}
+
+    def prefetch(self, pickup_urls):
+        pass
+
+    def get(self, pickup_url):
+        return self.mapping.get(pickup_url)
+
+    def put(self, pickup_url, article_url):
+        self.mapping[pickup_url] = article_url
+
+
+@pytest.fixture(autouse=True)
+def fast_rate_limiter(monkeypatch):
+    rate_limiter = RateLimiter(jitter=0, rate=1000, max_rate=1000, burst=1000)
+    monkeypatch.setattr(yahoo_news, "get_rate_limiter", lambda: rate_limiter)
+    monkeypatch.setattr(yahoo_news_async, "get_rate_limiter", lambda: rate_limiter)
+
+
+@pytest.fixture(autouse=True)
+def pickup_store(monkeypatch):
+    store = FakePickupUrlStore()
+    monkeypatch.setattr(yahoo_news, "get_pickup_url_store", lambda: store)
+    return store
+
+
+@pytest.mark.parametrize("result", [TimeoutError("timeout"), FakeResponse(503)])
+def test_resolve_failure_falls_back_to_click(result):
+    # 取得に失敗しても例外にせず None を返し、呼び出し元でピックアップページのリンクをクリックさせる
+    page = FakePage(result)
+    assert resolve_article_url(page, PICKUP_URL) is None
+    assert page.request.calls == 1
+
+
+@pytest.mark.parametrize("result", [TimeoutError("timeout"), FakeResponse(503)])
+def test_resolve_async_failure_falls_back_to_click(result):
+    page = FakeAsyncPage(result)
+    assert asyncio.run(resolve_article_url_async(page, PICKUP_URL)) is None
+    assert page.request.calls == 1
+
+
+def test_resolved_pickup_is_fetched_once(pickup_store):
+    page = FakePage(FakeResponse(200, PICKUP_HTML))
+    assert resolve_article_url(page, PICKUP_URL) == ARTICLE_URL
+    assert pickup_store.mapping == {PICKUP_URL: ARTICLE_URL}
+
+    # 解決済みの対応があればピックアップページを取得しない
+    assert resolve_article_url(page, PICKUP_URL) == ARTICLE_URL
+    assert page.request.calls == 1
+
+
+def test_resolve_async_uses_cached_mapping(pickup_store):
+    pickup_store.put(PICKUP_URL, ARTICLE_URL)
+    page = FakeAsyncPage(TimeoutError("timeout"))
+    assert asyncio.run(resolve_article_url_async(page, PICKUP_URL)) == ARTICLE_URL
+    assert page.request.calls == 0
+
+
+def test_pickup_without_link_is_not_remembered(pickup_store):
+    page = FakeAsyncPage(FakeResponse(200, "<html><body></body></html>"))
+    assert asyncio.run(resolve_article_url_async(page, PICKUP_URL)) is None
+    assert pickup_store.mapping == {}
+
+
+def test_non_pickup_url_is_returned_as_is():
+    page = FakePage(TimeoutError("timeout"))
+    assert resolve_article_url(page, ARTICLE_URL) == ARTICLE_URL
+    assert page.request.calls == 0
@@ -17,14 +17,21 @@ TEST_HTML = """
 """
 
 TEST_HTML_PAGINATED = """
-<h1>テスト記事タイトル</h1>
-<p>ページ1のコンテンツ</p>
-<a href="?page=2">次のページ</a>
+<div id="uamods">
+  <header><h1>テスト記事タイトル</h1></header>
+  <div class="article_body highLightSearchTarget"><p>ページ1のコンテンツ</p></div>
+  <div class="sc-brfqoi-0 iHxBOa"><div><ul>
+    <li><a href="?page=2">2</a></li>
+    <li><a href="?page=2">次のページ</a></li>
+  </ul></div></div>
+</div>
 """
 
 TEST_HTML_PAGINATED_2 = """
-<h1>テスト記事タイトル</h1>
-<p>ページ2のコンテンツ</p>
+<div id="uamods">
+  <header><h1>テスト記事タイトル</h1></header>
+  <div class="article_body highLightSearchTarget"><p>ページ2のコンテンツ</p></div>
+</div>
 """
 
 
@@ -65,12 +72,13 @@ def test_get_article_links(page):
 
 
 def test_scrape_paginated_content(page, monkeypatch):
+    # 1ページ目は表示済みのものを使い、再取得しない
+    page.set_content(TEST_HTML_PAGINATED)
+    requested = []
 
     def mock_goto(self, url, **kwargs):
-
-        if url.endswith("?page=1"):
-            self.set_content(TEST_HTML_PAGINATED)
-        elif url.endswith("?page=2"):
+        requested.append(url)
+        if url.endswith("?page=2"):
             self.set_content(TEST_HTML_PAGINATED_2)
         else:
             raise Exception("Unexpected URL")
@@ -84,4 +92,5 @@ def test_scrape_paginated_content(page, monkeypatch):
     monkeypatch.setattr("playwright.sync_api._generated.Page.goto", mock_goto)
 
     additional_texts = scrape_paginated_content(page)
-    assert additional_texts == ["ページ1のコンテンツ", "ページ2のコンテンツ"]
\ No newline at end of file
+    assert additional_texts == ["ページ2のコンテンツ"]
+    assert [url.rsplit("?", 1)[1] for url in requested] == ["page=2"]
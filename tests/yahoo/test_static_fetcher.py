@@ -0,0 +1,126 @@
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+import pytest
+from change_detection.detector import clean_extracted_texts
+from change_detection.store import page_digest
+from scrapers.yahoo.extractor import build_extraction_spec, extract_fields_static, parse_html
+from scrapers.yahoo.yahoo_news import (scrape_article_static, collect_paginated_texts, is_pickup_url,
+                                       pickup_target_url)
+from utils.http_client import HttpFetcher
+from utils.rate_limiter import RateLimiter
+
+FIXTURE_DIR = Path(__file__).parent / "fixtures"
+
+# 記録済みのフィクスチャを返すURL (パス + クエリ)
+ROUTES = {
+    "/articles/abc": "article.html",
+    "/articles/abc?page=2": "article_page2.html",
+    "/pickup/123": "pickup.html",
+    "/articles/client": "client_rendered.html",
+}
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        name = ROUTES.get(self.path)
+        if name is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = (FIXTURE_DIR / name).read_bytes()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def base_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+@pytest.fixture
+def fetcher():
+    # 分割記事の取得間隔の待機を省略する
+    rate_limiter = RateLimiter(jitter=0, rate=1000, max_rate=1000, burst=1000)
+    fetcher = HttpFetcher(pool_size=2, timeout=5, user_agent="pytest", rate_limiter=rate_limiter)
+    yield fetcher
+    fetcher.close()
+
+
+def test_scrape_article_static(base_url, fetcher):
+    article, extracted = scrape_article_static(fetcher, f"{base_url}/articles/abc")
+
+    assert article.title == "テスト記事タイトル"
+    assert article.content == "本文の1段落目です。 本文の2段落目です。&記号を含みます。 2ページ目の段落です。"
+    assert article.coment == "12"
+    assert article.author == "テスト通信"
+    assert article.published_at.strftime("%m-%d %H:%M") == "01-15 09:30"
+    assert extracted["fields"]["title"]["selector"] == "#uamods > header > h1"
+
+
+def test_scrape_article_static_follows_pickup_link(base_url, fetcher):
+    pickup_url = f"{base_url}/pickup/123"
+    article, _ = scrape_article_static(fetcher, pickup_url)
+
+    assert str(article.url) == pickup_url
+    assert article.title == "テスト記事タイトル"
+
+
+def test_scrape_article_static_falls_back_when_body_is_missing(base_url, fetcher):
+    assert scrape_article_static(fetcher, f"{base_url}/articles/client") is None
+
+
+def test_scrape_article_static_returns_none_on_http_error(base_url, fetcher):
+    assert scrape_article_static(fetcher, f"{base_url}/articles/missing") is None
+
+
+def test_collect_paginated_texts_fetches_remaining_pages_in_order():
+    requested = []
+
+    def fetch_pages(urls):
+        requested.append([url.rsplit("=", 1)[1] for url in urls])
+        # 3ページ目のページ送りで、1ページ目には無かった5ページ目が分かる
+        pages = {"2": (["p2"], 3), "3": (["p3a", "p3b"], 5), "4": (["p4"], 5), "5": None}
+        return [pages[url.rsplit("=", 1)[1]] for url in urls]
+
+    texts = collect_paginated_texts("https://example.com/articles/abc", 3, fetch_pages)
+
+    assert texts == ["p2", "p3a", "p3b", "p4"]
+    assert requested == [["2", "3"], ["4", "5"]]
+
+
+def test_pickup_target_url_reads_article_link():
+    pickup_url = "https://news.yahoo.co.jp/pickup/123"
+    soup = parse_html((FIXTURE_DIR / "pickup.html").read_text(encoding="utf-8"))
+
+    assert is_pickup_url(pickup_url)
+    assert not is_pickup_url("https://news.yahoo.co.jp/articles/abc")
+    assert pickup_target_url(pickup_url, soup) == "https://news.yahoo.co.jp/articles/abc"
+
+
+def test_static_texts_match_browser_inner_text():
+    html = """
+    <div id="uamods"><div class="article_body highLightSearchTarget">
+      <p>1行目<br>2行目の
+         <a href="/x">リンク</a> と<b>強調</b>。<!-- コメント --></p>
+      <p>  次の段落  </p>
+    </div></div>
+    """
+    spec = build_extraction_spec(fields={}, text_selectors={"article_data_p": "#uamods p"})
+    static_texts = extract_fields_static(html, spec)["texts"]
+    # 同じHTMLに対してブラウザの innerText が返す値
+    browser_texts = {"article_data_p": ["1行目\n2行目の リンク と強調。", "次の段落"]}
+
+    assert static_texts == browser_texts
+    assert (page_digest(clean_extracted_texts(static_texts))
+            == page_digest(clean_extracted_texts(browser_texts)))
@@ -0,0 +1,144 @@
+import threading
+from collections import Counter
+from datetime import datetime, time as dt_time
+from pymongo import ASCENDING
+from config import ROLLUP_ENABLED
+from loggings.logger import get_logger
+from utils.database import get_database, get_rollups, rollups_ready
+
+logger = get_logger(__name__)
+
+# 集計の基準にする日時のフィールド
+TIMESTAMP_FIELD = "published_at"
+
+# 集計単位ごとの $dateToString の書式
+BUCKET_FORMATS = {
+    "day": "%Y-%m-%d",
+    "hour": "%Y-%m-%d %H:00",
+}
+
+_indexed_collections = set()  # タイムスタンプのインデックスを作成済みのコレクション
+_indexed_collections_lock = threading.Lock()
+
+
+def ensure_timestamp_index(collection_name):
+    """
+    集計の $match に使うタイムスタンプのインデックスを作成する (プロセス内で1回だけ)
+
+    Args:
+        collection_name: コレクション名
+    """
+    with _indexed_collections_lock:
+        if collection_name in _indexed_collections:
+            return
+        get_database()[collection_name].create_index([(TIMESTAMP_FIELD, ASCENDING)], background=True)
+        _indexed_collections.add(collection_name)
+
+
+def _to_datetime_range(start, end):
+    """日付を start はその日の始まり、end はその日の終わりの日時に変換する"""
+    if not isinstance(start, datetime):
+        start = datetime.combine(start, dt_time.min)
+    if not isinstance(end, datetime):
+        end = datetime.combine(end, dt_time.max)
+    return start, end
+
+
+def _date_range_match(start, end):
+    """start 以上 end 以下 (日付の場合はその日の終わりまで) の $match ステージを返す"""
+    start, end = _to_datetime_range(start, end)
+    return {"$match": {TIMESTAMP_FIELD: {"$gte": start, "$lte": end}}}
+
+
+def aggregate(collection_name, pipeline):
+    """
+    タイムスタンプのインデックスを用意してから集計パイプラインを実行する
+
+    Args:
+        collection_name: コレクション名
+        pipeline: 集計パイプライン (先頭に日付範囲の $match を置くこと)
+
+    Returns:
+        list: 集計結果のドキュメントのリスト
+    """
+    ensure_timestamp_index(collection_name)
+    results = list(get_database()[collection_name].aggregate(pipeline))
+    logger.debug(f"集計完了: collection={collection_name}, 件数={len(results)}")
+    return results
+
+
+def _use_rollups(collection_name, use_rollups):
+    """ロールアップから読むかどうか (バックフィル前のコレクションは集計パイプラインで数える)"""
+    if not use_rollups:
+        return False
+    if rollups_ready(collection_name):
+        return True
+    logger.info(f"ロールアップがバックフィルされていないため、記事のコレクションを集計します "
+                f"(python -m utils.database rebuild-rollups {collection_name} で作成できます)")
+    return False
+
+
+def article_counts(collection_name, start, end, unit="day", use_rollups=ROLLUP_ENABLED):
+    """
+    期間内の記事数を日ごと・時間ごとに集計する
+
+    use_rollups が有効で、rebuild_rollups でバックフィル済みの場合は書き込み時に更新しているロールアップを読み、
+    それ以外の場合は記事のコレクションを集計パイプラインで集計する。
+
+    Args:
+        collection_name: コレクション名
+        start: 集計開始日時 (date または datetime)
+        end: 集計終了日時 (date の場合はその日の終わりまで)
+        unit: 集計単位 ("day" / "hour")
+        use_rollups: ロールアップから読むかどうか
+
+    Returns:
+        list: [{"bucket": "2025-01-15", "count": 12}, ...] (bucket の昇順)
+    """
+    if unit not in BUCKET_FORMATS:
+        raise ValueError(f"無効な集計単位です: {unit}")
+    if _use_rollups(collection_name, use_rollups):
+        return [{"bucket": row["bucket"], "count": row["count"]}
+                for row in get_rollups(collection_name, unit, *_to_datetime_range(start, end))]
+    pipeline = [
+        _date_range_match(start, end),
+        {"$project": {"_id": 0, "bucket": {"$dateToString": {"format": BUCKET_FORMATS[unit],
+                                                              "date": f"${TIMESTAMP_FIELD}"}}}},
+        {"$group": {"_id": "$bucket", "count": {"$sum": 1}}},
+        {"$sort": {"_id": 1}},
+        {"$project": {"_id": 0, "bucket": "$_id", "count": 1}},
+    ]
+    return aggregate(collection_name, pipeline)
+
+
+def author_counts(collection_name, start, end, limit=20, use_rollups=ROLLUP_ENABLED):
+    """
+    期間内の記事数を配信元 (author) ごとに集計する
+
+    use_rollups が有効で、バックフィル済みの場合は日ごと・配信元ごとのロールアップを合算する。
+
+    Args:
+        collection_name: コレクション名
+        start: 集計開始日時 (date または datetime)
+        end: 集計終了日時 (date の場合はその日の終わりまで)
+        limit: 上位何件を返すか
+        use_rollups: ロールアップから読むかどうか
+
+    Returns:
+        list: [{"author": "テスト通信", "count": 12}, ...] (count の降順)
+    """
+    if _use_rollups(collection_name, use_rollups):
+        totals = Counter()
+        for row in get_rollups(collection_name, "author", *_to_datetime_range(start, end)):
+            totals[row["key"]] += row["count"]
+        ranked = sorted(totals.items(), key=lambda item: (-item[1], str(item[0])))[:limit]
+        return [{"author": author, "count": count} for author, count in ranked]
+    pipeline = [
+        _date_range_match(start, end),
+        {"$project": {"_id": 0, "author": 1}},
+        {"$group": {"_id": "$author", "count": {"$sum": 1}}},
+        {"$sort": {"count": -1, "_id": 1}},
+        {"$limit": limit},
+        {"$project": {"_id": 0, "author": "$_id", "count": 1}},
+    ]
+    return aggregate(collection_name, pipeline)
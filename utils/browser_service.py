@@ -0,0 +1,200 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from playwright.sync_api import sync_playwright
+from config import BROWSER_RECYCLE_RUNS, BROWSER_RECYCLE_HOURS, BROWSER_HEALTH_CHECK_INTERVAL
+from loggings.logger import get_logger
+from utils.network import get_random_user_agent
+
+logger = get_logger(__name__)
+
+_browser_service = None
+_browser_service_lock = threading.Lock()
+
+# キューに入れると専用スレッドを終了する値
+_STOP = object()
+
+
+class BrowserService:
+    """
+    スケジューラのプロセスで Chromium を起動したまま保持し、実行ごとに新しいコンテキストを渡すサービス
+
+    Playwright の同期APIは起動したスレッドからしか使えないため、ブラウザは専用のスレッドで保持し、
+    run() で渡された処理もそのスレッドで実行する。ブラウザは recycle_runs 回の実行または recycle_hours 時間ごとに
+    起動し直し、待機中は health_check_interval 秒ごとに接続を確認して、クラッシュしていれば起動し直す。
+    """
+
+    def __init__(self, headless=True, recycle_runs=BROWSER_RECYCLE_RUNS, recycle_hours=BROWSER_RECYCLE_HOURS,
+                 health_check_interval=BROWSER_HEALTH_CHECK_INTERVAL):
+        """
+        Args:
+            headless: ヘッドレスモードで起動するかどうか
+            recycle_runs: この回数の実行ごとにブラウザを起動し直す (0 の場合は回数では起動し直さない)
+            recycle_hours: 起動からこの時間が経過したら、次の実行の前にブラウザを起動し直す (0 の場合は時間では起動し直さない)
+            health_check_interval: 待機中にブラウザの接続を確認する間隔 (秒)
+        """
+        self.headless = headless
+        self.recycle_runs = recycle_runs
+        self.recycle_hours = recycle_hours
+        self.health_check_interval = health_check_interval
+        self.launches = 0
+        self._playwright = None
+        self._browser = None
+        self._launched_at = 0.0
+        self._runs_since_launch = 0
+        self._jobs = queue.Queue()
+        self._thread = None
+
+    # --- 以下は専用スレッドでのみ呼ばれる ---
+
+    def _launch(self):
+        """Playwright と Chromium を起動する"""
+        if self._playwright is None:
+            self._playwright = sync_playwright().start()
+        self._browser = self._playwright.chromium.launch(headless=self.headless)
+        self._launched_at = time.monotonic()
+        self._runs_since_launch = 0
+        self.launches += 1
+        logger.info(f"ブラウザを起動しました (起動回数: {self.launches})")
+
+    def _close_browser(self):
+        """Chromium を終了する (クラッシュしている場合の例外は無視する)"""
+        if self._browser is None:
+            return
+        try:
+            self._browser.close()
+        except Exception as e:
+            logger.warning(f"ブラウザの終了に失敗しました: {e}")
+        self._browser = None
+
+    def _shutdown(self):
+        self._close_browser()
+        if self._playwright is not None:
+            try:
+                self._playwright.stop()
+            except Exception as e:
+                logger.warning(f"Playwright の終了に失敗しました: {e}")
+            self._playwright = None
+
+    def _is_healthy(self):
+        """ブラウザが起動していて、接続が切れていないかどうか"""
+        if self._browser is None:
+            return False
+        try:
+            return self._browser.is_connected()
+        except Exception:
+            return False
+
+    def _needs_recycle(self):
+        if self.recycle_runs and self._runs_since_launch >= self.recycle_runs:
+            return f"{self._runs_since_launch}回実行したため"
+        if self.recycle_hours and time.monotonic() - self._launched_at >= self.recycle_hours * 3600:
+            return f"起動から{self.recycle_hours}時間経過したため"
+        return None
+
+    def _ensure_browser(self):
+        """実行の前に、クラッシュしていれば起動し直し、起動し直す時期であれば起動し直す"""
+        if self._browser is not None and not self._is_healthy():
+            logger.warning("ブラウザとの接続が切れているため、起動し直します")
+            self._close_browser()
+        elif self._browser is not None:
+            reason = self._needs_recycle()
+            if reason:
+                logger.info(f"{reason}、ブラウザを起動し直します")
+                self._close_browser()
+        if self._browser is None:
+            self._launch()
+
+    def _run_job(self, func, args, kwargs, future):
+        if not future.set_running_or_notify_cancel():
+            return
+        context = None
+        try:
+            self._ensure_browser()
+            context = self._browser.new_context(user_agent=get_random_user_agent())
+            future.set_result(func(context, *args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            self._runs_since_launch += 1
+            if context is not None:
+                try:
+                    context.close()
+                except Exception as e:
+                    logger.warning(f"ブラウザのコンテキストの終了に失敗しました: {e}")
+
+    def _serve(self):
+        try:
+            self._launch()
+        except Exception as e:
+            # 起動に失敗しても、次の実行の前に起動し直す
+            logger.error(f"ブラウザの起動に失敗しました: {e}")
+        while True:
+            try:
+                job = self._jobs.get(timeout=self.health_check_interval)
+            except queue.Empty:
+                if self._browser is not None and not self._is_healthy():
+                    logger.warning("ブラウザとの接続が切れているため、起動し直します")
+                    self._close_browser()
+                    try:
+                        self._launch()
+                    except Exception as e:
+                        logger.error(f"ブラウザの起動に失敗しました: {e}")
+                continue
+            if job is _STOP:
+                break
+            self._run_job(*job)
+        self._shutdown()
+        logger.info("ブラウザサービスを停止しました")
+
+    # --- 以下は任意のスレッドから呼べる ---
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """専用スレッドを起動し、ブラウザを起動しておく"""
+        if not self.running:
+            self._thread = threading.Thread(target=self._serve, name="BrowserService", daemon=True)
+            self._thread.start()
+        return self
+
+    def run(self, func, *args, **kwargs):
+        """
+        新しいブラウザのコンテキストを作成し、専用スレッドで func(context, *args, **kwargs) を実行する
+
+        コンテキストは func の終了後に閉じる。
+
+        Returns:
+            Future: func の戻り値 (例外) を受け取る Future
+        """
+        self.start()
+        future = Future()
+        self._jobs.put((func, args, kwargs, future))
+        return future
+
+    def stop(self, timeout=30):
+        """実行中の処理の終了を待ってブラウザを終了し、専用スレッドを止める"""
+        if self.running:
+            self._jobs.put(_STOP)
+            self._thread.join(timeout=timeout)
+
+
+def get_browser_service():
+    """プロセス内で共有する BrowserService を返す (初回の run() で起動する)"""
+    global _browser_service
+    with _browser_service_lock:
+        if _browser_service is None:
+            _browser_service = BrowserService()
+        return _browser_service
+
+
+def stop_browser_service():
+    """共有の BrowserService を停止する"""
+    global _browser_service
+    with _browser_service_lock:
+        service, _browser_service = _browser_service, None
+    if service is not None:
+        service.stop()
@@ -1,23 +1,431 @@
+import argparse
+import bz2
 import csv
+import gzip
+import io
 import json
+import lzma
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from bson import ObjectId
+from config import EXPORT_BATCH_SIZE, EXPORT_PARQUET_FILE_ROWS
 from loggings.logger import get_logger
+from utils.database import get_database
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow は Parquet 形式で出力する場合のみ必要
+    pa = pq = None
 
 logger = get_logger(__name__)
 
+# 出力形式
+FORMATS = ("csv", "ndjson", "parquet")
+
+# 圧縮形式ごとの圧縮ストリーム (バッチごとに独立したメンバー/ストリームとして追記する)
+COMPRESSORS = {
+    "gzip": lambda raw: gzip.GzipFile(fileobj=raw, mode="wb"),
+    "bz2": lambda raw: bz2.BZ2File(raw, mode="wb"),
+    "xz": lambda raw: lzma.LZMAFile(raw, mode="wb"),
+}
+
+# 既定で出力する記事のフィールド
+DEFAULT_EXPORT_FIELDS = ["_id", "url", "title", "content", "coment", "author", "published_at", "updated_at",
+                         "source", "duplicate_of"]
+
+# Parquet で日時型として出力するフィールド (それ以外は文字列)
+DATETIME_FIELDS = {"published_at", "updated_at"}
+
+
+def _to_text(value):
+    """CSV / Parquet の文字列列に入れる値に変換する"""
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False, default=str)
+    return str(value)
+
+
+def _json_default(value):
+    """json.dumps で変換できない値 (ObjectId, datetime) を文字列にする"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _encode_csv(rows, fields, header):
+    """行をCSVのバイト列にする"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(fields)
+    for row in rows:
+        writer.writerow(["" if row.get(f) is None else _to_text(row.get(f)) for f in fields])
+    return buffer.getvalue().encode("utf-8")
+
+
+def _encode_ndjson(rows, fields, header):
+    """行をNDJSON (1行1ドキュメント) のバイト列にする"""
+    lines = (json.dumps({f: row.get(f) for f in fields}, ensure_ascii=False, default=_json_default) for row in rows)
+    return "".join(f"{line}\n" for line in lines).encode("utf-8")
+
+
+_ENCODERS = {"csv": _encode_csv, "ndjson": _encode_ndjson}
+
+
+class _TextExporter:
+    """CSV / NDJSON をバッチごとに追記するライター (圧縮する場合はバッチごとに圧縮ストリームを閉じる)"""
+
+    # write_batch の戻り値を記録するチェックポイントのキー
+    checkpoint_key = "offset"
+
+    def __init__(self, filename, fmt, fields, compression=None, offset=None):
+        """
+        Args:
+            filename: 出力ファイル名
+            fmt: "csv" または "ndjson"
+            fields: 出力するフィールド
+            compression: None / "gzip" / "bz2" / "xz"
+            offset: 再開する場合は、前回のチェックポイント時点のファイルサイズ。None の場合は新規に書き込む
+        """
+        if compression is not None and compression not in COMPRESSORS:
+            raise ValueError(f"無効な圧縮形式です: {compression}")
+        self.fmt = fmt
+        self.fields = fields
+        self.compression = compression
+        if offset is None:
+            self._file = open(filename, "wb")
+            self._header = fmt == "csv"
+        else:
+            # チェックポイントより後に書かれた (途中の) バッチを切り捨ててから追記する
+            self._file = open(filename, "r+b")
+            self._file.truncate(offset)
+            self._file.seek(offset)
+            self._header = False
+
+    def write_batch(self, rows):
+        """行のバッチを書き込み、チェックポイントに記録するファイルサイズを返す"""
+        data = _ENCODERS[self.fmt](rows, self.fields, self._header)
+        self._header = False
+        if self.compression:
+            with COMPRESSORS[self.compression](self._file) as stream:
+                stream.write(data)
+        else:
+            self._file.write(data)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return self._file.tell()
+
+    def close(self):
+        self._file.close()
+
+
+class _ParquetExporter:
+    """
+    Parquet を rows_per_file 件ごとのファイルに、バッチごとに行グループとして書き込むライター
+
+    Parquet ファイルはフッターを書き込む (閉じる) まで読み込めず、追記もできないため、書き込み中のファイルは
+    "<ファイル名>.tmp" とし、閉じてから名前を変えてチェックポイントに記録する。2つ目以降のファイルは
+    "<名前>.<番号>.parquet" に書き込む (同じディレクトリの Parquet ファイルは pyarrow.dataset などでまとめて読み込める)。
+    中断した場合は、チェックポイントに記録した番号のファイルから書き直す。
+    """
+
+    # write_batch の戻り値を記録するチェックポイントのキー
+    checkpoint_key = "part"
+
+    def __init__(self, filename, fields, compression=None, part=0, rows_per_file=EXPORT_PARQUET_FILE_ROWS):
+        """
+        Args:
+            filename: 出力ファイル名
+            fields: 出力するフィールド
+            compression: Parquet の圧縮コーデック (None の場合は snappy)
+            part: 書き込みを始めるファイルの番号 (0 の場合は filename に書き込む)
+            rows_per_file: 1つのファイルに書き込む件数
+        """
+        if pa is None:
+            raise ImportError("Parquet 形式で出力するには pyarrow をインストールしてください (pip install pyarrow)")
+        self.fields = fields
+        self.schema = pa.schema([(f, pa.timestamp("ms") if f in DATETIME_FIELDS else pa.string()) for f in fields])
+        self.filename = filename
+        self.compression = compression or "snappy"
+        self.rows_per_file = rows_per_file
+        self.part = part
+        self._writer = None
+        self._rows = 0
+
+    def part_path(self, part):
+        """番号に対応するファイル名"""
+        if not part:
+            return str(self.filename)
+        path = Path(self.filename)
+        return str(path.with_name(f"{path.stem}.{part}{path.suffix}"))
+
+    def write_batch(self, rows):
+        """
+        行のバッチを書き込む
+
+        Returns:
+            int | None: ファイルを閉じた場合は次に書き込むファイルの番号。書き込み中のファイルに追加しただけの場合は None
+        """
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(f"{self.part_path(self.part)}.tmp", self.schema,
+                                            compression=self.compression)
+        columns = {f: [row.get(f) if f in DATETIME_FIELDS else _to_text(row.get(f)) for row in rows]
+                   for f in self.fields}
+        self._writer.write_table(pa.table(columns, schema=self.schema))
+        self._rows += len(rows)
+        if self._rows < self.rows_per_file:
+            return None
+        self._finish()
+        return self.part
+
+    def _finish(self):
+        path = self.part_path(self.part)
+        self._writer.close()
+        os.replace(f"{path}.tmp", path)
+        self._writer = None
+        self._rows = 0
+        self.part += 1
+
+    def close(self):
+        if self._writer is not None:
+            self._finish()
+
+
+def _checkpoint_path(filename):
+    return f"{filename}.checkpoint.json"
+
+
+def _load_checkpoint(filename):
+    """チェックポイントを読み込む。ない場合は None"""
+    path = _checkpoint_path(filename)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_checkpoint(filename, checkpoint):
+    """チェックポイントを書き込む (一時ファイルに書いてから置き換える)"""
+    path = _checkpoint_path(filename)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+    os.replace(f"{path}.tmp", path)
+
+
+def _id_range_query(start_id=None, end_id=None):
+    """_id が start_id より大きく end_id 以下のドキュメントを選ぶクエリ"""
+    condition = {}
+    if start_id is not None:
+        condition["$gt"] = start_id
+    if end_id is not None:
+        condition["$lte"] = end_id
+    return {"_id": condition} if condition else {}
+
+
+def export_collection(collection_name, filename, fmt="ndjson", fields=None, compression=None,
+                      batch_size=EXPORT_BATCH_SIZE, start_id=None, end_id=None, resume=True,
+                      parquet_file_rows=EXPORT_PARQUET_FILE_ROWS):
+    """
+    コレクションを _id の順にカーソルでバッチ単位に読み込み、ファイルに書き出す
+
+    メモリに保持するのは1バッチ分だけなので、使用量はコレクションの大きさに依存しない。
+    バッチを書き込むたびに最後の _id とファイルサイズ (Parquet の場合はファイルを閉じるたびに次のファイルの番号) を
+    チェックポイントに記録し、中断した場合は resume=True で続きから再開できる。
+
+    Args:
+        collection_name: 出力するコレクション名
+        filename: 出力ファイル名
+        fmt: 出力形式 ("csv" / "ndjson" / "parquet")
+        fields: 出力するフィールド (None の場合は DEFAULT_EXPORT_FIELDS)
+        compression: CSV / NDJSON は None / "gzip" / "bz2" / "xz"、Parquet はコーデック名 ("snappy" / "zstd" など)
+        batch_size: 1バッチの件数
+        start_id: この _id より後のドキュメントから出力する (None の場合は先頭から)
+        end_id: この _id までのドキュメントを出力する (None の場合は最後まで)
+        resume: チェックポイントがあれば続きから再開する
+        parquet_file_rows: Parquet の場合に1つのファイルに書き込む件数
+
+    Returns:
+        dict: {"filename", "rows", "last_id", "completed"}
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"無効な出力形式です: {fmt}")
+    fields = fields or DEFAULT_EXPORT_FIELDS
+
+    checkpoint = _load_checkpoint(filename) if resume else None
+    if checkpoint and checkpoint.get("completed"):
+        logger.info(f"出力済みのためスキップします: {filename} ({checkpoint['rows']}件)")
+        return {"filename": filename, "rows": checkpoint["rows"], "last_id": checkpoint["last_id"], "completed": True}
+    if checkpoint:
+        start_id = ObjectId(checkpoint["last_id"]) if checkpoint["last_id"] else start_id
+        logger.info(f"チェックポイントから再開します: {filename} ({checkpoint['rows']}件出力済み)")
+    else:
+        checkpoint = {"last_id": None, "rows": 0, "offset": None, "part": 0, "completed": False}
+
+    if fmt == "parquet":
+        exporter = _ParquetExporter(filename, fields, compression, part=checkpoint["part"],
+                                    rows_per_file=parquet_file_rows)
+    else:
+        exporter = _TextExporter(filename, fmt, fields, compression, offset=checkpoint["offset"])
+
+    projection = {f: 1 for f in fields}
+    if "_id" not in fields:
+        projection["_id"] = 1
+    cursor = (get_database()[collection_name].find(_id_range_query(start_id, end_id), projection)
+              .sort("_id", 1).batch_size(batch_size))
+    try:
+        batch = []
+        for doc in cursor:
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                _write_batch(exporter, filename, checkpoint, batch)
+                batch = []
+        if batch:
+            _write_batch(exporter, filename, checkpoint, batch)
+    finally:
+        cursor.close()
+        exporter.close()
+
+    checkpoint["completed"] = True
+    _save_checkpoint(filename, checkpoint)
+    logger.info(f"出力完了: collection={collection_name}, file={filename}, {checkpoint['rows']}件")
+    return {"filename": filename, "rows": checkpoint["rows"], "last_id": checkpoint["last_id"], "completed": True}
+
+
+def _write_batch(exporter, filename, checkpoint, batch):
+    """バッチを書き込んでチェックポイントを更新する"""
+    position = exporter.write_batch(batch)
+    checkpoint["rows"] += len(batch)
+    checkpoint["last_id"] = str(batch[-1]["_id"])
+    if position is None:
+        # 書き込み中の Parquet ファイルは閉じるまで読み込めないため、閉じたときにまとめて記録する
+        return
+    checkpoint[exporter.checkpoint_key] = position
+    _save_checkpoint(filename, checkpoint)
+    logger.debug(f"出力中: {filename} ({checkpoint['rows']}件)")
+
+
+def split_id_ranges(collection_name, partitions, sample_size_per_partition=100):
+    """
+    コレクションを件数がほぼ均等になるように _id の範囲に分割する
+
+    $sample で取得した _id の分位点を境界にするため、コレクション全体を走査しない。
+
+    Args:
+        collection_name: コレクション名
+        partitions: 分割数
+        sample_size_per_partition: 分割1つあたりのサンプル数
+
+    Returns:
+        list: (start_id, end_id) のリスト。start_id は含まず end_id は含む (None は端を表す)
+    """
+    samples = sorted(doc["_id"] for doc in get_database()[collection_name].aggregate(
+        [{"$sample": {"size": partitions * sample_size_per_partition}}, {"$project": {"_id": 1}}]))
+    boundaries = []
+    for i in range(1, partitions):
+        if samples:
+            boundary = samples[min(len(samples) - 1, i * len(samples) // partitions)]
+            if not boundaries or boundary != boundaries[-1]:
+                boundaries.append(boundary)
+    edges = [None] + boundaries + [None]
+    return list(zip(edges[:-1], edges[1:]))
+
+
+def part_filename(filename, index):
+    """分割出力のファイル名 (例: articles.ndjson.gz -> articles.part000.ndjson.gz)"""
+    path = Path(filename)
+    name, dot, suffixes = path.name.partition(".")
+    return str(path.with_name(f"{name}.part{index:03d}{dot}{suffixes}"))
+
+
+def export_collection_parallel(collection_name, filename, fmt="ndjson", partitions=4, processes=None, **kwargs):
+    """
+    コレクションを _id の範囲に分割し、複数のプロセスで並行して出力する
+
+    分割ごとに part_filename のファイルとチェックポイントを作るため、中断した場合は同じ引数で
+    再実行すると、完了していない分割だけが続きから出力される。
+
+    Args:
+        collection_name: 出力するコレクション名
+        filename: 出力ファイル名 (分割ごとに part_filename で番号を付ける)
+        fmt: 出力形式
+        partitions: 分割数
+        processes: プロセス数 (None の場合は partitions)
+        **kwargs: export_collection に渡す引数 (fields, compression, batch_size, resume)
+
+    Returns:
+        list: 分割ごとの export_collection の結果
+    """
+    ranges = split_id_ranges(collection_name, partitions)
+    # pymongo の接続は fork に対応していないため、子プロセスは spawn で起動する
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=processes or len(ranges), mp_context=context) as executor:
+        futures = [executor.submit(export_collection, collection_name, part_filename(filename, i), fmt,
+                                   start_id=start_id, end_id=end_id, **kwargs)
+                   for i, (start_id, end_id) in enumerate(ranges)]
+        results = [future.result() for future in futures]
+    logger.info(f"並行出力完了: collection={collection_name}, {len(results)}分割, "
+                f"{sum(r['rows'] for r in results)}件")
+    return results
+
+
 def convert_to_csv(data, filename):
     """データをCSVファイルに変換する
 
     Args:
-        data: 変換対象のデータ (辞書のリスト)
+        data: 変換対象のデータ (辞書のイテラブル。1件ずつ書き込み、先頭のデータのキーを列にする)
         filename: 出力ファイル名 (文字列)
     """
-    pass
+    writer = None
+    with open(filename, "w", encoding="utf-8", newline="") as f:
+        for row in data:
+            if writer is None:
+                writer = csv.DictWriter(f, fieldnames=list(row), extrasaction="ignore")
+                writer.writeheader()
+            writer.writerow({k: _to_text(v) for k, v in row.items()})
+    logger.info(f"CSVファイルに変換しました: {filename}")
+
 
 def convert_to_json(data, filename):
-    """データをJSONファイルに変換する
+    """データをJSONファイル (配列) に変換する
 
     Args:
-        data: 変換対象のデータ (辞書のリスト)
+        data: 変換対象のデータ (辞書のイテラブル。1件ずつ書き込むためリストにする必要はない)
         filename: 出力ファイル名 (文字列)
     """
-    pass
\ No newline at end of file
+    with open(filename, "w", encoding="utf-8") as f:
+        f.write("[")
+        for i, row in enumerate(data):
+            f.write(("," if i else "") + "\n" + json.dumps(row, ensure_ascii=False, default=_json_default))
+        f.write("\n]\n")
+    logger.info(f"JSONファイルに変換しました: {filename}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="記事のコレクションをファイルに出力する")
+    parser.add_argument("collection")
+    parser.add_argument("filename")
+    parser.add_argument("--format", choices=FORMATS, default="ndjson")
+    parser.add_argument("--compression", default=None, help="gzip / bz2 / xz (Parquet はコーデック名)")
+    parser.add_argument("--fields", default=None, help="出力するフィールド (カンマ区切り)")
+    parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE)
+    parser.add_argument("--partitions", type=int, default=1, help="2以上の場合は _id の範囲に分割して並行出力する")
+    parser.add_argument("--no-resume", action="store_true", help="チェックポイントを無視して最初から出力する")
+    args = parser.parse_args()
+
+    options = {
+        "fields": args.fields.split(",") if args.fields else None,
+        "compression": args.compression,
+        "batch_size": args.batch_size,
+        "resume": not args.no_resume,
+    }
+    if args.partitions > 1:
+        export_collection_parallel(args.collection, args.filename, args.format, partitions=args.partitions, **options)
+    else:
+        export_collection(args.collection, args.filename, args.format, **options)
@@ -1,13 +1,29 @@
 import os
+import argparse
 import atexit
-from pymongo import MongoClient, ReturnDocument, ASCENDING
-from config import MONGODB_URI, MONGODB_DB
+import threading
+from collections import Counter
+from datetime import datetime
+from pymongo import MongoClient, ReturnDocument, ASCENDING, UpdateOne
+from pymongo.errors import BulkWriteError
+from config import (MONGODB_URI, MONGODB_DB, BULK_WRITE_BATCH_SIZE, BULK_WRITE_FLUSH_INTERVAL, ROLLUP_ENABLED,
+                    ROLLUP_COLLECTION)
 from loggings.logger import get_logger
+from utils.metrics import metrics
 from typing import Union
 from models.article import Article
 
 logger = get_logger(__name__)
 _client = None
+_bulk_writers = {}  # コレクション名 -> BulkWriter
+_bulk_writers_lock = threading.Lock()
+
+# ロールアップの単位ごとの (bucket の書式, key にするフィールド)
+ROLLUP_UNITS = {
+    "day": ("%Y-%m-%d", None),
+    "hour": ("%Y-%m-%d %H:00", None),
+    "author": ("%Y-%m-%d", "author"),  # 日ごと・配信元ごと
+}
 
 
 def get_database():
@@ -40,9 +56,53 @@ def get_database():
         raise
 
 
+def ensure_ttl_index(collection, field: str, expire_after_seconds: int):
+    """
+    field の TTL インデックスを作成する (作成済みで保持期間が異なる場合は collMod で変更する)
+
+    create_index は同じキーのインデックスがオプション違いで存在すると IndexOptionsConflict になるため、
+    保持期間の設定を変更した場合は既存のインデックスの expireAfterSeconds だけを書き換える。
+    TTL ではない同じキーのインデックスがある場合は削除して作り直す。
+
+    Args:
+        collection: インデックスを作成するコレクション
+        field: 日時を保存しているフィールド名
+        expire_after_seconds: field の日時からドキュメントを削除するまでの秒数
+    """
+    for name, info in collection.index_information().items():
+        if info.get("key") != [(field, ASCENDING)]:
+            continue
+        current = info.get("expireAfterSeconds")
+        if current == expire_after_seconds:
+            return
+        if current is not None:
+            collection.database.command({"collMod": collection.name,
+                                         "index": {"name": name, "expireAfterSeconds": expire_after_seconds}})
+            logger.info(f"TTLインデックスの保持期間を変更しました: {collection.name}.{field} "
+                        f"{current}秒 -> {expire_after_seconds}秒")
+            return
+        collection.drop_index(name)
+        logger.info(f"TTLインデックスに作り直すため、インデックスを削除しました: {collection.name}.{name}")
+        break
+    collection.create_index([(field, ASCENDING)], expireAfterSeconds=expire_after_seconds, background=True)
+
+
+def _to_document(data: Union[Article, dict]):
+    """Article または辞書を保存用の辞書に変換する。無効な型の場合は None"""
+    if isinstance(data, Article):
+        data_dict = data.model_dump()
+        data_dict['url'] = str(data_dict['url'])  # url を文字列に変換
+        return data_dict
+    if isinstance(data, dict):
+        return data
+    return None
+
+
 def save_data(data: Union[Article, dict], collection_name: str = os.environ.get("MONGODB_COLLECTION")):
     """データをMongoDBに保存する
 
+    ROLLUP_ENABLED が有効な場合は、保存した記事の分だけ記事数のロールアップも更新する。
+
     Args:
         data: 保存するデータ (Articleオブジェクトまたは辞書)
         collection_name: コレクション名
@@ -57,17 +117,15 @@ def save_data(data: Union[Article, dict], collection_name: str = os.environ.get(
     try:
         collection = db[collection_name]
 
-        if isinstance(data, Article):
-            data_dict = data.model_dump()
-            data_dict['url'] = str(data_dict['url']) #url を文字列に変換
-        elif isinstance(data, dict):
-            data_dict = data
-        else:
+        data_dict = _to_document(data)
+        if data_dict is None:
             logger.error(f"無効なデータ型: {type(data)}")
             return False
 
         result = collection.insert_one(data_dict)
         logger.info(f"データが保存されました。collection={collection_name}, inserted_id={result.inserted_id}")
+        if ROLLUP_ENABLED:
+            _apply_rollup_change(collection_name, None, data_dict)
         return True
 
     except Exception as e:
@@ -78,6 +136,8 @@ def save_data(data: Union[Article, dict], collection_name: str = os.environ.get(
 def update_data(filter_query: dict, update_data: dict, collection_name: str = os.environ.get("MONGODB_COLLECTION"), upsert: bool = False):
     """データを更新する
 
+    ROLLUP_ENABLED が有効な場合は、更新前後の記事を読み込み、公開日時や配信元が変わった分だけロールアップも更新する。
+
     Args:
         collection_name: コレクション名
         filter_query: 更新対象を絞り込むためのクエリ (辞書)
@@ -94,18 +154,30 @@ def update_data(filter_query: dict, update_data: dict, collection_name: str = os
     collection = db[collection_name]
 
     try:
+        before = collection.find_one(filter_query, _ROLLUP_PROJECTION) if ROLLUP_ENABLED else None
         result = collection.update_one(filter_query, update_data, upsert=upsert)
         logger.info(
             f"データが更新されました。collection={collection_name}, matched_count={result.matched_count}, modified_count={result.modified_count}, upserted_id={result.upserted_id}")
-        return result
     except Exception as e:
         logger.error(f"データの更新に失敗しました: {e}")
         return None
 
+    document_id = result.upserted_id if result.upserted_id is not None else (before or {}).get("_id")
+    if ROLLUP_ENABLED and document_id is not None and (result.modified_count or result.upserted_id is not None):
+        try:
+            after = collection.find_one({"_id": document_id}, _ROLLUP_PROJECTION)
+        except Exception as e:
+            logger.error(f"ロールアップ用の更新後のデータの取得に失敗しました (rebuild_rollups で再集計できます): {e}")
+        else:
+            _apply_rollup_change(collection_name, before, after)
+    return result
+
 
 def delete_data(filter_query: dict, collection_name: str = os.environ.get("MONGODB_COLLECTION")):
     """データを削除する
 
+    削除した記事はロールアップから差し引かないため、必要な場合は rebuild_rollups で再集計する。
+
     Args:
         collection_name: コレクション名
         filter_query: 削除対象を絞り込むためのクエリ (辞書)
@@ -128,12 +200,367 @@ def delete_data(filter_query: dict, collection_name: str = os.environ.get("MONGO
         return None
 
 
+class BulkWriter:
+    """
+    記事をバッファリングし、件数または時間でまとめて MongoDB に書き込むクラス
+
+    書き込みは url をキーにした upsert を順序なしの bulk_write で行う。再取得した記事は
+    重複キーエラーにならず更新され、内容が同じ場合は変更なしとして集計される。
+    フラッシュはバックグラウンドスレッドで行うため、add() はクロール処理を待たせない。
+    before_write のフックも同じスレッドでバッチ単位に呼ばれる。
+    ROLLUP_ENABLED が有効な場合は、書き込んだバッチの分だけ記事数のロールアップも更新する。
+    """
+
+    def __init__(self, collection_name: str, batch_size: int = BULK_WRITE_BATCH_SIZE,
+                 flush_interval: float = BULK_WRITE_FLUSH_INTERVAL, before_write=()):
+        """
+        Args:
+            collection_name: 書き込み先のコレクション名
+            batch_size: この件数に達したらフラッシュする
+            flush_interval: 最後のフラッシュからこの秒数が経過したらフラッシュする
+            before_write: 書き込み前に (コレクション名, ドキュメントのリスト) を受け取って呼ばれる関数のリスト。
+                ドキュメントを直接書き換えて保存内容を変更できる
+        """
+        if not collection_name:
+            raise ValueError("MONGODB_COLLECTION 環境変数が設定されていません。")
+        self.collection_name = collection_name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.stats = {"inserted": 0, "updated": 0, "unchanged": 0, "failed": 0}
+        self.before_write = list(before_write)
+
+        self._buffer = {}  # url -> ドキュメント (同じURLはバッチ内で最新のものだけ残す)
+        self._buffer_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+
+        collection = get_database()[collection_name]
+        collection.create_index([("url", ASCENDING)], unique=True, background=True)
+
+        self._thread = threading.Thread(target=self._run, name=f"BulkWriter-{collection_name}", daemon=True)
+        self._thread.start()
+
+    def add(self, data: Union[Article, dict]):
+        """
+        記事をバッファに追加する
+
+        Args:
+            data: 保存するデータ (Articleオブジェクトまたは url を含む辞書)
+
+        Returns:
+            bool: バッファに追加できた場合は True
+        """
+        data_dict = _to_document(data)
+        if data_dict is None or not data_dict.get('url'):
+            logger.error(f"無効なデータ型: {type(data)}")
+            return False
+        with self._buffer_lock:
+            self._buffer[data_dict['url']] = data_dict
+            buffered = len(self._buffer)
+        if buffered >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    def _run(self):
+        """一定間隔、またはバッファが batch_size に達したときにフラッシュする"""
+        while not self._closed:
+            self._wakeup.wait(timeout=self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        """
+        バッファの内容を書き込む
+
+        Returns:
+            dict: 今回のフラッシュの inserted / updated / unchanged / failed 件数
+        """
+        with self._flush_lock:
+            with self._buffer_lock:
+                documents, self._buffer = self._buffer, {}
+            counts = {"inserted": 0, "updated": 0, "unchanged": 0, "failed": 0}
+            if not documents:
+                return counts
+
+            for hook in self.before_write:
+                try:
+                    with metrics.timer(f"db_hook_{getattr(hook, '__name__', 'hook')}"):
+                        hook(self.collection_name, list(documents.values()))
+                except Exception as e:
+                    # フックの失敗で記事の保存を止めない
+                    logger.error(f"書き込み前の処理に失敗しました: {getattr(hook, '__name__', hook)} - {e}")
+
+            previous = _fetch_rollup_fields(self.collection_name, list(documents)) if ROLLUP_ENABLED else None
+            operations = [UpdateOne({"url": url}, {"$set": doc}, upsert=True) for url, doc in documents.items()]
+            try:
+                with metrics.timer("db_write"):
+                    result = get_database()[self.collection_name].bulk_write(operations, ordered=False)
+                details = {"nUpserted": result.upserted_count, "nMatched": result.matched_count,
+                           "nModified": result.modified_count, "writeErrors": []}
+            except BulkWriteError as e:
+                details = e.details
+                logger.error(f"一括書き込みで一部のデータの保存に失敗しました: {details.get('writeErrors', [])[:3]}")
+            except Exception as e:
+                # 接続エラーなどはバッファに戻し、次回のフラッシュで再試行する (新しいデータは上書きしない)
+                logger.error(f"一括書き込みに失敗しました。次回のフラッシュで再試行します: {e}")
+                with self._buffer_lock:
+                    for url, doc in documents.items():
+                        self._buffer.setdefault(url, doc)
+                return counts
+
+            counts["inserted"] = details.get("nUpserted", 0)
+            counts["updated"] = details.get("nModified", 0)
+            counts["unchanged"] = details.get("nMatched", 0) - details.get("nModified", 0)
+            counts["failed"] = len(details.get("writeErrors", []))
+            for key, value in counts.items():
+                self.stats[key] += value
+                metrics.inc("scraper_db_documents_total", value, collection=self.collection_name, result=key)
+            if previous is not None:
+                urls = list(documents)
+                failed = {urls[error["index"]] for error in details.get("writeErrors", [])}
+                with metrics.timer("db_rollups"):
+                    apply_rollups(self.collection_name, previous,
+                                  [doc for url, doc in documents.items() if url not in failed])
+            logger.info(f"一括書き込み完了: collection={self.collection_name}, {counts}")
+            return counts
+
+    def close(self):
+        """バックグラウンドスレッドを止め、残りのバッファを書き込む"""
+        self._closed = True
+        self._wakeup.set()
+        self._thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+
+
+def get_bulk_writer(collection_name: str = os.environ.get("MONGODB_COLLECTION"), before_write=()):
+    """
+    コレクションごとの BulkWriter を返す (プロセス内で共有)
+
+    Args:
+        collection_name: コレクション名
+        before_write: BulkWriter を作成するときに設定する書き込み前のフック (作成済みの場合は無視される)
+
+    Returns:
+        BulkWriter: 書き込み用の BulkWriter
+    """
+    with _bulk_writers_lock:
+        writer = _bulk_writers.get(collection_name)
+        if writer is None:
+            writer = BulkWriter(collection_name, before_write=before_write)
+            _bulk_writers[collection_name] = writer
+        return writer
+
+
+def flush_bulk_writers():
+    """すべての BulkWriter のバッファを書き込む"""
+    for writer in list(_bulk_writers.values()):
+        writer.flush()
+        logger.info(f"一括書き込みの累計: collection={writer.collection_name}, {writer.stats}")
+
+
+def rollup_keys(doc):
+    """
+    記事が数えられるロールアップのキーを返す
+
+    Args:
+        doc: 記事のドキュメント (published_at, author)
+
+    Returns:
+        list: (単位, bucket, key) のリスト。published_at がない記事は空のリスト
+    """
+    published_at = doc.get("published_at") if doc else None
+    if not isinstance(published_at, datetime):
+        return []
+    return [(unit, published_at.strftime(bucket_format), doc.get(field) if field else None)
+            for unit, (bucket_format, field) in ROLLUP_UNITS.items()]
+
+
+# ロールアップに関係するフィールド
+_ROLLUP_PROJECTION = {"url": 1, "published_at": 1, "author": 1}
+
+
+def _rollup_id(collection_name, unit, bucket, key):
+    """ロールアップのドキュメントの _id"""
+    return f"{collection_name}|{unit}|{bucket}|{key if key is not None else ''}"
+
+
+def _rollup_backfill_id(collection_name):
+    """rebuild_rollups で保存済みの記事を集計したことを示すドキュメントの _id"""
+    return _rollup_id(collection_name, "backfill", "", None)
+
+
+def _fetch_rollup_fields(collection_name, urls):
+    """
+    書き込み前の記事のうち、ロールアップに関係するフィールドだけを取得する
+
+    Returns:
+        dict | None: url -> {"published_at", "author"}。取得に失敗した場合は None (ロールアップを更新しない)
+    """
+    try:
+        cursor = get_database()[collection_name].find({"url": {"$in": urls}}, {**_ROLLUP_PROJECTION, "_id": 0})
+        return {doc["url"]: doc for doc in cursor}
+    except Exception as e:
+        logger.error(f"ロールアップ用の既存データの取得に失敗しました。今回のバッチは集計に反映しません: {e}")
+        return None
+
+
+def _apply_rollup_change(collection_name, before, after):
+    """
+    1件の記事の書き込み (save_data / update_data) の分だけロールアップを更新する
+
+    Args:
+        collection_name: 記事を保存したコレクション名
+        before: 書き込み前の記事。新規の記事は None
+        after: 書き込み後の記事
+    """
+    if not after or not after.get("url"):
+        return
+    try:
+        with metrics.timer("db_rollups"):
+            apply_rollups(collection_name, {after["url"]: before} if before else {}, [after])
+    except Exception as e:
+        # ロールアップの失敗で記事の保存を失敗扱いにしない
+        logger.error(f"ロールアップの更新に失敗しました (rebuild_rollups で再集計できます): {e}")
+
+
+def _get_rollup_collection():
+    """ロールアップのコレクションを返す (検索用のインデックスを作成する)"""
+    collection = get_database()[ROLLUP_COLLECTION]
+    collection.create_index([("collection", ASCENDING), ("unit", ASCENDING), ("bucket", ASCENDING)],
+                            background=True)
+    return collection
+
+
+def apply_rollups(collection_name, previous, documents):
+    """
+    書き込んだ記事の分だけロールアップを $inc で更新する
+
+    新しく保存した記事は +1、日時や配信元が変わった記事は変更前のキーを -1 して変更後のキーを +1 する。
+
+    Args:
+        collection_name: 記事を保存したコレクション名
+        previous: 書き込み前の記事 (url -> ドキュメント)。新規の記事は含まない
+        documents: 書き込みに成功した記事のドキュメントのリスト
+    """
+    deltas = Counter()
+    for doc in documents:
+        old_doc = previous.get(doc["url"])
+        deltas.update(rollup_keys(doc))
+        deltas.subtract(rollup_keys(old_doc))
+
+    operations = [
+        UpdateOne({"_id": _rollup_id(collection_name, unit, bucket, key)},
+                  {"$inc": {"count": delta},
+                   "$setOnInsert": {"collection": collection_name, "unit": unit, "bucket": bucket, "key": key}},
+                  upsert=True)
+        for (unit, bucket, key), delta in deltas.items() if delta
+    ]
+    if not operations:
+        return
+    try:
+        _get_rollup_collection().bulk_write(operations, ordered=False)
+        logger.debug(f"ロールアップを更新しました: collection={collection_name}, {len(operations)}件")
+    except Exception as e:
+        logger.error(f"ロールアップの更新に失敗しました (rebuild_rollups で再集計できます): {e}")
+
+
+def rollups_ready(collection_name):
+    """
+    ロールアップだけで記事数を数えられるかどうか (rebuild_rollups で保存済みの記事を集計済みか) を返す
+
+    書き込み時の $inc はロールアップを有効にした後に書き込んだ記事しか数えないため、
+    既存の記事のあるコレクションは rebuild_rollups でバックフィルするまで集計パイプラインで数える。
+    """
+    return _get_rollup_collection().find_one({"_id": _rollup_backfill_id(collection_name)}, {"_id": 1}) is not None
+
+
+def get_rollups(collection_name, unit, start, end):
+    """
+    期間内のロールアップを読み込む (読み込む件数は記事数ではなくバケット数に比例する)
+
+    Args:
+        collection_name: 記事を保存しているコレクション名
+        unit: 集計単位 ("day" / "hour" / "author")
+        start: 集計開始日時
+        end: 集計終了日時
+
+    Returns:
+        list: [{"bucket", "key", "count"}, ...] (bucket の昇順)
+    """
+    bucket_format = ROLLUP_UNITS[unit][0]
+    cursor = _get_rollup_collection().find(
+        {"collection": collection_name, "unit": unit,
+         "bucket": {"$gte": start.strftime(bucket_format), "$lte": end.strftime(bucket_format)},
+         "count": {"$gt": 0}},
+        {"_id": 0, "bucket": 1, "key": 1, "count": 1},
+    ).sort("bucket", ASCENDING)
+    return list(cursor)
+
+
+def rebuild_rollups(collection_name):
+    """
+    保存済みの記事からロールアップを作り直す (既存データのバックフィル、または集計のずれの修正に使う)
+
+    集計は MongoDB の集計パイプラインで単位ごとに行い、結果だけを受け取って置き換える。
+
+    Args:
+        collection_name: 記事を保存しているコレクション名
+
+    Returns:
+        int: 作成したロールアップのドキュメント数
+    """
+    collection = get_database()[collection_name]
+    documents = []
+    for unit, (bucket_format, field) in ROLLUP_UNITS.items():
+        group_id = {"bucket": {"$dateToString": {"format": bucket_format, "date": "$published_at"}}}
+        if field:
+            group_id["key"] = f"${field}"
+        pipeline = [
+            {"$match": {"published_at": {"$type": "date"}}},
+            {"$group": {"_id": group_id, "count": {"$sum": 1}}},
+        ]
+        for row in collection.aggregate(pipeline, allowDiskUse=True):
+            bucket, key = row["_id"]["bucket"], row["_id"].get("key")
+            documents.append({"_id": _rollup_id(collection_name, unit, bucket, key), "collection": collection_name,
+                              "unit": unit, "bucket": bucket, "key": key, "count": row["count"]})
+
+    count = len(documents)
+    # バックフィル済みの印 (unit が集計単位ではないため get_rollups では読まれない)
+    documents.append({"_id": _rollup_backfill_id(collection_name), "collection": collection_name, "unit": "backfill",
+                      "rebuilt_at": datetime.now()})
+
+    rollups = _get_rollup_collection()
+    rollups.delete_many({"collection": collection_name})
+    rollups.insert_many(documents, ordered=False)
+    logger.info(f"ロールアップを再作成しました: collection={collection_name}, {count}件")
+    return count
+
+
 def close_mongodb_connection():
-    """MongoDB 接続を閉じる"""
+    """バッファ済みのデータを書き込んでから MongoDB 接続を閉じる"""
     global _client
+    with _bulk_writers_lock:
+        writers = list(_bulk_writers.values())
+        _bulk_writers.clear()
+    for writer in writers:
+        try:
+            writer.close()
+        except Exception as e:
+            logger.error(f"終了時の一括書き込みに失敗しました: {e}")
     if _client:
         _client.close()
         logger.info("MongoDB 接続を閉じました。")
 
 
-atexit.register(close_mongodb_connection)
\ No newline at end of file
+atexit.register(close_mongodb_connection)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="MongoDB の管理コマンド")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    rebuild_parser = subparsers.add_parser("rebuild-rollups", help="保存済みの記事からロールアップを作り直す")
+    rebuild_parser.add_argument("collection", nargs="?", default=os.environ.get("MONGODB_COLLECTION"))
+    args = parser.parse_args()
+
+    if args.command == "rebuild-rollups":
+        rebuild_rollups(args.collection)
@@ -0,0 +1,314 @@
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+import numpy as np
+from config import (DEDUP_ENABLED, DEDUP_THRESHOLD, DEDUP_NUM_PERM, DEDUP_BANDS, DEDUP_SHINGLE_SIZE,
+                    DEDUP_WINDOW_DAYS)
+from loggings.logger import get_logger
+from utils.database import get_database
+
+logger = get_logger(__name__)
+
+_duplicate_indexes = {}  # コレクション名 -> DuplicateIndex
+_duplicate_indexes_lock = threading.Lock()
+
+# シングルのローリングハッシュに使う基数 (uint32 の桁あふれをそのまま剰余として使う)
+_BASE = np.uint32(0x01000193)
+_EMPTY = np.iinfo(np.uint32).max
+
+# 索引の読み込み時にまとめて署名を計算する記事数
+_LOAD_CHUNK_SIZE = 512
+
+
+def _mix(hashes):
+    """ハッシュ値の各ビットを撹拌する (MurmurHash3 の fmix32)。hashes を直接書き換える"""
+    hashes ^= hashes >> np.uint32(16)
+    hashes *= np.uint32(0x85EBCA6B)
+    hashes ^= hashes >> np.uint32(13)
+    hashes *= np.uint32(0xC2B2AE35)
+    hashes ^= hashes >> np.uint32(16)
+    return hashes
+
+
+class DuplicateIndex:
+    """
+    記事本文の MinHash 署名を LSH (バンド分割) で索引し、近似重複の記事を検出するクラス
+
+    本文を文字 n-gram (シングル) に分割し、NumPy でまとめてハッシュ化して MinHash 署名を作る。
+    署名は One Permutation Hashing (ハッシュ値を num_perm 個のビンに振り分け、ビンごとの最小値を取る) で計算するため、
+    計算量はシングル数に比例し、署名長には比例しない。
+    署名をバンドに分けたバケットで候補を絞り込み、署名の一致率 (推定 Jaccard 係数) が閾値以上の
+    記事を重複とみなす。索引には重複でない記事 (正規の記事) だけを登録するため、重複の参照先は常に正規の記事になる。
+    """
+
+    def __init__(self, threshold=DEDUP_THRESHOLD, num_perm=DEDUP_NUM_PERM, bands=DEDUP_BANDS,
+                 shingle_size=DEDUP_SHINGLE_SIZE):
+        """
+        Args:
+            threshold: 重複とみなす推定 Jaccard 係数
+            num_perm: MinHash の署名長
+            bands: LSH のバンド数 (num_perm を割り切れること)
+            shingle_size: シングルの文字数
+        """
+        if num_perm % bands:
+            raise ValueError(f"DEDUP_NUM_PERM ({num_perm}) は DEDUP_BANDS ({bands}) で割り切れる必要があります")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.shingle_size = shingle_size
+
+        # バンド内の値をまとめてキーにするための重み (奇数)
+        rng = np.random.default_rng(0)
+        self._band_weights = rng.integers(1, 2 ** 63, size=num_perm // bands, dtype=np.uint64) | np.uint64(1)
+
+        self._signatures = {}  # URL -> (署名, バンドごとのキー)
+        self._buckets = [defaultdict(set) for _ in range(bands)]  # バンドごとの (キー -> URL の集合)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._signatures)
+
+    def signatures(self, texts):
+        """
+        複数の本文の MinHash 署名をまとめて計算する
+
+        本文を連結した1つの配列上でシングルのハッシュを計算し、記事をまたぐシングルを除いてから
+        (記事, ビン) ごとの最小値を np.minimum.at で求めるため、記事数に比例する Python の処理はほとんどない。
+
+        Args:
+            texts: 記事本文のリスト
+
+        Returns:
+            list: uint32 の署名 (numpy.ndarray) のリスト。シングルの文字数より短い本文は None
+        """
+        texts = [text or "" for text in texts]
+        k = self.shingle_size
+        lengths = np.fromiter((len(text) for text in texts), dtype=np.int64, count=len(texts))
+        counts = np.maximum(lengths - k + 1, 0)  # 記事ごとのシングル数
+        result = [None] * len(texts)
+        if not counts.any():
+            return result
+
+        codes = np.frombuffer("".join(texts).encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+        total = len(codes) - k + 1
+        hashes = codes[:total].copy()
+        for offset in range(1, k):
+            hashes *= _BASE
+            hashes += codes[offset:offset + total]
+        hashes = _mix(hashes)
+
+        if len(texts) == 1:
+            doc_ids = np.zeros(total, dtype=np.int64)
+        else:
+            # 記事の終端をまたがないシングルだけを残す
+            starts = np.cumsum(lengths) - lengths
+            doc_ids = np.repeat(np.arange(len(texts)), lengths)[:total]
+            valid = np.arange(total) - starts[doc_ids] < counts[doc_ids]
+            hashes, doc_ids = hashes[valid], doc_ids[valid]
+
+        matrix = np.full((len(texts), self.num_perm), _EMPTY, dtype=np.uint32)
+        np.minimum.at(matrix.reshape(-1), doc_ids * self.num_perm + hashes % np.uint32(self.num_perm), hashes)
+        self._densify(matrix)
+        for doc_id in np.flatnonzero(counts):
+            result[doc_id] = matrix[doc_id]
+        return result
+
+    def _densify(self, matrix):
+        """
+        シングルが振り分けられなかった空のビンを、右隣 (循環) の空でないビンの値で埋める。
+        シングルが1つもない行はそのままにする。matrix を直接書き換える
+        """
+        empty = matrix == _EMPTY
+        if not empty.any():
+            return
+        width = self.num_perm
+        positions = np.arange(2 * width)
+        # 2周分並べ、各ビンから見て次に空でないビンの位置を右から累積最小値で求める
+        filled = np.where(np.tile(~empty, 2), positions, 2 * width)
+        next_filled = np.minimum.accumulate(filled[:, ::-1], axis=1)[:, ::-1][:, :width]
+        rows = next_filled[:, 0] < 2 * width
+        source = next_filled[rows] % width
+        matrix[rows] = np.take_along_axis(matrix[rows], source, axis=1)
+
+    def signature(self, text):
+        """
+        本文の MinHash 署名を計算する
+
+        Args:
+            text: 記事本文
+
+        Returns:
+            numpy.ndarray | None: uint32 の署名。シングルの文字数より短い本文は None
+        """
+        return self.signatures([text])[0]
+
+    def _band_keys(self, signatures):
+        """
+        署名ごとに、各バンドの値をまとめた 64 ビットのキーを計算する
+
+        Returns:
+            list: 署名ごとのキーのリスト (バンド数の整数)
+        """
+        if not signatures:
+            return []
+        bands = np.stack(signatures).reshape(len(signatures), self.bands, -1).astype(np.uint64)
+        # キーの衝突は候補が増えるだけで、類似度の確認で除かれる
+        return (bands * self._band_weights).sum(axis=2).tolist()
+
+    def _query(self, signature, keys, exclude=None):
+        """候補の中で最も類似度が高い記事の (URL, 類似度) を返す。閾値未満の場合は None"""
+        candidates = set()
+        for buckets, key in zip(self._buckets, keys):
+            bucket = buckets.get(key)
+            if bucket:
+                candidates |= bucket
+        candidates.discard(exclude)
+
+        if not candidates:
+            return None
+        urls = list(candidates)
+        similarities = (np.stack([self._signatures[url][0] for url in urls]) == signature).mean(axis=1)
+        best = int(similarities.argmax())
+        if similarities[best] < self.threshold:
+            return None
+        return urls[best], float(similarities[best])
+
+    def _add(self, url, signature, keys):
+        """署名を索引に登録する (同じURLが登録済みの場合は置き換える)"""
+        self._remove(url)
+        self._signatures[url] = (signature, keys)
+        for buckets, key in zip(self._buckets, keys):
+            buckets[key].add(url)
+
+    def _remove(self, url):
+        """URL を索引から削除する"""
+        entry = self._signatures.pop(url, None)
+        if entry is None:
+            return
+        for buckets, key in zip(self._buckets, entry[1]):
+            bucket = buckets.get(key)
+            if bucket is not None:
+                bucket.discard(url)
+                if not bucket:
+                    del buckets[key]
+
+    def _add_many(self, docs):
+        """保存済みの記事 ({"url", "content"}) をまとめて索引に登録する"""
+        entries = [(doc["url"], signature) for doc, signature in
+                   zip(docs, self.signatures([doc.get("content") for doc in docs])) if signature is not None]
+        keys = self._band_keys([signature for _, signature in entries])
+        with self._lock:
+            for (url, signature), band_keys in zip(entries, keys):
+                self._add(url, signature, band_keys)
+
+    def check_many(self, items):
+        """
+        記事が保存済みの記事 (または同じバッチ内の先の記事) の近似重複かどうかをまとめて判定し、
+        重複でない記事を索引に登録する
+
+        Args:
+            items: (URL, 記事本文) のリスト
+
+        Returns:
+            list: 記事ごとの判定結果。重複の場合は (正規の記事のURL, 推定類似度)、重複でない場合は None
+        """
+        signatures = self.signatures([text for _, text in items])
+        keys = iter(self._band_keys([signature for signature in signatures if signature is not None]))
+        results = []
+        with self._lock:
+            for (url, _), signature in zip(items, signatures):
+                duplicate = None
+                if signature is not None:
+                    band_keys = next(keys)
+                    duplicate = self._query(signature, band_keys, exclude=url)
+                    if duplicate is None:
+                        self._add(url, signature, band_keys)
+                    else:
+                        self._remove(url)
+                results.append(duplicate)
+        return results
+
+    def check(self, url, text):
+        """
+        記事が保存済みの記事の近似重複かどうかを判定し、重複でなければ索引に登録する
+
+        Args:
+            url: 記事のURL
+            text: 記事本文 (Article.content)
+
+        Returns:
+            tuple | None: 重複の場合は (正規の記事のURL, 推定類似度)。重複でない場合は None
+        """
+        return self.check_many([(url, text)])[0]
+
+    def load(self, collection_name, days=DEDUP_WINDOW_DAYS):
+        """
+        公開から days 日以内の保存済みの正規の記事を索引に読み込む
+
+        Args:
+            collection_name: 記事を保存しているコレクション名
+            days: 読み込む期間 (公開からの日数)
+        """
+        since = datetime.now() - timedelta(days=days)
+        cursor = get_database()[collection_name].find(
+            {"published_at": {"$gte": since}, "duplicate_of": None}, {"url": 1, "content": 1, "_id": 0})
+        chunk = []
+        for doc in cursor:
+            if doc.get("url"):
+                chunk.append(doc)
+            if len(chunk) >= _LOAD_CHUNK_SIZE:
+                self._add_many(chunk)
+                chunk = []
+        self._add_many(chunk)
+        logger.info(f"近似重複の索引に保存済みの記事を読み込みました: {len(self)}件 (collection={collection_name})")
+
+
+def get_duplicate_index(collection_name):
+    """
+    コレクションごとの DuplicateIndex を返す。初回呼び出し時に保存済みの記事を読み込み、
+    以降はプロセス内で共有する。
+
+    Args:
+        collection_name: 記事を保存しているコレクション名
+
+    Returns:
+        DuplicateIndex | None: 読み込み済みの索引。DEDUP_ENABLED が無効の場合は None
+    """
+    if not DEDUP_ENABLED:
+        return None
+    with _duplicate_indexes_lock:
+        index = _duplicate_indexes.get(collection_name)
+        if index is not None:
+            return index
+        index = DuplicateIndex()
+        try:
+            index.load(collection_name)
+        except Exception as e:
+            # 次回の呼び出しで再度読み込めるよう、失敗した索引は共有しない
+            logger.error(f"近似重複の索引の読み込みに失敗しました。今回の記事のみで判定します: {e}")
+            return index
+        _duplicate_indexes[collection_name] = index
+        return index
+
+
+def mark_duplicates(collection_name, documents):
+    """
+    BulkWriter の書き込み前フック。保存する記事の本文 (content) から近似重複を判定し、
+    重複の記事には正規の記事のURLを duplicate_of に設定する (重複でない記事は None)
+
+    Args:
+        collection_name: 記事を保存するコレクション名
+        documents: 保存する記事のドキュメントのリスト (直接書き換える)
+    """
+    index = get_duplicate_index(collection_name)
+    if index is None:
+        return
+    results = index.check_many([(doc["url"], doc.get("content")) for doc in documents])
+    duplicates = 0
+    for doc, duplicate in zip(documents, results):
+        doc["duplicate_of"] = duplicate[0] if duplicate else None
+        if duplicate:
+            duplicates += 1
+            logger.info(f"近似重複の記事を検出しました: {doc['url']} -> {duplicate[0]} (類似度: {duplicate[1]:.2f})")
+    if duplicates:
+        logger.info(f"近似重複の記事: {duplicates}件 / {len(documents)}件 (collection={collection_name})")
@@ -0,0 +1,64 @@
+import requests
+from requests.adapters import HTTPAdapter
+from config import HTTP_POOL_SIZE, HTTP_TIMEOUT
+from loggings.logger import get_logger
+from utils.network import get_random_user_agent
+from utils.metrics import metrics
+from utils.rate_limiter import get_rate_limiter
+
+logger = get_logger(__name__)
+
+
+class HttpFetcher:
+    """
+    コネクションプール付きのHTTPクライアント。
+    ブラウザを使わずにサーバーレンダリング済みのHTMLを取得するために使う。
+    リクエストはブラウザ経路と共有のレート制限 (utils.rate_limiter) に従って送る。
+    """
+
+    def __init__(self, pool_size=HTTP_POOL_SIZE, timeout=HTTP_TIMEOUT, user_agent=None, rate_limiter=None):
+        """
+        Args:
+            pool_size: ホストごとに保持するコネクション数 (並行取得数以上にする)
+            timeout: リクエストのタイムアウト秒数
+            user_agent: User-Agent。None の場合はランダムに生成する
+            rate_limiter: 使用する RateLimiter。None の場合はプロセス内で共有のものを使う
+        """
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            "User-Agent": user_agent or get_random_user_agent() or "Mozilla/5.0",
+            "Accept-Language": "ja,en;q=0.8",
+        })
+
+    def fetch(self, url):
+        """
+        URL の HTML を取得する
+
+        Args:
+            url: 取得するURL
+
+        Returns:
+            tuple | None: (ステータスコード, HTML文字列)。通信に失敗した場合は None
+        """
+        try:
+            with self.rate_limiter.request(url) as permit, metrics.timer("http_fetch"):
+                response = self.session.get(url, timeout=self.timeout)
+                permit.record(response.status_code, response.headers.get("Retry-After"))
+        except requests.RequestException as e:
+            metrics.inc("scraper_http_requests_total", status="error")
+            logger.warning(f"HTTP取得に失敗しました: {url} - {e}")
+            return None
+        metrics.inc("scraper_http_requests_total", status=response.status_code)
+        if not response.encoding or response.encoding.lower() == "iso-8859-1":
+            response.encoding = response.apparent_encoding
+        logger.debug(f"HTTP取得: {url} status={response.status_code} size={len(response.content)}")
+        return response.status_code, response.text
+
+    def close(self):
+        """セッションを閉じる"""
+        self.session.close()
@@ -0,0 +1,257 @@
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from config import METRICS_ENABLED, METRICS_FILE, METRICS_PORT
+from loggings.logger import get_logger
+
+logger = get_logger(__name__)
+
+# ヒストグラムのバケットの上限 (秒)
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# 各処理の所要時間を記録するヒストグラムの名前 (stage ラベルで処理を区別する)
+STAGE_SECONDS = "scraper_stage_seconds"
+
+_HELP = {
+    STAGE_SECONDS: "処理ごとの所要時間 (秒)",
+    "scraper_articles_total": "処理した記事数 (result: saved / failed, path: browser / http)",
+    "scraper_selector_lookups_total": "セレクタ候補による要素の取得 (result: hit / fallback / miss)",
+    "scraper_changes_detected_total": "変更を検知したページ数",
+    "scraper_db_documents_total": "一括書き込みしたドキュメント数 (result: inserted / updated / unchanged / failed)",
+    "scraper_http_requests_total": "HTTP経路のリクエスト数 (status: ステータスコード / error)",
+    "scraper_rate_limit_responses_total": "送信レートに反映した応答数 (result: ok / backoff)",
+    "scraper_recrawl_total": "再取得の予定の更新 (result: claimed / changed / unchanged / retired)",
+    "scraper_snapshots_total": "HTMLスナップショット (result: saved / deduplicated / rate_limited / dropped)",
+    "scraper_pickup_resolutions_total": "ピックアップページから記事本体のURLを求めた回数 (result: cached / fetched)",
+}
+
+
+class _Histogram:
+    """累積バケット・合計・件数を持つヒストグラム"""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # 最後は +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class _NullTimer:
+    """計測が無効な場合に使う何もしないコンテキストマネージャ"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class MetricsRegistry:
+    """
+    カウンタとヒストグラムを保持するレジストリ
+
+    enabled が False の場合は、timer() は共有の何もしないコンテキストマネージャを返し、
+    inc() / observe() は即座に戻るため、計測のオーバーヘッドはほぼない。
+    """
+
+    def __init__(self, enabled=METRICS_ENABLED, buckets=DEFAULT_BUCKETS):
+        """
+        Args:
+            enabled: 計測するかどうか
+            buckets: ヒストグラムのバケットの上限 (秒)
+        """
+        self.enabled = enabled
+        self.buckets = tuple(buckets)
+        self._counters = {}  # (名前, ラベル) -> 値
+        self._histograms = {}  # (名前, ラベル) -> _Histogram
+        self._lock = threading.Lock()
+
+    def inc(self, name, value=1, **labels):
+        """カウンタを増やす"""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        """ヒストグラムに値を記録する"""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram(self.buckets)
+            histogram.observe(value)
+
+    def timer(self, stage):
+        """
+        with ブロックの所要時間を scraper_stage_seconds{stage=...} に記録するコンテキストマネージャを返す
+
+        Args:
+            stage: 処理の名前 (goto / paginate / extract / detect_change / db_flush など)
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        return self._timer(stage)
+
+    @contextmanager
+    def _timer(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(STAGE_SECONDS, time.perf_counter() - start, stage=stage)
+
+    def snapshot(self):
+        """
+        現在の値のコピーを返す (実行ごとの差分を求めるのに使う)
+
+        Returns:
+            dict: {"counters": {(名前, ラベル): 値}, "stages": {stage: (件数, 合計秒数)}}
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            stages = {dict(labels)["stage"]: (h.count, h.sum) for (name, labels), h in self._histograms.items()
+                      if name == STAGE_SECONDS}
+        return {"counters": counters, "stages": stages}
+
+    def render(self):
+        """Prometheus のテキスト形式で出力する"""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, (list(h.counts), h.sum, h.count)) for key, h in self._histograms.items())
+
+        lines = []
+        described = set()
+
+        def describe(name, kind):
+            if name not in described:
+                described.add(name)
+                lines.append(f"# HELP {name} {_HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in counters:
+            describe(name, "counter")
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+        for (name, labels), (counts, total, count) in histograms:
+            describe(name, "histogram")
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = []
+    for key, value in labels:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        escaped.append(f'{key}="{value}"')
+    return "{" + ",".join(escaped) + "}"
+
+
+# プロセス内で共有するレジストリ
+metrics = MetricsRegistry()
+
+
+def run_summary(before, after):
+    """
+    2つの snapshot の差分から、1回の実行の要約を返す
+
+    Returns:
+        dict: {"stages": {stage: {"count", "seconds"}}, "counters": {"名前{ラベル}": 値}}
+    """
+    stages = {}
+    for stage, (count, total) in after["stages"].items():
+        prev_count, prev_total = before["stages"].get(stage, (0, 0.0))
+        if count != prev_count:
+            stages[stage] = {"count": count - prev_count, "seconds": round(total - prev_total, 3)}
+    counters = {}
+    for (name, labels), value in after["counters"].items():
+        delta = value - before["counters"].get((name, labels), 0)
+        if delta:
+            counters[f"{name}{_format_labels(labels)}"] = delta
+    return {"stages": stages, "counters": counters}
+
+
+def format_run_summary(summary):
+    """run_summary の結果をログ用の1行にする (所要時間の長い処理から順に並べる)"""
+    stages = sorted(summary["stages"].items(), key=lambda item: -item[1]["seconds"])
+    parts = [f"{stage}: {s['count']}回/{s['seconds']:.1f}秒" for stage, s in stages]
+    parts += [f"{name}={value}" for name, value in sorted(summary["counters"].items())]
+    return ", ".join(parts)
+
+
+def write_metrics_file(path=METRICS_FILE):
+    """
+    Prometheus のテキスト形式でメトリクスをファイルに書き出す (node_exporter の textfile collector で読み込める)
+
+    Args:
+        path: 出力先のパス。空の場合は書き出さない
+    """
+    if not path or not metrics.enabled:
+        return
+    try:
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(metrics.render())
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.error(f"メトリクスファイルの書き出しに失敗しました: {e}")
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = metrics.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port=METRICS_PORT, host="0.0.0.0"):
+    """
+    /metrics でメトリクスを返すHTTPサーバーをバックグラウンドで起動する
+
+    Args:
+        port: 待ち受けるポート。0 の場合は起動しない
+        host: 待ち受けるホスト
+
+    Returns:
+        ThreadingHTTPServer | None: 起動したサーバー
+    """
+    if not port or not metrics.enabled:
+        return None
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="MetricsServer", daemon=True).start()
+    logger.info(f"メトリクスのエンドポイントを起動しました: http://{host}:{port}/metrics")
+    return server
@@ -19,10 +19,10 @@ def remove_html_tags(text):
     Returns:
         str: HTMLタグが除去されたテキスト
     """
-    logger.debug(f"remove_html_tags 関数が呼ばれました。text={text[:50]}...") # 引数の内容を一部ログ出力
+    logger.debug("remove_html_tags 関数が呼ばれました。text={}...", text[:50]) # 引数の内容を一部ログ出力
     soup = BeautifulSoup(text, 'html.parser')
     cleaned_text = soup.get_text(separator=' ', strip=True)
-    logger.debug(f"remove_html_tags 関数が終了しました。cleaned_text={cleaned_text[:50]}...") # 戻り値の内容を一部ログ出力
+    logger.debug("remove_html_tags 関数が終了しました。cleaned_text={}...", cleaned_text[:50]) # 戻り値の内容を一部ログ出力
     return cleaned_text
 
 def decode_html_entities(text):
@@ -35,9 +35,9 @@ def decode_html_entities(text):
     Returns:
         str: HTMLエンティティがデコードされたテキスト
     """
-    logger.debug(f"decode_html_entities 関数が呼ばれました。text={text[:50]}...")
+    logger.debug("decode_html_entities 関数が呼ばれました。text={}...", text[:50])
     decoded_text = html.unescape(text) if text else text # None対策
-    logger.debug(f"decode_html_entities 関数が終了しました。decoded_text={decoded_text[:50]}...")
+    logger.debug("decode_html_entities 関数が終了しました。decoded_text={}...", decoded_text[:50])
     return decoded_text
 
 def normalize_text(text):
@@ -50,9 +50,9 @@ def normalize_text(text):
     Returns:
         str: 正規化されたテキスト
     """
-    logger.debug(f"normalize_text 関数が呼ばれました。text={text[:50]}...")
+    logger.debug("normalize_text 関数が呼ばれました。text={}...", text[:50])
     normalized_text = unicodedata.normalize('NFKC', text) if text else text
-    logger.debug(f"normalize_text 関数が終了しました。normalized_text={normalized_text[:50]}...")
+    logger.debug("normalize_text 関数が終了しました。normalized_text={}...", normalized_text[:50])
     return normalized_text
 
 def remove_extra_whitespaces(text):
@@ -61,14 +61,71 @@ def remove_extra_whitespaces(text):
     全角空白と半角空白に対応。
     textが文字列でない場合は、そのまま返す。
     """
-    logger.debug(f"remove_extra_whitespaces 関数が呼ばれました。text={text[:50]}...")
+    logger.debug("remove_extra_whitespaces 関数が呼ばれました。text={}...", text[:50])
     if not isinstance(text, str):
         return text
     text = text.strip()
     text = re.sub(r'[ 　]+', ' ', text)
-    logger.debug(f"remove_extra_whitespaces 関数が終了しました。text={text[:50]}...")
+    logger.debug("remove_extra_whitespaces 関数が終了しました。text={}...", text[:50])
     return text
 
+# clean_text 用のコンパイル済みパターン
+# script/style の中身とコメントは BeautifulSoup の get_text() と同様に捨てる
+_IGNORED_BLOCKS = re.compile(r"<(script|style)\b[^>]*>.*?</\1\s*>|<!--.*?-->", re.IGNORECASE | re.DOTALL)
+# タグ (開始・終了タグ、DOCTYPE などの宣言、処理命令)
+_TAGS = re.compile(r"</?[A-Za-z][^>]*>|<![^>]*>|<\?[^>]*>")
+_EXTRA_WHITESPACES = re.compile(r'[ 　]+')
+
+
+def clean_text(text):
+    """
+    テキストをクレンジングする
+
+    remove_html_tags → decode_html_entities → normalize_text → remove_extra_whitespaces を
+    順に適用した場合と同じ結果を、BeautifulSoup を使わずコンパイル済みの正規表現で1回の処理で返す。
+
+    Args:
+        text: HTMLタグや実体参照を含むテキスト
+
+    Returns:
+        str: クレンジングされたテキスト。text が空の場合は空文字列
+    """
+    if not text:
+        return ""
+    if "<" in text:
+        text = _IGNORED_BLOCKS.sub("<br>", text)
+        # get_text(separator=' ', strip=True) と同様に、テキストノードごとに前後の空白を除いて連結する
+        segments = []
+        for segment in _TAGS.split(text):
+            if "&" in segment:
+                segment = html.unescape(segment)
+            segment = segment.strip()
+            if segment:
+                segments.append(segment)
+        text = " ".join(segments)
+    else:
+        text = (html.unescape(text) if "&" in text else text).strip()
+    # decode_html_entities 相当 (パーサーが1回デコードした後に残る、二重にエスケープされた実体参照)
+    if "&" in text:
+        text = html.unescape(text)
+    text = unicodedata.normalize('NFKC', text)
+    return _EXTRA_WHITESPACES.sub(' ', text.strip())
+
+
+def clean_texts(fragments):
+    """
+    複数のテキスト断片をまとめてクレンジングする
+
+    Args:
+        fragments: テキスト断片のリスト
+
+    Returns:
+        list: クレンジングされたテキストのリスト (入力と同じ順序・同じ件数)
+    """
+    _clean = clean_text
+    return [_clean(fragment) for fragment in fragments]
+
+
 def parse_datetime_from_html(html_snippet):
     """
     HTMLスニペットからdatetimeオブジェクトを生成する。
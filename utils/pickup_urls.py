@@ -0,0 +1,102 @@
+import threading
+from datetime import datetime, timedelta
+from pymongo import ASCENDING
+from config import PICKUP_URL_COLLECTION, PICKUP_URL_TTL_HOURS, PICKUP_URL_MISS_TTL_MINUTES
+from loggings.logger import get_logger
+from utils.database import get_database, ensure_ttl_index
+
+logger = get_logger(__name__)
+
+_store = None
+_store_lock = threading.Lock()
+
+
+class PickupUrlStore:
+    """
+    ピックアップページのURLから記事本体のURLへの対応を保存するストア
+
+    MongoDB のコレクションに pickup_url ごとに1ドキュメントを保存し、プロセス内ではメモリにも保持する。
+    resolved_at の TTL インデックスにより、ttl_hours 時間が経過した対応は自動的に削除される
+    (TTL の削除は遅れることがあるため、読み込み時にも期限を確認する)。
+    MongoDB に対応の無かったURLも未解決としてメモリに保持し、miss_ttl_minutes 分の間は問い合わせ直さない。
+    期限の切れたメモリ上の対応は、他のワーカーが解決し直している場合があるため MongoDB から読み込み直す。
+    """
+
+    def __init__(self, collection_name=PICKUP_URL_COLLECTION, ttl_hours=PICKUP_URL_TTL_HOURS,
+                 miss_ttl_minutes=PICKUP_URL_MISS_TTL_MINUTES):
+        """
+        Args:
+            collection_name: 対応を保存するコレクション名
+            ttl_hours: 対応を保持する時間
+            miss_ttl_minutes: 未解決だったURLを、MongoDB に問い合わせ直さずに未解決として扱う時間 (分)
+        """
+        self.ttl = timedelta(hours=ttl_hours)
+        self.miss_ttl = timedelta(minutes=miss_ttl_minutes)
+        self.collection = get_database()[collection_name]
+        self.collection.create_index([("pickup_url", ASCENDING)], unique=True, background=True)
+        ensure_ttl_index(self.collection, "resolved_at", int(ttl_hours * 3600))
+        self._cache = {}  # pickup_url -> (article_url, resolved_at)。未解決の場合は (None, 問い合わせた日時)
+        self._lock = threading.Lock()
+
+    def _fresh(self, entry, now):
+        if entry is None:
+            return False
+        article_url, cached_at = entry
+        return now - cached_at < (self.ttl if article_url else self.miss_ttl)
+
+    def _query(self, pickup_urls, now):
+        """pickup_urls の期限内の対応を MongoDB から読み込んでメモリに保持する (対応の無いURLは未解決として保持する)"""
+        documents = self.collection.find(
+            {"pickup_url": {"$in": pickup_urls}, "resolved_at": {"$gte": now - self.ttl}},
+            {"_id": 0, "pickup_url": 1, "article_url": 1, "resolved_at": 1},
+        )
+        entries = {url: (None, now) for url in pickup_urls}
+        for doc in documents:
+            entries[doc["pickup_url"]] = (doc["article_url"], doc["resolved_at"])
+        with self._lock:
+            self._cache.update(entries)
+        return entries
+
+    def prefetch(self, pickup_urls):
+        """
+        メモリに無い (または期限の切れた) pickup_urls の対応を1回のクエリでまとめて読み込む (記事一覧ページごとに呼ぶ)
+
+        Args:
+            pickup_urls: ピックアップページのURLのリスト
+        """
+        now = datetime.now()
+        with self._lock:
+            missing = list(dict.fromkeys(url for url in pickup_urls if not self._fresh(self._cache.get(url), now)))
+        if missing:
+            self._query(missing, now)
+
+    def get(self, pickup_url):
+        """
+        ピックアップページに対応する記事本体のURLを返す
+
+        Returns:
+            str | None: 記事本体のURL。未登録または期限切れの場合は None
+        """
+        now = datetime.now()
+        with self._lock:
+            entry = self._cache.get(pickup_url)
+        if not self._fresh(entry, now):
+            entry = self._query([pickup_url], now)[pickup_url]
+        return entry[0]
+
+    def put(self, pickup_url, article_url):
+        """ピックアップページと記事本体のURLの対応を保存する"""
+        now = datetime.now()
+        with self._lock:
+            self._cache[pickup_url] = (article_url, now)
+        self.collection.update_one({"pickup_url": pickup_url},
+                                   {"$set": {"article_url": article_url, "resolved_at": now}}, upsert=True)
+
+
+def get_pickup_url_store():
+    """プロセス内で共有する PickupUrlStore を返す"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = PickupUrlStore()
+        return _store
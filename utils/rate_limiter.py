@@ -0,0 +1,228 @@
+import asyncio
+import random
+import threading
+import time
+from contextlib import contextmanager, asynccontextmanager
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+from config import (RATE_LIMIT_INITIAL_RATE, RATE_LIMIT_MIN_RATE, RATE_LIMIT_MAX_RATE, RATE_LIMIT_BURST,
+                    RATE_LIMIT_INCREASE, RATE_LIMIT_DECREASE, RATE_LIMIT_SLOW_SECONDS, RATE_LIMIT_JITTER,
+                    RATE_LIMIT_MAX_CONCURRENCY)
+from loggings.logger import get_logger
+from utils.metrics import metrics
+
+logger = get_logger(__name__)
+
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+# 非同期版で同時実行数の空きを待つときの確認間隔 (秒)
+_ASYNC_POLL_INTERVAL = 0.05
+
+
+def parse_retry_after(value):
+    """
+    Retry-After ヘッダーの値 (秒数または HTTP-date) を秒数にする
+
+    Returns:
+        float | None: 待つ秒数。解釈できない場合は None
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class HostBucket:
+    """
+    ホストごとのトークンバケット
+
+    rate (リクエスト/秒) でトークンが溜まり、最大 burst 個まで連続して送れる。
+    応答が成功して速ければ rate を加算で増やし (additive increase)、429 / 5xx / 通信失敗 / 遅い応答では
+    乗算で減らす (multiplicative decrease)。
+    """
+
+    def __init__(self, host, rate=RATE_LIMIT_INITIAL_RATE, min_rate=RATE_LIMIT_MIN_RATE,
+                 max_rate=RATE_LIMIT_MAX_RATE, burst=RATE_LIMIT_BURST):
+        self.host = host
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.tokens = 1.0  # 最初のリクエストだけは待たずに送る
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0  # Retry-After などで送信を止める時刻
+        self.last_decrease = 0.0
+
+    def reserve(self, now):
+        """
+        トークンを1つ予約し、送信まで待つ秒数を返す (トークンが足りなければ負の残高として先に予約する)
+        """
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        return max(wait, self.blocked_until - now)
+
+    def on_success(self):
+        self.rate = min(self.max_rate, self.rate + RATE_LIMIT_INCREASE)
+
+    def on_failure(self, now, retry_after=None):
+        # 同時に送っていたリクエストの失敗で何度も減らさないよう、減らすのは1間隔に1回まで
+        if now - self.last_decrease >= 1.0 / self.rate:
+            self.rate = max(self.min_rate, self.rate * RATE_LIMIT_DECREASE)
+            self.last_decrease = now
+        if retry_after:
+            self.blocked_until = max(self.blocked_until, now + retry_after)
+
+
+class Permit:
+    """1回のリクエストの送信許可。応答を受け取ったら record() で結果を知らせる"""
+
+    __slots__ = ("limiter", "host", "started", "recorded")
+
+    def __init__(self, limiter, host):
+        self.limiter = limiter
+        self.host = host
+        self.started = time.monotonic()
+        self.recorded = False
+
+    def record(self, status, retry_after=None):
+        """
+        応答の結果をレート制御に反映する
+
+        Args:
+            status: ステータスコード。通信に失敗した場合は None
+            retry_after: Retry-After ヘッダーの値 (文字列) または秒数
+        """
+        self.recorded = True
+        self.limiter.record(self.host, status, time.monotonic() - self.started, retry_after)
+
+
+class RateLimiter:
+    """
+    すべての取得経路 (ブラウザ・HTTP・非同期クローラー) で共有するレート制限
+
+    ホストごとのトークンバケットで送信間隔を決め、プロセス全体の同時リクエスト数を max_concurrency までに制限する。
+    送信間隔は応答のステータスと応答時間から AIMD で調整するため、サイトが速く応答している間は間隔を詰め、
+    429 や 5xx、応答の遅延が出たらすぐに間隔を広げる。
+    """
+
+    def __init__(self, max_concurrency=RATE_LIMIT_MAX_CONCURRENCY, jitter=RATE_LIMIT_JITTER, **bucket_options):
+        """
+        Args:
+            max_concurrency: プロセス全体で同時に送るリクエスト数の上限
+            jitter: 待機時間に加えるゆらぎ (送信間隔に対する割合)
+            bucket_options: HostBucket に渡す rate / min_rate / max_rate / burst
+        """
+        self.max_concurrency = max_concurrency
+        self.jitter = jitter
+        self.bucket_options = bucket_options
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+
+    def _bucket(self, host):
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = HostBucket(host, **self.bucket_options)
+        return bucket
+
+    def reserve(self, url):
+        """
+        url のホストのトークンを予約し、(ホスト, 送信まで待つ秒数) を返す
+        """
+        host = urlsplit(url).netloc
+        with self._lock:
+            bucket = self._bucket(host)
+            wait = bucket.reserve(time.monotonic())
+            interval = 1.0 / bucket.rate
+        if wait > 0 and self.jitter:
+            wait += random.uniform(0, self.jitter * interval)
+        return host, wait
+
+    def record(self, host, status, latency, retry_after=None):
+        """応答のステータスと応答時間をホストの送信レートに反映する"""
+        if not isinstance(retry_after, (int, float)):
+            retry_after = parse_retry_after(retry_after)
+        with self._lock:
+            bucket = self._bucket(host)
+            previous = bucket.rate
+            if status is None or status == 429 or status >= 500 or latency > RATE_LIMIT_SLOW_SECONDS:
+                bucket.on_failure(time.monotonic(), retry_after)
+            else:
+                bucket.on_success()
+            rate = bucket.rate
+        if rate < previous:
+            logger.warning(f"送信レートを下げました: {host} {previous:.2f} -> {rate:.2f} req/s "
+                           f"(status={status}, 応答時間={latency:.1f}秒, Retry-After={retry_after})")
+        metrics.inc("scraper_rate_limit_responses_total", host=host,
+                    result="backoff" if rate < previous else "ok")
+
+    def rate(self, host):
+        """ホストの現在の送信レート (リクエスト/秒)"""
+        with self._lock:
+            return self._bucket(host).rate
+
+    @contextmanager
+    def request(self, url):
+        """
+        送信許可を得るまで待ち、Permit を返すコンテキストマネージャ
+
+            with rate_limiter.request(url) as permit:
+                response = page.goto(url)
+                permit.record(response.status if response else None)
+
+        record() を呼ばずに例外で抜けた場合は、通信失敗として扱う。
+        ホストのトークンを待ってから同時リクエスト数の枠を取るため、待機中のリクエストが他のホストへの送信を妨げない。
+        """
+        host, wait = self.reserve(url)
+        with metrics.timer("rate_limit_wait"):
+            if wait > 0:
+                time.sleep(wait)
+            self._slots.acquire()
+        try:
+            permit = Permit(self, host)
+            try:
+                yield permit
+            except Exception:
+                if not permit.recorded:
+                    permit.record(None)
+                raise
+        finally:
+            self._slots.release()
+
+    @asynccontextmanager
+    async def request_async(self, url):
+        """request の非同期版 (イベントループを止めずに待つ)"""
+        host, wait = self.reserve(url)
+        with metrics.timer("rate_limit_wait"):
+            if wait > 0:
+                await asyncio.sleep(wait)
+            while not self._slots.acquire(blocking=False):
+                await asyncio.sleep(_ASYNC_POLL_INTERVAL)
+        try:
+            permit = Permit(self, host)
+            try:
+                yield permit
+            except Exception:
+                if not permit.recorded:
+                    permit.record(None)
+                raise
+        finally:
+            self._slots.release()
+
+
+def get_rate_limiter():
+    """プロセス内で共有する RateLimiter を返す"""
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = RateLimiter()
+        return _rate_limiter
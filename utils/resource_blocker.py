@@ -0,0 +1,143 @@
+import re
+from collections import Counter
+from config import BLOCKED_RESOURCES, BLOCKED_RESOURCE_CATEGORIES, BLOCKED_RESOURCE_ESTIMATED_BYTES
+from loggings.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class ResourceBlocker:
+    """
+    page.route / context.route で記事本文の取得に不要なリクエスト (画像・動画・フォント・広告・解析タグなど) を
+    遮断し、遮断したリクエスト数と推定バイト数を集計するクラス
+    """
+
+    def __init__(self, categories=None, rules=None):
+        """
+        Args:
+            categories: 有効にするカテゴリ名のリスト。None の場合は config.BLOCKED_RESOURCE_CATEGORIES
+            rules: カテゴリ名をキー、{"resource_types": [...], "url_patterns": [...]} を値とする辞書。
+                None の場合は config.BLOCKED_RESOURCES
+        """
+        rules = BLOCKED_RESOURCES if rules is None else rules
+        categories = BLOCKED_RESOURCE_CATEGORIES if categories is None else categories
+
+        # resource_type -> カテゴリ名
+        self._type_rules = {}
+        # (コンパイル済みパターン, カテゴリ名) のリスト
+        self._url_rules = []
+        for category in categories:
+            rule = rules.get(category)
+            if rule is None:
+                logger.warning(f"未定義のブロックカテゴリです: {category}")
+                continue
+            for resource_type in rule.get("resource_types", []):
+                self._type_rules.setdefault(resource_type, category)
+            patterns = rule.get("url_patterns", [])
+            if patterns:
+                self._url_rules.append((re.compile("|".join(re.escape(p) for p in patterns)), category))
+
+        self.blocked_requests = Counter()  # カテゴリ別の遮断数
+        self.blocked_types = Counter()  # resource_type 別の遮断数
+        self.allowed_requests = 0
+
+    def match(self, url, resource_type):
+        """
+        リクエストが遮断対象であれば、そのカテゴリ名を返す
+
+        Args:
+            url: リクエストURL
+            resource_type: Playwright の request.resource_type
+
+        Returns:
+            str | None: 遮断対象のカテゴリ名。遮断しない場合は None
+        """
+        category = self._type_rules.get(resource_type)
+        if category:
+            return category
+        for pattern, category in self._url_rules:
+            if pattern.search(url):
+                return category
+        return None
+
+    def _should_block(self, request):
+        """遮断判定と集計を行う"""
+        category = self.match(request.url, request.resource_type)
+        if category is None:
+            self.allowed_requests += 1
+            return False
+        self.blocked_requests[category] += 1
+        self.blocked_types[request.resource_type] += 1
+        return True
+
+    def handle(self, route):
+        """sync_playwright 用のルートハンドラ"""
+        if self._should_block(route.request):
+            route.abort()
+        else:
+            route.continue_()
+
+    async def handle_async(self, route):
+        """async_playwright 用のルートハンドラ"""
+        if self._should_block(route.request):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    def install(self, target):
+        """
+        ページまたはコンテキストにルートハンドラを設定する (sync_playwright)
+
+        Args:
+            target: Page または BrowserContext
+        """
+        target.route("**/*", self.handle)
+
+    async def install_async(self, target):
+        """
+        ページまたはコンテキストにルートハンドラを設定する (async_playwright)
+
+        Args:
+            target: Page または BrowserContext
+        """
+        await target.route("**/*", self.handle_async)
+
+    @property
+    def total_blocked(self):
+        """遮断したリクエストの総数"""
+        return sum(self.blocked_requests.values())
+
+    @property
+    def estimated_blocked_bytes(self):
+        """
+        遮断したリクエストの推定バイト数。
+        遮断したレスポンスのサイズは取得できないため、resource_type ごとの平均サイズ
+        (config.BLOCKED_RESOURCE_ESTIMATED_BYTES) から見積もる。
+        """
+        default = BLOCKED_RESOURCE_ESTIMATED_BYTES.get("other", 0)
+        return sum(count * BLOCKED_RESOURCE_ESTIMATED_BYTES.get(resource_type, default)
+                   for resource_type, count in self.blocked_types.items())
+
+    def summary(self):
+        """
+        集計結果を返す
+
+        Returns:
+            dict: 遮断数・推定バイト数・カテゴリ別/resource_type 別の内訳・通過数
+        """
+        return {
+            "blocked_requests": self.total_blocked,
+            "estimated_blocked_bytes": self.estimated_blocked_bytes,
+            "by_category": dict(self.blocked_requests),
+            "by_resource_type": dict(self.blocked_types),
+            "allowed_requests": self.allowed_requests,
+        }
+
+    def log_summary(self):
+        """集計結果をログに出力する"""
+        summary = self.summary()
+        logger.info(
+            f"リソースブロック結果: 遮断 {summary['blocked_requests']}件 "
+            f"(推定 {summary['estimated_blocked_bytes'] / 1024 / 1024:.1f}MB), "
+            f"通過 {summary['allowed_requests']}件, 内訳={summary['by_category']}"
+        )
@@ -0,0 +1,151 @@
+import hashlib
+import threading
+from datetime import datetime, timedelta
+from pymongo import ASCENDING
+from config import SEEN_URL_POLICY, SEEN_URL_RECHECK_HOURS
+from loggings.logger import get_logger
+from utils.database import get_database
+
+logger = get_logger(__name__)
+
+_seen_url_filters = {}  # コレクション名 -> SeenUrlFilter
+_seen_url_filters_lock = threading.Lock()
+
+# 既知の記事URLの扱い
+# "off": フィルタしない
+# "skip": 保存済みの記事は処理しない
+# "defer": 保存済みの記事は新しい記事の後に回す
+# "recheck_recent": 保存済みの記事のうち、公開から SEEN_URL_RECHECK_HOURS 時間以内のものだけ再確認する
+POLICIES = ("off", "skip", "defer", "recheck_recent")
+
+
+def _digest(url):
+    """URL を 8 バイトの整数ダイジェストに変換する"""
+    return int.from_bytes(hashlib.blake2b(url.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class SeenUrlFilter:
+    """
+    保存済みの記事URLを 8 バイトのダイジェストの集合として保持し、
+    ブラウザで開く前に既知の記事を判定するクラス
+    """
+
+    def __init__(self, policy=SEEN_URL_POLICY, recheck_hours=SEEN_URL_RECHECK_HOURS):
+        """
+        Args:
+            policy: 既知の記事URLの扱い (POLICIES のいずれか)
+            recheck_hours: "recheck_recent" で再確認の対象にする公開からの経過時間
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"無効な SEEN_URL_POLICY です: {policy}")
+        self.policy = policy
+        self.recheck_hours = recheck_hours
+        self._seen = set()
+        self._published = {}  # 再確認の対象になり得る記事のダイジェスト -> 公開日時
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._seen)
+
+    def __contains__(self, url):
+        return _digest(url) in self._seen
+
+    def load(self, collection_name):
+        """
+        コレクションのユニークインデックス (url) から保存済みのURLを読み込む
+
+        Args:
+            collection_name: 記事を保存しているコレクション名
+        """
+        collection = get_database()[collection_name]
+        collection.create_index([("url", ASCENDING)], unique=True, background=True)
+
+        # url のみを射影し、インデックスだけで完結するクエリにする
+        seen = {_digest(doc["url"]) for doc in
+                collection.find({}, {"url": 1, "_id": 0}).hint([("url", ASCENDING)]) if doc.get("url")}
+        recent = {}
+        if self.policy == "recheck_recent":
+            since = datetime.now() - timedelta(hours=self.recheck_hours)
+            recent = {_digest(doc["url"]): doc["published_at"] for doc in
+                      collection.find({"published_at": {"$gte": since}}, {"url": 1, "published_at": 1, "_id": 0})
+                      if doc.get("url")}
+
+        with self._lock:
+            self._seen |= seen
+            self._published.update(recent)
+        logger.info(f"保存済みURLを読み込みました: {len(seen)}件 (再確認対象: {len(recent)}件, collection={collection_name})")
+
+    def add(self, url, published_at=None):
+        """
+        保存したURLを登録する
+
+        Args:
+            url: 保存した記事のURL
+            published_at: 記事の公開日時。None の場合は現在時刻として扱う
+        """
+        digest = _digest(url)
+        with self._lock:
+            self._seen.add(digest)
+            self._published[digest] = published_at or datetime.now()
+
+    def _is_recent(self, digest, since):
+        """公開日時が since 以降の記事かどうか"""
+        published_at = self._published.get(digest)
+        return published_at is not None and published_at >= since
+
+    def filter(self, links):
+        """
+        ポリシーに従って、これから処理する記事URLを絞り込む・並べ替える
+
+        Args:
+            links: 記事一覧から取得したURLのリスト
+
+        Returns:
+            list: 処理するURLのリスト
+        """
+        if self.policy == "off":
+            return list(links)
+
+        new_links, known_links = [], []
+        for link in links:
+            (known_links if _digest(link) in self._seen else new_links).append(link)
+
+        if self.policy == "defer":
+            result = new_links + known_links
+        elif self.policy == "recheck_recent":
+            since = datetime.now() - timedelta(hours=self.recheck_hours)
+            result = new_links + [link for link in known_links if self._is_recent(_digest(link), since)]
+        else:
+            result = new_links
+
+        skipped = len(links) - len(result)
+        logger.info(f"既知の記事URL: {len(known_links)}件 / 新規: {len(new_links)}件 "
+                    f"(policy={self.policy}, スキップ: {skipped}件)")
+        return result
+
+
+def get_seen_url_filter(collection_name):
+    """
+    コレクションごとの SeenUrlFilter を返す。初回呼び出し時に保存済みURLを読み込み、
+    以降はプロセス内で共有する (スケジューラの実行をまたいで保持される)。
+
+    Args:
+        collection_name: 記事を保存しているコレクション名
+
+    Returns:
+        SeenUrlFilter: 読み込み済みのフィルタ。読み込みに失敗した場合は空のフィルタ
+    """
+    with _seen_url_filters_lock:
+        seen_filter = _seen_url_filters.get(collection_name)
+        if seen_filter is not None:
+            return seen_filter
+        seen_filter = SeenUrlFilter()
+        if seen_filter.policy != "off":
+            try:
+                seen_filter.load(collection_name)
+            except Exception as e:
+                # 次回の呼び出しで再度読み込めるよう、失敗したフィルタは共有しない
+                logger.error(f"保存済みURLの読み込みに失敗しました。フィルタせずに処理します: {e}")
+                return seen_filter
+        _seen_url_filters[collection_name] = seen_filter
+        return seen_filter
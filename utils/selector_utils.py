@@ -1,5 +1,173 @@
+import argparse
+import copy
+import json
 import os
-from datetime import datetime
+import threading
+from config import SELECTOR_LEARNING_ENABLED, SELECTOR_STATS_FILE, SELECTOR_STATS_WEIGHT
+from loggings.logger import get_logger
+from utils.snapshot_store import SnapshotStore, get_snapshot_store
+
+_logger = get_logger(__name__)
+
+_selector_stats = None
+_selector_stats_lock = threading.Lock()
+
+# 初めて記録する候補の直近の取得率の初期値 (一度も取得できていない候補は、並べ替えでは取得率に関係なく後ろに置く)
+_INITIAL_RATE = 0.5
+
+
+class SelectorStats:
+    """
+    フィールドごと・セレクタ候補ごとの取得結果 (hit / miss) を記録し、直近の取得率の高い候補から試す順序を返す
+
+    直近の取得率は取得結果ごとに weight の重みで更新する指数移動平均で、テンプレートが変わると数件のうちに
+    順序が入れ替わる (先頭の候補が外れた記事では後続の候補が試されるため、新しいテンプレートの候補の取得率が上がる)。
+    並べ替えるのは、候補が互いに排他的なテンプレートごとの代替であるフィールド (抽出仕様で "exclusive": True) だけで、
+    同じページで複数の候補が一致し得る優先順位付きのフォールバック (タイトルと本文など) は設定された順序のまま試す。
+    累計の件数と直近の取得率は path の JSON ファイルに保存し、実行をまたいで引き継ぐ。
+    """
+
+    def __init__(self, path=SELECTOR_STATS_FILE, weight=SELECTOR_STATS_WEIGHT, enabled=SELECTOR_LEARNING_ENABLED):
+        """
+        Args:
+            path: 取得結果を保存するファイル。空の場合は保存しない
+            weight: 直近の取得率を1件の取得結果で更新する重み (0〜1)
+            enabled: 取得率の高い候補から試すかどうか (False の場合も取得結果は記録する)
+        """
+        self.path = path
+        self.weight = weight
+        self.enabled = enabled
+        self._stats = {}  # フィールド名 -> {セレクタ: {"hits", "misses", "rate"}}
+        self._dirty = False
+        self._lock = threading.Lock()
+        if path:
+            self.load()
+
+    def load(self):
+        """保存済みの取得結果を読み込む (ファイルが無い場合は何もしない)"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                stats = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            _logger.warning(f"セレクタの取得結果の読み込みに失敗しました: {self.path} - {e}")
+            return
+        with self._lock:
+            self._stats = stats
+
+    def save(self):
+        """前回の保存以降に記録があれば、取得結果をファイルに書き出す"""
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            data = json.dumps(self._stats, ensure_ascii=False, indent=2)
+            self._dirty = False
+        try:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            _logger.error(f"セレクタの取得結果の書き出しに失敗しました: {e}")
+
+    def order(self, field, candidates):
+        """
+        セレクタ候補を、直近の取得率の高い順に並べ替える (取得率が同じ候補は元の順序を保つ)
+
+        一度も取得できていない候補は、記録のある候補より前には出さない。
+
+        Args:
+            field: フィールド名
+            candidates: セレクタ候補のリスト
+
+        Returns:
+            list: 試す順に並べたセレクタ候補のリスト
+        """
+        if not self.enabled or len(candidates) < 2:
+            return list(candidates)
+        with self._lock:
+            field_stats = self._stats.get(field, {})
+            entries = [field_stats.get(selector, {}) for selector in candidates]
+        rates = [entry["rate"] if entry.get("hits") else -1.0 for entry in entries]
+        order = sorted(range(len(candidates)), key=lambda i: -rates[i])
+        return [candidates[i] for i in order]
+
+    def record(self, field, candidates, selector):
+        """
+        candidates を先頭から順に試した結果を記録する
+
+        selector より前の候補は miss、selector は hit とし、selector より後の候補は試していないため記録しない。
+
+        Args:
+            field: フィールド名
+            candidates: 試した順のセレクタ候補のリスト
+            selector: 取得できたセレクタ。どの候補でも取得できなかった場合は None
+        """
+        with self._lock:
+            field_stats = self._stats.setdefault(field, {})
+            for candidate in candidates:
+                entry = field_stats.setdefault(candidate, {"hits": 0, "misses": 0, "rate": _INITIAL_RATE})
+                hit = candidate == selector
+                entry["hits" if hit else "misses"] += 1
+                entry["rate"] += self.weight * ((1.0 if hit else 0.0) - entry["rate"])
+                if hit:
+                    break
+            self._dirty = True
+
+    def order_spec(self, spec):
+        """
+        抽出仕様 (build_extraction_spec) の各フィールドのセレクタ候補を、試す順に並べ替えた抽出仕様を返す
+
+        "exclusive": True のフィールドだけを並べ替え、それ以外のフィールドは設定された優先順位のまま試す。
+        """
+        if not self.enabled:
+            return spec
+        fields = {}
+        for name, field in spec.get("fields", {}).items():
+            if field.get("exclusive"):
+                field = {**field, "selectors": self.order(name, field["selectors"])}
+            fields[name] = field
+        return {**spec, "fields": fields}
+
+    def record_result(self, spec, result):
+        """order_spec で並べ替えた抽出仕様と、その抽出結果からフィールドごとの取得結果を記録する"""
+        for name, field in spec.get("fields", {}).items():
+            self.record(name, field["selectors"], result["fields"].get(name, {}).get("selector"))
+
+    def summary(self):
+        """
+        フィールドごとの取得結果を、試す順に並べて返す
+
+        Returns:
+            dict: {フィールド名: [{"selector", "hits", "misses", "hit_rate", "rate"}, ...]}。
+                hit_rate は累計の取得率、rate は直近の取得率
+        """
+        with self._lock:
+            stats = copy.deepcopy(self._stats)
+        summary = {}
+        for field, field_stats in sorted(stats.items()):
+            rows = []
+            for selector in self.order(field, list(field_stats)):
+                entry = field_stats[selector]
+                total = entry["hits"] + entry["misses"]
+                rows.append({"selector": selector, "hits": entry["hits"], "misses": entry["misses"],
+                             "hit_rate": round(entry["hits"] / total, 3) if total else None,
+                             "rate": round(entry["rate"], 3)})
+            summary[field] = rows
+        return summary
+
+
+def get_selector_stats():
+    """プロセス内で共有する SelectorStats を返す (初回の呼び出しで保存済みの取得結果を読み込む)"""
+    global _selector_stats
+    with _selector_stats_lock:
+        if _selector_stats is None:
+            _selector_stats = SelectorStats()
+        return _selector_stats
+
 
 class SelectorUtils:
     """
@@ -7,42 +175,75 @@ class SelectorUtils:
     セレクタ耐障害性・保守性を向上させるユーティリティクラス
     """
 
-    def __init__(self, snapshot_dir="debug_snapshots", logger=None):
-        self.snapshot_dir = snapshot_dir
+    def __init__(self, snapshot_dir=None, logger=None, stats=None):
+        """
+        Args:
+            snapshot_dir: スナップショットの保存先。None の場合はプロセス内で共有する SnapshotStore (SNAPSHOT_DIR) を使う
+            logger: ロガー
+            stats: セレクタ候補ごとの取得結果を記録する SelectorStats。None の場合はプロセス内で共有するものを使う
+        """
+        self.snapshots = get_snapshot_store() if snapshot_dir is None else SnapshotStore(directory=snapshot_dir)
         self.logger = logger
+        self.stats = stats if stats is not None else get_selector_stats()
 
-    def try_multiple_selectors(self, page, selectors):
+    def try_multiple_selectors(self, page, selectors, field=None, exclusive=False):
         """
         複数のセレクタ候補を順に試し、最初に見つかった要素を返す。
+        field を指定した場合は取得結果を記録し、exclusive (候補が互いに排他的な代替) の場合は直近の取得率の高い候補から試す。
         """
+        if field is not None and exclusive:
+            selectors = self.stats.order(field, selectors)
         for selector in selectors:
             el = page.locator(selector).first
             if el and el.is_visible():
+                if field is not None:
+                    self.stats.record(field, selectors, selector)
                 return el
+        if field is not None:
+            self.stats.record(field, selectors, None)
         return None
 
     def save_html_snapshot(self, page, url, prefix="snapshot"):
         """
         セレクタ取得失敗時にHTMLスナップショットを保存する
+
+        prefix にリストを渡すと、1回取得したHTMLを複数の失敗の種類として記録する。
+        失敗の種類ごとの保存件数の上限を超えている場合は page.content() を取得しない。
+
+        Returns:
+            str | None: 保存するHTMLのハッシュ。保存しない場合は None
         """
+        prefixes = self.snapshots.admit([prefix] if isinstance(prefix, str) else prefix)
+        if not prefixes:
+            return None
         try:
             html = page.content()
-            safe_url = (
-                url.replace("https://", "")
-                .replace("http://", "")
-                .replace("/", "_")
-                .replace("?", "_")
-                .replace(":", "_")
-            )
-            fname = f"{prefix}_{safe_url}_{datetime.now().strftime('%Y%m%d%H%M%S')}.html"
-            os.makedirs(self.snapshot_dir, exist_ok=True)
-            path = os.path.join(self.snapshot_dir, fname)
-            with open(path, "w", encoding="utf-8") as f:
-                f.write(html)
-            if self.logger:
-                self.logger.info(f"HTMLスナップショット保存: {path}")
-            return path
         except Exception as e:
             if self.logger:
                 self.logger.error(f"HTMLスナップショット保存失敗: {e}")
-            return None
\ No newline at end of file
+            return None
+        return self.snapshots.save(html, url, prefixes)
+
+    def save_html(self, html, url, prefix="snapshot"):
+        """
+        取得済みのHTMLをスナップショットとして保存する (圧縮と書き込みはバックグラウンドで行う)
+
+        Returns:
+            str | None: 保存するHTMLのハッシュ。保存しない場合は None
+        """
+        prefixes = self.snapshots.admit([prefix] if isinstance(prefix, str) else prefix)
+        if not prefixes:
+            return None
+        return self.snapshots.save(html, url, prefixes)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="セレクタ候補ごとの取得結果を表示する")
+    parser.add_argument("path", nargs="?", default=SELECTOR_STATS_FILE)
+    args = parser.parse_args()
+
+    for field, rows in SelectorStats(path=args.path).summary().items():
+        print(field)
+        for row in rows:
+            hit_rate = "-" if row["hit_rate"] is None else f"{row['hit_rate']:.1%}"
+            print(f"  {row['rate']:.3f} (累計 {hit_rate}, hit {row['hits']} / miss {row['misses']})  {row['selector']}")
@@ -0,0 +1,254 @@
+import argparse
+import collections
+import gzip
+import hashlib
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from config import SNAPSHOT_DIR, SNAPSHOT_MAX_PER_HOUR, SNAPSHOT_QUEUE_SIZE
+from loggings.logger import get_logger
+from utils.metrics import metrics
+
+logger = get_logger(__name__)
+
+_store = None
+_store_lock = threading.Lock()
+
+# キューに入れると書き込みスレッドを終了する値
+_STOP = object()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL,
+    prefix TEXT NOT NULL,
+    captured_at TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS snapshots_url ON snapshots (url, captured_at);
+CREATE INDEX IF NOT EXISTS snapshots_prefix ON snapshots (prefix, captured_at);
+CREATE INDEX IF NOT EXISTS snapshots_captured_at ON snapshots (captured_at);
+"""
+
+
+class SnapshotStore:
+    """
+    HTMLスナップショットを、内容のハッシュで重複を除いて gzip で圧縮して保存するストア
+
+    HTML本体は objects/<ハッシュの先頭2桁>/<ハッシュ>.html.gz に1つだけ保存し、取得したURL・失敗の種類 (prefix)・
+    日時は index.sqlite3 の索引に記録する。圧縮と書き込みはバックグラウンドのスレッドで行い、
+    失敗の種類ごとに1時間あたり max_per_hour 件までしか保存しないため、テンプレートの変更でセレクタが
+    一斉に外れてもクロールのスレッドは止まらず、ディスクも埋まらない。
+    """
+
+    def __init__(self, directory=SNAPSHOT_DIR, max_per_hour=SNAPSHOT_MAX_PER_HOUR, queue_size=SNAPSHOT_QUEUE_SIZE):
+        """
+        Args:
+            directory: スナップショットの保存先
+            max_per_hour: 失敗の種類ごとに、1時間あたりに保存するスナップショットの上限 (0 の場合は制限しない)
+            queue_size: 書き込み待ちのスナップショットの上限
+        """
+        self.directory = directory
+        self.index_path = os.path.join(directory, "index.sqlite3")
+        self.max_per_hour = max_per_hour
+        self._recent = collections.defaultdict(collections.deque)  # prefix -> 保存した時刻 (monotonic)
+        self._recent_lock = threading.Lock()
+        self._jobs = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    def object_path(self, digest):
+        """ハッシュに対応する圧縮済みHTMLのパス"""
+        return os.path.join(self.directory, "objects", digest[:2], f"{digest}.html.gz")
+
+    def admit(self, prefixes):
+        """
+        失敗の種類ごとの上限を超えていない prefix だけを返す (返した prefix は保存した件数に数える)
+
+        page.content() の取得より前に呼び、上限を超えた失敗ではHTMLを取得しない。
+
+        Args:
+            prefixes: 失敗の種類のリスト
+
+        Returns:
+            list: 保存してよい失敗の種類のリスト
+        """
+        if not self.max_per_hour:
+            return list(prefixes)
+        now = time.monotonic()
+        admitted = []
+        with self._recent_lock:
+            for prefix in prefixes:
+                recent = self._recent[prefix]
+                while recent and now - recent[0] >= 3600:
+                    recent.popleft()
+                if len(recent) < self.max_per_hour:
+                    recent.append(now)
+                    admitted.append(prefix)
+                else:
+                    metrics.inc("scraper_snapshots_total", result="rate_limited")
+        return admitted
+
+    def save(self, html, url, prefixes):
+        """
+        スナップショットの書き込みをバックグラウンドのスレッドに依頼する (書き込みの完了は待たない)
+
+        Args:
+            html: ページのHTML
+            url: ページのURL
+            prefixes: 失敗の種類のリスト (1つのHTMLに複数の種類を記録する)
+
+        Returns:
+            str | None: HTMLのハッシュ。書き込み待ちが上限を超えて保存しない場合は None
+        """
+        data = html.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        self._start()
+        try:
+            self._jobs.put_nowait((data, digest, url, list(prefixes), datetime.now()))
+        except queue.Full:
+            metrics.inc("scraper_snapshots_total", result="dropped")
+            logger.warning(f"書き込み待ちのスナップショットが多いため保存しません: {url}")
+            return None
+        return digest
+
+    def flush(self):
+        """書き込み待ちのスナップショットをすべて書き込むまで待つ"""
+        if self._thread is not None:
+            self._jobs.join()
+
+    def close(self):
+        """書き込み待ちのスナップショットを書き込み、書き込みスレッドを止める"""
+        with self._thread_lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._jobs.put(_STOP)
+            thread.join()
+
+    def _start(self):
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._serve, name="SnapshotWriter", daemon=True)
+                self._thread.start()
+
+    def _connect(self):
+        os.makedirs(self.directory, exist_ok=True)
+        connection = sqlite3.connect(self.index_path)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(_SCHEMA)
+        return connection
+
+    def _serve(self):
+        connection = None
+        while True:
+            job = self._jobs.get()
+            try:
+                if job is _STOP:
+                    break
+                if connection is None:
+                    connection = self._connect()
+                self._write(connection, *job)
+            except Exception as e:
+                logger.error(f"HTMLスナップショット保存失敗: {e}")
+            finally:
+                self._jobs.task_done()
+        if connection is not None:
+            connection.close()
+
+    def _write(self, connection, data, digest, url, prefixes, captured_at):
+        path = self.object_path(digest)
+        if os.path.exists(path):
+            metrics.inc("scraper_snapshots_total", result="deduplicated")
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(gzip.compress(data))
+            os.replace(tmp_path, path)
+            metrics.inc("scraper_snapshots_total", result="saved")
+        with connection:
+            connection.executemany(
+                "INSERT INTO snapshots (url, prefix, captured_at, digest, size) VALUES (?, ?, ?, ?, ?)",
+                [(url, prefix, captured_at.isoformat(timespec="seconds"), digest, len(data)) for prefix in prefixes],
+            )
+        logger.info(f"HTMLスナップショット保存: {url} ({', '.join(prefixes)}) -> {digest[:12]}")
+
+    def find(self, url=None, prefix=None, since=None, until=None, limit=100):
+        """
+        索引からスナップショットを新しい順に検索する
+
+        Args:
+            url: ページのURL (前方一致)
+            prefix: 失敗の種類
+            since: この日時以降に取得したもの
+            until: この日時より前に取得したもの
+            limit: 最大の件数
+
+        Returns:
+            list: [{"url", "prefix", "captured_at", "digest", "size", "path"}, ...]
+        """
+        if not os.path.exists(self.index_path):
+            return []
+        conditions, params = [], []
+        if url:
+            conditions.append("url >= ? AND url < ?")
+            params += [url, url + "\U0010ffff"]
+        if prefix:
+            conditions.append("prefix = ?")
+            params.append(prefix)
+        if since:
+            conditions.append("captured_at >= ?")
+            params.append(since.isoformat(timespec="seconds"))
+        if until:
+            conditions.append("captured_at < ?")
+            params.append(until.isoformat(timespec="seconds"))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        connection = sqlite3.connect(self.index_path)
+        try:
+            rows = connection.execute(
+                f"SELECT url, prefix, captured_at, digest, size FROM snapshots {where} "
+                f"ORDER BY captured_at DESC, id DESC LIMIT ?", params + [limit]).fetchall()
+        finally:
+            connection.close()
+        return [{"url": url, "prefix": prefix, "captured_at": captured_at, "digest": digest, "size": size,
+                 "path": self.object_path(digest)} for url, prefix, captured_at, digest, size in rows]
+
+    def read(self, digest):
+        """ハッシュに対応するHTMLを読み込む"""
+        with gzip.open(self.object_path(digest), "rt", encoding="utf-8") as f:
+            return f.read()
+
+
+def get_snapshot_store():
+    """プロセス内で共有する SnapshotStore を返す"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SnapshotStore()
+        return _store
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HTMLスナップショットの検索")
+    parser.add_argument("--dir", default=SNAPSHOT_DIR)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    find_parser = subparsers.add_parser("find", help="URL・失敗の種類・日時で検索する")
+    find_parser.add_argument("--url", help="URL (前方一致)")
+    find_parser.add_argument("--prefix", help="失敗の種類 (h1_missing / fatal_error など)")
+    find_parser.add_argument("--since", type=datetime.fromisoformat, help="この日時以降 (例: 2024-01-01T09:00)")
+    find_parser.add_argument("--until", type=datetime.fromisoformat, help="この日時より前")
+    find_parser.add_argument("--limit", type=int, default=100)
+    show_parser = subparsers.add_parser("show", help="HTMLを出力する")
+    show_parser.add_argument("digest")
+    args = parser.parse_args()
+
+    store = SnapshotStore(directory=args.dir)
+    if args.command == "find":
+        for row in store.find(args.url, args.prefix, args.since, args.until, args.limit):
+            print(f"{row['captured_at']}  {row['prefix']:<14} {row['digest']}  {row['url']}")
+    else:
+        print(store.read(args.digest))